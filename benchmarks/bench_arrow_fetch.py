@@ -0,0 +1,118 @@
+"""
+Fetch time and peak RSS for a large result: fetchall() tuples vs Arrow fetch vs streamed Arrow batches.
+
+Each mode runs in a fresh process so peak RSS is not shared between them.
+
+    python -m benchmarks.bench_arrow_fetch --rows 1000000
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.stand_in import StandInConnector
+from warehouse.fetch import fetch_dataframe, iter_dataframes
+
+DTYPES = {"TOTAL_MINUTESPLAYED": "float64", "TOTAL_GOALS": "float64", "TOTAL_ASSISTS": "float64"}
+
+
+def synthetic_agg_player(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pa.table({
+        "PLAYER_NAME": pa.array([f"Player {i}" for i in range(rows)]),
+        "TEAM_NAME": pa.array([f"Team {i}" for i in rng.integers(0, 2000, rows)]),
+        "LEAGUE_NAME": pa.array([f"League {i}" for i in rng.integers(0, 100, rows)]),
+        "TOTAL_MINUTESPLAYED": pa.array(rng.integers(0, 3500, rows)),
+        "TOTAL_GOALS": pa.array(rng.integers(0, 30, rows)),
+        "TOTAL_ASSISTS": pa.array(rng.integers(0, 20, rows)),
+    })
+
+
+def reset_peak_rss():
+    # Linux only: resets VmHWM so the next reading covers the fetch alone
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def fetch_tuples(cursor):
+    # The previous run_query path, plus the coercion players.get_player_stats used to need
+    df = pd.DataFrame(cursor.fetchall(), columns=[desc[0] for desc in cursor.description])
+    for column in DTYPES:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    return len(df)
+
+
+def fetch_arrow(cursor):
+    return len(fetch_dataframe(cursor, DTYPES))
+
+
+def fetch_stream(cursor):
+    return sum(len(batch) for batch in iter_dataframes(cursor, DTYPES))
+
+
+MODES = {"fetchall": fetch_tuples, "arrow": fetch_arrow, "arrow-stream": fetch_stream}
+
+
+def run_mode(mode, rows, results):
+    table = synthetic_agg_player(rows)
+    # The old path only ever used fetchall(), so hide the Arrow API from it
+    cursor = StandInConnector(0, 0, arrow_table=table, arrow_api=mode != "fetchall").connect().cursor()
+
+    cursor.execute("SELECT * FROM agg_player")
+    reset_peak_rss()
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    fetched = MODES[mode](cursor)
+    results[mode] = (time.perf_counter() - start, peak_rss_mb() - baseline, fetched)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Manager().dict()
+    for mode in MODES:
+        process = context.Process(target=run_mode, args=(mode, args.rows, results))
+        process.start()
+        process.join()
+
+    for mode in MODES:
+        elapsed, rss, fetched = results[mode]
+        print(f"{mode:<14} rows={fetched:>9,}  fetch={elapsed:7.2f}s  peak RSS growth={rss:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Per-query latency: connect-per-query (the old `run_query` path) vs the pooled path.
+
+    python -m benchmarks.bench_connection_pool --queries 50 --threads 4
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stand_in import StandInConnector
+from warehouse.pool import ConnectionPool
+
+QUERY = "SELECT TEAM_NAME, POINTS FROM agg_league"
+
+
+def query_with_new_connection(connector):
+    conn = connector.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(QUERY)
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return rows
+
+
+def query_with_pool(pool):
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERY)
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+
+def timed(fn, queries, threads):
+    def one(_):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(one, range(queries)))
+
+
+def summarise(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{name:<22} mean={statistics.mean(latencies) * 1000:8.1f}ms  "
+          f"p50={statistics.median(latencies) * 1000:8.1f}ms  p95={p95 * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--handshake-ms", type=float, default=250)
+    parser.add_argument("--query-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    connector = StandInConnector(args.handshake_ms / 1000, args.query_ms / 1000)
+    summarise("connect-per-query", timed(lambda: query_with_new_connection(connector), args.queries, args.threads))
+    print(f"  connections opened: {connector.connections_opened}")
+
+    connector = StandInConnector(args.handshake_ms / 1000, args.query_ms / 1000)
+    pool = ConnectionPool(connector.connect, size=args.pool_size)
+    summarise("pooled", timed(lambda: query_with_pool(pool), args.queries, args.threads))
+    metrics = pool.metrics()
+    print(f"  connections opened: {connector.connections_opened}  reuses: {metrics['reuses']}  "
+          f"avg wait: {metrics['avg_wait_s'] * 1000:.1f}ms")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Page latency for independent queries: one after another vs gathered on the shared executor.
+
+Each query runs through the connection pool against a stand-in backend that
+injects a fixed warehouse latency, mirroring the fetches a page makes per render.
+
+    python -m benchmarks.bench_executor --latencies 120,200,80 --renders 10
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.stand_in import StandInConnector
+from warehouse.executor import QueryExecutor
+from warehouse.pool import ConnectionPool
+
+
+def make_query(pool, latency):
+    def query():
+        with pool.connection() as conn:
+            conn.query_latency = latency
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            rows = cursor.fetchall()
+            cursor.close()
+        return rows
+    return query
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latencies", default="120,200,80", help="Comma-separated per-query latency in ms")
+    parser.add_argument("--renders", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    latencies = [float(ms) / 1000 for ms in args.latencies.split(",")]
+    connector = StandInConnector(handshake_latency=0, query_latency=0)
+    pool = ConnectionPool(connector.connect, size=args.workers)
+    executor = QueryExecutor(max_workers=args.workers)
+    queries = {f"q{i}": make_query(pool, latency) for i, latency in enumerate(latencies)}
+
+    sequential, gathered = [], []
+    for _ in range(args.renders):
+        start = time.perf_counter()
+        for query in queries.values():
+            query()
+        sequential.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        executor.gather(queries, timeout=10)
+        gathered.append(time.perf_counter() - start)
+
+    print(f"queries per render: {len(latencies)}  (sum {sum(latencies) * 1000:.0f} ms, slowest {max(latencies) * 1000:.0f} ms)")
+    print(f"sequential  mean={statistics.mean(sequential) * 1000:8.1f} ms")
+    print(f"gathered    mean={statistics.mean(gathered) * 1000:8.1f} ms")
+    executor.shutdown()
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Time and memory of each feature's data path at small, production and 10x data sizes.
+
+For every size a synthetic DuckDB database (see warehouse.synthetic) and an
+up-to-date snapshot of it are written to a temporary directory together with
+a `.streamlit/secrets.toml` pointing the app at them. Every step then runs in
+a fresh interpreter from that directory, so caches start cold and memory
+readings are not shared between steps:
+
+  cold      first call, including snapshot reads and index builds
+  warm      median / p95 of the following calls (what a rerun costs)
+  alloc     peak Python-tracked allocation during one warm call
+  rss       peak RSS growth during the cold call (Linux)
+
+Results are written as JSON; pass an earlier file to --compare to flag regressions.
+
+    python -m benchmarks.bench_features --sizes small,production --out before.json
+    python -m benchmarks.bench_features --compare before.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# warehouse.synthetic.generate arguments; production matches the live warehouse,
+# 10x multiplies the match history and the player table by ten
+SIZES = {
+    "small": {"countries": 1, "leagues_per_country": 1, "teams_per_league": 20, "seasons": 1, "players_per_team": 25},
+    "production": {"countries": 8, "leagues_per_country": 2, "teams_per_league": 20, "seasons": 5,
+                   "players_per_team": 25},
+    "10x": {"countries": 8, "leagues_per_country": 2, "teams_per_league": 20, "seasons": 50,
+            "players_per_team": 250},
+}
+
+STEPS = [
+    "form_results",
+    "team_stats",
+    "goal_model",
+    "prediction_matrix",
+    "player_stats",
+    "league_table",
+    "similar_players",
+    "attendance",
+    "render_league_html",
+    "render_match_history_html",
+    "render_attendance_chart",
+    "render_player_chart",
+]
+
+
+def prepare(step):
+    """Does the step's setup and returns the zero-argument call being measured."""
+    # Every feature module is imported up front, outside the measured calls
+    from features.attendance import build_attendance_chart, get_attendance
+    from features.GoalsPredication import (df_to_html_table, format_match_history, get_prediction_matrices,
+                                           get_team_stats, predict_match)
+    from features.leagueTables import get_league_table
+    from features.MatchResults import fetch_team_results
+    from features.players import get_player_stats, get_similarity_index, minutes_vs_goal_contributions_figure
+    from features.tables import render_html
+    from utils import get_catalog, refresh_snapshot
+
+    catalog = get_catalog()
+    country = catalog.countries()[0]
+    league = catalog.leagues(country)[0]
+    teams = list(catalog.teams(league=league))
+
+    if step == "form_results":
+        return lambda: fetch_team_results(10, [("Win", 3), ("Loss", 1)])
+
+    if step == "team_stats":
+        return lambda: (
+            format_match_history(get_team_stats(teams[0], 10, 1), teams[0], is_home=True),
+            format_match_history(get_team_stats(teams[1], 10, 2), teams[1], is_home=False),
+        )
+
+    if step == "goal_model":
+        # The first call fits every league; later calls are lookups
+        return lambda: predict_match(teams[0], teams[1])
+
+    if step == "prediction_matrix":
+        # The first call builds and saves every league's matrices; later calls are index lookups
+        return lambda: get_prediction_matrices(refresh_snapshot()).predict(teams[0], teams[1], 10)
+
+    if step == "player_stats":
+        return lambda: get_player_stats(country, league, "")
+
+    if step == "league_table":
+        return lambda: get_league_table(league)
+
+    if step == "similar_players":
+        index = get_similarity_index(refresh_snapshot())
+        return lambda: index.nearest(0, 10)
+
+    if step == "attendance":
+        return lambda: get_attendance(teams[:3])
+
+    if step == "render_league_html":
+        table = get_league_table(league)
+        return lambda: render_html(table, classes="league-table")
+
+    if step == "render_match_history_html":
+        history = format_match_history(get_team_stats(teams[0], "All", 1), teams[0], is_home=True)
+        return lambda: df_to_html_table(history, f"🏠 {teams[0]} - Last All Home Games")
+
+    if step == "render_attendance_chart":
+        data = get_attendance(teams[:3])
+        # to_json is the serialization st.plotly_chart sends to the browser
+        return lambda: build_attendance_chart(data).to_json()
+
+    if step == "render_player_chart":
+        players = get_player_stats(country, league, "")
+        return lambda: minutes_vs_goal_contributions_figure(players).to_json()
+
+    raise ValueError(f"Unknown step '{step}'")
+
+
+def run_step(step, repeat):
+    """Measures one step in this process and prints the result as JSON."""
+    from benchmarks.bench_arrow_fetch import reset_peak_rss, peak_rss_mb, current_rss_mb
+
+    call = prepare(step)
+
+    reset_peak_rss()
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    call()
+    cold = time.perf_counter() - start
+    rss = peak_rss_mb() - baseline
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        warm.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    call()
+    alloc = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    warm.sort()
+    print(json.dumps({
+        "cold_ms": cold * 1000,
+        "warm_median_ms": statistics.median(warm) * 1000,
+        "warm_p95_ms": warm[min(len(warm) - 1, int(len(warm) * 0.95))] * 1000,
+        "alloc_peak_mb": alloc / 1024 / 1024,
+        "rss_growth_mb": rss,
+    }))
+
+
+def write_environment(path, size):
+    """Synthetic database, snapshot and secrets for one size. Returns table row counts."""
+    from warehouse.backends import DuckDBBackend
+    from warehouse.fetch import fetch_dataframe
+    from warehouse.snapshot import SnapshotStore
+    from warehouse import synthetic
+
+    database = os.path.join(path, "football.duckdb")
+    tables = synthetic.generate(seed=0, **SIZES[size])
+    synthetic.write(database, tables)
+    backend = DuckDBBackend(database)
+
+    def fetch(query, params, dtypes):
+        conn = backend.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return fetch_dataframe(cursor, dtypes)
+        finally:
+            conn.close()
+
+    snapshot = os.path.join(path, "snapshot")
+    SnapshotStore(snapshot, fetch).refresh(force=True)
+
+    os.makedirs(os.path.join(path, ".streamlit"), exist_ok=True)
+    with open(os.path.join(path, ".streamlit", "secrets.toml"), "w") as f:
+        f.write(f'[backend]\ntype = "duckdb"\n\n[duckdb]\npath = {json.dumps(database)}\n\n'
+                f'[snapshot]\npath = {json.dumps(snapshot)}\n')
+    return {name: len(df) for name, df in tables.items()}
+
+
+def probe(step, path, repeat):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))}
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_features", "--worker", step, "--repeat", str(repeat)],
+        cwd=path, env=env, capture_output=True, text=True,
+    )
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(f"{step} failed:\n{result.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current, threshold):
+    """Prints warm-median ratios against an earlier run. Returns the number of regressions."""
+    regressions = 0
+    print(f"Compared with {previous.get('commit') or 'previous run'} (warm median, regression above {threshold:.2f}x)")
+    for size, result in current["sizes"].items():
+        before = previous.get("sizes", {}).get(size, {}).get("steps", {})
+        for step, timings in result["steps"].items():
+            if step not in before or not before[step]["warm_median_ms"]:
+                continue
+            ratio = timings["warm_median_ms"] / before[step]["warm_median_ms"]
+            flag = "REGRESSION" if ratio > threshold else ""
+            regressions += bool(flag)
+            print(f"  {size:<11} {step:<27} {before[step]['warm_median_ms']:9.2f} -> "
+                  f"{timings['warm_median_ms']:9.2f} ms  {ratio:5.2f}x  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"Comma-separated subset of {', '.join(SIZES)}")
+    parser.add_argument("--steps", default=",".join(STEPS), help="Comma-separated subset of the steps")
+    parser.add_argument("--repeat", type=int, default=20, help="Warm calls per step")
+    parser.add_argument("--out", default=None, help="Results file (default bench_features-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Warm-median ratio counted as a regression")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_step(args.worker, args.repeat)
+        return
+
+    sys.path.insert(0, ROOT)
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+
+    for size in args.sizes.split(","):
+        with tempfile.TemporaryDirectory() as path:
+            start = time.perf_counter()
+            rows = write_environment(path, size)
+            print(f"{size}: {', '.join(f'{name}={count:,}' for name, count in rows.items())} "
+                  f"(generated in {time.perf_counter() - start:.1f}s)")
+
+            steps = {}
+            for step in args.steps.split(","):
+                steps[step] = probe(step, path, args.repeat)
+                print(f"  {step:<27} cold={steps[step]['cold_ms']:9.1f} ms  "
+                      f"warm={steps[step]['warm_median_ms']:8.2f} ms (p95 {steps[step]['warm_p95_ms']:8.2f})  "
+                      f"alloc={steps[step]['alloc_peak_mb']:7.1f} MB  rss={steps[step]['rss_growth_mb']:7.1f} MB")
+            results["sizes"][size] = {"rows": rows, "steps": steps}
+
+    out = args.out or f"bench_features-{commit or 'local'}.json"
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(json.load(f), results, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Several server processes loading the same tables: per-process caches against the shared Arrow cache.
+
+Every worker process loads FACT_TEAM_MATCH, agg_league and agg_player from a
+synthetic DuckDB warehouse (see warehouse.synthetic), all starting at the same
+moment, and then reads every column once. Each mode runs with --processes workers:
+
+  private   each process fetches and keeps its own copy (what per-process st.cache_data does)
+  shared    SharedCache in one directory: one process fetches each table, the others
+            wait for it and memory-map the file it published
+
+Reported per mode:
+
+  fetches   warehouse calls made across all processes
+  memory    growth of the processes' summed PSS (proportional set size) while they hold
+            the tables; PSS splits a shared page between the processes mapping it, so
+            the sum counts shared data once
+  wall      slowest process, from start to holding every table
+
+    python -m benchmarks.bench_shared_cache
+    python -m benchmarks.bench_shared_cache --processes 8 --countries 20 --seasons 10 --latency 0.5
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_arrow_fetch import current_rss_mb
+
+TABLES = ["FACT_TEAM_MATCH", "agg_league", "agg_player"]
+MODES = ["private", "shared"]
+
+
+def pss_mb():
+    # Linux only; elsewhere RSS, which counts shared pages once per process
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return current_rss_mb()
+
+
+def worker(mode, database, cache_path, latency, barrier, results, slot):
+    import pandas as pd
+    from warehouse.backends import DuckDBBackend
+    from warehouse.fetch import fetch_dataframe
+    from warehouse.shared_cache import SharedCache
+    from warehouse.snapshot import TABLES as SPECS
+
+    backend = DuckDBBackend(database)
+    fetches = 0
+
+    def fetch(table):
+        nonlocal fetches
+        fetches += 1
+        time.sleep(latency)  # network and queueing time of a real warehouse
+        conn = backend.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(*SPECS[table]["query"].build())
+            return fetch_dataframe(cursor, SPECS[table].get("dtypes"))
+        finally:
+            conn.close()
+
+    shared = SharedCache(cache_path) if mode == "shared" else None
+    backend.connect().close()  # keep DuckDB's own start-up out of the measurement
+
+    barrier.wait()
+    before = pss_mb()
+    start = time.perf_counter()
+    frames = {}
+    for table in TABLES:
+        if shared is None:
+            frames[table] = fetch(table)
+        else:
+            frames[table] = shared.get(table, "bench", lambda table=table: fetch(table))
+    seconds = time.perf_counter() - start
+
+    # Read every column, so mapped pages are actually faulted in
+    for df in frames.values():
+        for column in df.columns:
+            values = df[column]
+            values.sum() if pd.api.types.is_numeric_dtype(values) else values.max()
+
+    barrier.wait()
+    results[slot] = {"memory": pss_mb() - before, "fetches": fetches, "seconds": seconds}
+    # Hold the tables until every process has measured
+    barrier.wait()
+
+
+def run_mode(mode, args, database, workdir):
+    cache_path = os.path.join(workdir, f"cache-{mode}")
+    context = multiprocessing.get_context("spawn")
+    manager = context.Manager()
+    results = manager.dict()
+    barrier = context.Barrier(args.processes)
+    processes = [
+        context.Process(target=worker, args=(mode, database, cache_path, args.latency, barrier, results, slot))
+        for slot in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    results = [results[slot] for slot in range(args.processes)]
+    manager.shutdown()
+    return {
+        "fetches": sum(result["fetches"] for result in results),
+        "memory": sum(result["memory"] for result in results),
+        "seconds": max(result["seconds"] for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--countries", type=int, default=16)
+    parser.add_argument("--leagues-per-country", type=int, default=2)
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every warehouse call")
+    parser.add_argument("--modes", default=",".join(MODES))
+    args = parser.parse_args()
+
+    from warehouse import synthetic
+
+    workdir = tempfile.mkdtemp()
+    try:
+        database = os.path.join(workdir, "football.duckdb")
+        synthetic.write(database, synthetic.generate(countries=args.countries, seasons=args.seasons, seed=0,
+                                                     leagues_per_country=args.leagues_per_country))
+
+        print(f"{args.processes} processes, tables {', '.join(TABLES)}")
+        print(f"{'mode':<8} {'fetches':>8} {'memory':>12} {'per process':>12} {'wall':>8}")
+        baseline = None
+        for mode in args.modes.split(","):
+            result = run_mode(mode, args, database, workdir)
+            baseline = baseline or result
+            print(f"{mode:<8} {result['fetches']:>8} {result['memory']:>9.1f} MB {result['memory'] / args.processes:>9.1f} MB "
+                  f"{result['seconds']:>7.2f}s"
+                  + ("" if result is baseline else
+                     f"   ({baseline['fetches'] / max(result['fetches'], 1):.1f}x fewer fetches, "
+                     f"{baseline['memory'] / max(result['memory'], 0.1):.1f}x less memory)"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
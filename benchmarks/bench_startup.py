@@ -0,0 +1,110 @@
+"""
+Cold-start cost: import time of main.py and each feature module, and time to first paint per page.
+
+Every measurement runs in a fresh interpreter. Pages are rendered with
+streamlit's AppTest against a small synthetic DuckDB database (see
+warehouse.synthetic) and an up-to-date snapshot of it, so no warehouse is needed.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --budget-ms 1500   # exit 1 if importing main.py exceeds the budget
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["pandas", "plotly.express", "snowflake.connector", "numpy", "pyarrow"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+PAINT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("main.py", default_timeout=120)
+at.secrets["backend"] = {{"type": "duckdb"}}
+at.secrets["duckdb"] = {{"path": {database!r}}}
+at.secrets["snapshot"] = {{"path": {snapshot!r}}}
+at.run()
+if {page!r} != "League tables":
+    at.sidebar.selectbox[0].select({page!r}).run()
+elapsed = time.perf_counter() - start
+errors = [e.message for e in at.exception]
+print(json.dumps({{"seconds": elapsed, "errors": errors, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def write_fixture(path):
+    """Small synthetic DuckDB database plus an up-to-date snapshot of it, so every page can render."""
+    from warehouse.backends import DuckDBBackend
+    from warehouse.fetch import fetch_dataframe
+    from warehouse.snapshot import SnapshotStore
+    from warehouse import synthetic
+
+    database = os.path.join(path, "football.duckdb")
+    synthetic.write(database, synthetic.generate(countries=1, teams_per_league=4, seasons=1, players_per_team=3))
+    backend = DuckDBBackend(database)
+
+    def fetch(query, params, dtypes):
+        conn = backend.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return fetch_dataframe(cursor, dtypes)
+        finally:
+            conn.close()
+
+    snapshot = os.path.join(path, "snapshot")
+    SnapshotStore(snapshot, fetch).refresh(force=True)
+    return database, snapshot
+
+
+def probe(code):
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(result.stderr[-2000:])
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if importing main.py takes longer")
+    parser.add_argument("--skip-paint", action="store_true", help="Only measure import cost")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from main import FEATURES
+
+    print("Import cost (fresh interpreter)")
+    main_import = probe(IMPORT_PROBE.format(module="main", heavy=HEAVY_MODULES))
+    print(f"  {'main':<28} {main_import['seconds'] * 1000:8.1f} ms  loads: {', '.join(main_import['loaded']) or '-'}")
+    for page, (module, _) in FEATURES.items():
+        result = probe(IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES))
+        print(f"  {module:<28} {result['seconds'] * 1000:8.1f} ms  loads: {', '.join(result['loaded']) or '-'}")
+
+    if not args.skip_paint:
+        print("Time to first paint (fresh interpreter, includes streamlit import)")
+        with tempfile.TemporaryDirectory() as tmp:
+            database, snapshot = write_fixture(tmp)
+            for page in FEATURES:
+                result = probe(PAINT_PROBE.format(page=page, database=database, snapshot=snapshot, heavy=HEAVY_MODULES))
+                status = "ok" if not result["errors"] else f"errors: {result['errors']}"
+                print(f"  {page:<28} {result['seconds'] * 1000:8.1f} ms  loads: {', '.join(result['loaded'])}  {status}")
+
+    if args.budget_ms is not None and main_import["seconds"] * 1000 > args.budget_ms:
+        print(f"main.py import took {main_import['seconds'] * 1000:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
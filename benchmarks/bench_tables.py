@@ -0,0 +1,123 @@
+"""
+Rerun cost of the table-producing pages: HTML rebuilt on every rerun (before)
+against the shared, content-hash cached rendering in features.tables (after).
+
+Tables are built from synthetic data (see warehouse.synthetic) at the sizes the
+pages show them:
+
+  league_table      one league's standings (leagueTables)
+  form_table        every team's form over the last 5 games (MatchResults)
+  match_history     one team's full home history (GoalsPredication)
+  fixture_list      one league's every pairing (GoalsPredication fixture list)
+  season_export     every league's pairings, past ARROW_ROWS so shown with st.dataframe
+
+For each table:
+
+  before    median of DataFrame.to_html, what every rerun used to pay
+  cold      first render: content hash plus to_html
+  warm      median of a rerun with unchanged data: content hash plus cache hit
+  payload   bytes sent to the browser (HTML, or Arrow IPC for st.dataframe)
+
+    python -m benchmarks.bench_tables
+    python -m benchmarks.bench_tables --countries 8 --leagues-per-country 2 --seasons 5 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_tables(countries, leagues_per_country, seasons):
+    from warehouse import synthetic
+    from features.form_engine import FormEngine
+    from features.match_index import MatchIndex, HOME
+    from features.standings_engine import StandingsEngine
+    from features.prediction_matrix import LeagueMatrix, PredictionMatrices, pair_matrix, WINDOWS
+    from features.GoalsPredication import format_match_history
+
+    tables = synthetic.generate(countries=countries, leagues_per_country=leagues_per_country, seasons=seasons, seed=0)
+    facts, teams = tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"]
+    league = teams["LEAGUE_NAME"].iloc[0]
+    team = teams["TEAM_NAME"].iloc[0]
+
+    index = MatchIndex(facts, teams)
+    leagues = {}
+    for name, rows in teams.sort_values("TEAM_NAME").groupby("LEAGUE_NAME"):
+        ids = rows["TEAM_ID"].to_numpy()
+        leagues[name] = LeagueMatrix(name, rows["TEAM_NAME"].to_numpy(dtype=str),
+                                     {"all": pair_matrix(index, ids, WINDOWS["All Games"])})
+    matrices = PredictionMatrices(leagues)
+
+    return {
+        "league_table": StandingsEngine(facts, teams).table(league),
+        "form_table": FormEngine(facts, teams).query(5)[
+            ["team_name", "league_name", "games", "total_wins", "total_losses", "total_draws"]],
+        "match_history": format_match_history(index.history(team, HOME), team, is_home=True),
+        "fixture_list": leagues[league].frame(),
+        "season_export": matrices.frame(),
+    }
+
+
+def median_ms(call, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--countries", type=int, default=8)
+    parser.add_argument("--leagues-per-country", type=int, default=2)
+    parser.add_argument("--seasons", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=30, help="Calls per timing")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+
+    # features.tables reads the app's secrets for its call recorder; give it one that logs nothing
+    workdir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(workdir, ".streamlit"))
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as f:
+        f.write("[diagnostics]\nlog_sample_rate = 0\n")
+    os.chdir(workdir)
+
+    import logging
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    from streamlit.dataframe_util import convert_pandas_df_to_arrow_bytes
+    from features.tables import ARROW_ROWS, render_html
+
+    tables = build_tables(args.countries, args.leagues_per_country, args.seasons)
+    # Streamlit sets its cache up on first use; keep that out of the first table's timing
+    render_html(tables["league_table"].head(1), "warm-up")
+
+    print(f"{'table':<15} {'rows':>6} {'before':>10} {'cold':>10} {'warm':>10} {'speedup':>8} {'payload':>12}")
+    for name, df in tables.items():
+        before = median_ms(lambda: df.to_html(index=False, escape=False), args.repeat)
+
+        if len(df) > ARROW_ROWS:
+            # st.dataframe path: no HTML at all, the frame goes to the browser as Arrow
+            start = time.perf_counter()
+            payload = len(convert_pandas_df_to_arrow_bytes(df))
+            cold = (time.perf_counter() - start) * 1000
+            warm = median_ms(lambda: convert_pandas_df_to_arrow_bytes(df), args.repeat)
+            path = "arrow"
+        else:
+            start = time.perf_counter()
+            payload = len(render_html(df, name).encode())
+            cold = (time.perf_counter() - start) * 1000
+            warm = median_ms(lambda: render_html(df, name), args.repeat)
+            path = "html"
+
+        print(f"{name:<15} {len(df):>6,} {before:>8.2f}ms {cold:>8.2f}ms {warm:>8.2f}ms {before / warm:>7.1f}x "
+              f"{payload / 1024:>8.1f} KB  ({path})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Soak test of the query result cache: RSS while a long stream of query variants goes through it.
+
+Each query is a new f-string variant most of the time (a different team or
+league filter) and a repeat of one of the last 128 otherwise, returning an
+agg_player-like frame. Every mode runs in a fresh process:
+
+  unbounded   a plain dict, i.e. what a ttl-only st.cache_data keeps within its TTL
+  bounded     ResultCache with a --max-mb budget, evicted entries dropped
+  spill       ResultCache with the same budget, evicted entries spilled to disk
+
+RSS is sampled every --sample queries. After a warm-up quarter of the run the
+bounded modes must stay within --tolerance-mb of their post-warm-up RSS; the
+script exits 1 when they do not.
+
+    python -m benchmarks.soak_result_cache --queries 3000 --rows 20000 --max-mb 64
+"""
+import argparse
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_arrow_fetch import synthetic_agg_player, current_rss_mb
+from warehouse.result_cache import ResultCache
+
+MODES = ["unbounded", "bounded", "spill"]
+
+
+def query_keys(queries, repeat_share=0.2, window=128, seed=0):
+    """Mostly new variants, with a share of repeats of the last `window` ones."""
+    rng = np.random.default_rng(seed)
+    keys, fresh = [], 0
+    for _ in range(queries):
+        if fresh and rng.random() < repeat_share:
+            keys.append(int(rng.integers(max(0, fresh - window), fresh)))
+        else:
+            keys.append(fresh)
+            fresh += 1
+    return keys
+
+
+def run_mode(mode, args, results):
+    spill_path = tempfile.mkdtemp() if mode == "spill" else None
+    if mode == "unbounded":
+        store = {}
+
+        def get(key, load):
+            if key not in store:
+                store[key] = load()
+            return store[key]
+    else:
+        cache = ResultCache(max_bytes=args.max_mb * 1024 ** 2, spill_path=spill_path,
+                            spill_max_bytes=args.max_mb * 4 * 1024 ** 2)
+        get = cache.get
+
+    samples = []
+    start = time.perf_counter()
+    for i, key in enumerate(query_keys(args.queries)):
+        get(("query", key), lambda key=key: synthetic_agg_player(args.rows, seed=key).to_pandas())
+        if i % args.sample == 0 or i == args.queries - 1:
+            samples.append((i + 1, current_rss_mb()))
+
+    results[mode] = {
+        "seconds": time.perf_counter() - start,
+        "samples": samples,
+        "stats": cache.stats() if mode != "unbounded" else {"entries": len(store)},
+    }
+    if spill_path:
+        shutil.rmtree(spill_path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=3000)
+    parser.add_argument("--rows", type=int, default=20000, help="Rows per query result")
+    parser.add_argument("--max-mb", type=int, default=64, help="Result cache budget")
+    parser.add_argument("--sample", type=int, default=250, help="Queries between RSS samples")
+    parser.add_argument("--tolerance-mb", type=float, default=64, help="Allowed RSS growth after warm-up")
+    parser.add_argument("--modes", default=",".join(MODES))
+    args = parser.parse_args()
+
+    manager = multiprocessing.Manager()
+    results = manager.dict()
+    for mode in args.modes.split(","):
+        process = multiprocessing.Process(target=run_mode, args=(mode, args, results))
+        process.start()
+        process.join()
+
+    failed = False
+    for mode in args.modes.split(","):
+        result = results[mode]
+        samples = result["samples"]
+        warm = next(rss for done, rss in samples if done >= args.queries // 4)
+        growth = samples[-1][1] - warm
+        flat = growth <= args.tolerance_mb
+        if mode != "unbounded" and not flat:
+            failed = True
+
+        print(f"{mode:<10} {result['seconds']:7.1f}s  rss after warm-up {warm:7.1f} MB -> end {samples[-1][1]:7.1f} MB "
+              f"({growth:+.1f} MB)  {'' if mode == 'unbounded' else 'flat' if flat else 'GROWING'}")
+        print("           " + "  ".join(f"{done}:{rss:.0f}" for done, rss in samples))
+        stats = result["stats"]
+        print("           " + ", ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                                        for key, value in stats.items()))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Local stand-in for `snowflake.connector`, used by the benchmarks.
+
+Connections simulate the handshake cost of a real warehouse session and
+cursors simulate per-query latency, so pooling and caching changes can be
+measured without a live account.
+"""
+import time
+
+import pyarrow as pa
+
+
+class StandInCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self._rows = []
+        self._position = 0
+
+    def execute(self, query, params=None):
+        if self.connection.closed:
+            raise RuntimeError("Connection is closed")
+        time.sleep(self.connection.query_latency)
+        self.connection.queries += 1
+        self._position = 0
+        if self.connection.arrow_table is not None:
+            self.description = [(name,) for name in self.connection.arrow_table.column_names]
+        else:
+            self._rows = list(self.connection.rows)
+            self.description = [(name,) for name in self.connection.columns]
+        return self
+
+    def fetchall(self):
+        if self.connection.arrow_table is not None:
+            # Same work the real connector does: decode the Arrow result into Python tuples
+            return list(zip(*(column.to_pylist() for column in self.connection.arrow_table.columns)))
+        return self._rows
+
+    def fetchmany(self, size):
+        rows = self.fetchall()[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    def close(self):
+        pass
+
+
+class StandInArrowCursor(StandInCursor):
+    """Cursor exposing the Arrow fetch API of `snowflake.connector` cursors."""
+
+    def fetch_arrow_all(self):
+        return self.connection.arrow_table
+
+    def fetch_arrow_batches(self):
+        yield from (pa.Table.from_batches([batch]) for batch in self.connection.arrow_table.to_batches(self.connection.batch_size))
+
+
+class StandInConnection:
+    def __init__(self, handshake_latency, query_latency, columns, rows, arrow_table=None, arrow_api=True,
+                 batch_size=100_000):
+        time.sleep(handshake_latency)
+        self.query_latency = query_latency
+        self.columns = columns
+        self.rows = rows
+        self.arrow_table = arrow_table
+        self.arrow_api = arrow_api
+        self.batch_size = batch_size
+        self.queries = 0
+        self.closed = False
+
+    def cursor(self):
+        return StandInArrowCursor(self) if self.arrow_table is not None and self.arrow_api else StandInCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class StandInConnector:
+    """
+    Factory with the same `connect()` shape as `snowflake.connector`.
+
+    Args:
+        handshake_latency (float): Seconds spent opening each connection.
+        query_latency (float): Seconds spent executing each query.
+        columns (list): Column names returned by every query.
+        rows (list): Rows returned by every query.
+        arrow_table (pa.Table): If given, every query returns this table.
+        arrow_api (bool): Whether cursors offer `fetch_arrow_all` / `fetch_arrow_batches`
+            on top of `fetchall` when `arrow_table` is given.
+    """
+
+    def __init__(self, handshake_latency=0.25, query_latency=0.02, columns=None, rows=None, arrow_table=None,
+                 arrow_api=True):
+        self.handshake_latency = handshake_latency
+        self.query_latency = query_latency
+        self.columns = columns or ["TEAM_NAME", "POINTS"]
+        self.rows = rows if rows is not None else [("Celtic", 90), ("Rangers", 85)]
+        self.arrow_table = arrow_table
+        self.arrow_api = arrow_api
+        self.connections_opened = 0
+
+    def connect(self, **kwargs):
+        self.connections_opened += 1
+        return StandInConnection(self.handshake_latency, self.query_latency, self.columns, self.rows, self.arrow_table,
+                                  self.arrow_api)
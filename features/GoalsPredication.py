@@ -1,48 +1,115 @@
-from utils import run_query
+from utils import load_tables, refresh_snapshot, get_catalog, get_snapshot
+from features.match_index import MatchIndex, HOME, AWAY
+from features.goal_model import GoalModel
+from features.prediction_matrix import PredictionStore, PredictionMatrices, WINDOWS
+from features.tables import render_html, show_table, inject_table_styles
+from warehouse.snapshot import VersionChanged
 import streamlit as st
+import os
 import pandas as pd
+import numpy as np
+
+# Match-pair index built once per snapshot version, shared across sessions
+@st.cache_resource(max_entries=2)
+def get_match_index(version):
+    return MatchIndex(*load_tables("FACT_TEAM_MATCH", "DIM_TEAMS"))
+
+
+# Dixon-Coles parameters of every league, fitted once per snapshot version
+@st.cache_resource(max_entries=2)
+def get_goal_model(version):
+    return GoalModel(*load_tables("FACT_TEAM_MATCH", "DIM_TEAMS"))
+
+
+def predict_match(home_team, away_team):
+    """Model expected goals and scoreline probabilities for one match (see GoalModel.predict)."""
+    return get_goal_model(refresh_snapshot()).predict(home_team, away_team)
+
+
+# All-pairs prediction matrices, written next to the snapshot once per version and loaded into memory
+@st.cache_resource(max_entries=2)
+def get_prediction_matrices(version):
+    snapshot = get_snapshot()
+    store = PredictionStore(os.path.join(snapshot.path, "predictions"))
+    try:
+        return PredictionMatrices(store.load_or_build(version, lambda table: snapshot.read(table, version=version)))
+    except VersionChanged:
+        # A refresh replaced `version` before its matrices were built; serve the new one
+        return get_prediction_matrices(refresh_snapshot())
 
-def get_team_filters():
-    query = """
-    SELECT DISTINCT 
-        DT.COUNTRY_NAME, 
-        DL.SHORT_NAME AS LEAGUE_NAME, 
-        DT.TEAM_NAME 
-    FROM DIM_TEAMS DT
-    JOIN DIM_LEAGUES DL ON DT.LEAGUE_NAME = DL.LEAGUE_NAME
-    """
-    return run_query(query)
 
 # Function to fetch team match statistics along with opponent names
 def get_team_stats(team_name, num_games, game_role):
-    query = f"""
-    WITH RankedMatches AS (
-        SELECT 
-            FTM.GAME_ID,
-            FTM.PLAYED_ON AS match_date,
-            FTM.GAMEROLE AS team_role,
-            FTM.SCORED AS goals_scored,
-            FTM.CONCEEDED AS goals_conceded,
-            ROW_NUMBER() OVER (PARTITION BY FTM.TEAM_ID ORDER BY FTM.PLAYED_ON DESC) AS game_rank
-        FROM FACT_TEAM_MATCH FTM
-        JOIN DIM_TEAMS DT ON FTM.TEAM_ID = DT.TEAM_ID
-        WHERE DT.TEAM_NAME = '{team_name}' AND FTM.GAMEROLE = {game_role}
-    )
-
-    SELECT RM.match_date, RM.team_role, RM.goals_scored, RM.goals_conceded, Opponent.TEAM_NAME AS opponent
-    FROM RankedMatches RM
-    JOIN FACT_TEAM_MATCH OpponentMatch ON RM.GAME_ID = OpponentMatch.GAME_ID
-    JOIN DIM_TEAMS Opponent ON OpponentMatch.TEAM_ID = Opponent.TEAM_ID
-    WHERE OpponentMatch.GAMEROLE != RM.team_role
-    AND {f"game_rank <= {num_games}" if num_games != "All" else "1=1"}
-    ORDER BY match_date DESC;
+    return get_match_index(refresh_snapshot()).history(team_name, game_role, num_games)
+
+
+# Home (GAMEROLE 1) and away (GAMEROLE 2) averages for many teams in one pass
+def get_bulk_team_averages(team_names, num_games):
     """
+    Mean goals scored and conceded over each team's last `num_games` home games
+    and last `num_games` away games, for every team in `team_names` at once.
+    A name shared by several TEAM_IDs pools the games of all of them.
 
-    df = run_query(query)
-    df.columns = df.columns.str.lower()
-    df = df.fillna(0)
+    Returns:
+        pd.DataFrame: Indexed by team name with home_scored, home_conceded, away_scored, away_conceded.
+    """
+    index = get_match_index(refresh_snapshot())
+    team_names = sorted(set(team_names))
 
-    return df
+    home_scored, home_conceded = index.name_averages(team_names, HOME, num_games)
+    away_scored, away_conceded = index.name_averages(team_names, AWAY, num_games)
+
+    return pd.DataFrame({
+        "home_scored": home_scored,
+        "home_conceded": home_conceded,
+        "away_scored": away_scored,
+        "away_conceded": away_conceded,
+    }, index=pd.Index(team_names, name="TEAM_NAME"))
+
+
+# Fixtures with both team cells filled in, names as text without surrounding spaces
+def clean_fixtures(fixtures):
+    fixtures = fixtures[["Home Team", "Away Team"]].astype("string").apply(lambda names: names.str.strip())
+    complete = fixtures.notna().all(axis=1) & (fixtures != "").all(axis=1)
+    return fixtures[complete].astype(str).reset_index(drop=True)
+
+
+# Batch predictions for a whole fixture list, in the match_predictions.csv schema
+def predict_fixtures(fixtures, num_games="All"):
+    """
+    Generic and weighted predictions for every fixture in `fixtures`.
+
+    Args:
+        fixtures (pd.DataFrame): One row per match with "Home Team" and "Away Team" columns; rows
+            with a blank team are skipped.
+        num_games (int or "All"): History window, as in the single-match view.
+
+    Returns:
+        pd.DataFrame: Home Team, Away Team, Generic/Weighted Home/Away Goals.
+    """
+    fixtures = clean_fixtures(fixtures)
+    averages = get_bulk_team_averages(pd.concat([fixtures["Home Team"], fixtures["Away Team"]]).unique(), num_games)
+
+    home = averages.reindex(fixtures["Home Team"]).to_numpy()
+    away = averages.reindex(fixtures["Away Team"]).to_numpy()
+    home_scored, home_conceded = home[:, 0], home[:, 1]
+    away_scored, away_conceded = away[:, 2], away[:, 3]
+
+    return pd.DataFrame({
+        "Home Team": fixtures["Home Team"],
+        "Away Team": fixtures["Away Team"],
+        "Generic Home Goals": np.round(home_scored, 2),
+        "Generic Away Goals": np.round(away_scored, 2),
+        "Weighted Home Goals": np.round(0.7 * home_scored + 0.3 * away_conceded, 2),
+        "Weighted Away Goals": np.round(0.6 * away_scored + 0.4 * home_conceded, 2),
+    })
+
+
+def write_predictions(fixtures, path="match_predictions.csv", num_games="All"):
+    """Predicts every fixture and writes the results to `path`."""
+    predictions = predict_fixtures(fixtures, num_games)
+    predictions.to_csv(path, index=False)
+    return predictions
 
 # Function to format match history tables
 def format_match_history(df, team_name, is_home):
@@ -70,50 +137,14 @@ def format_match_history(df, team_name, is_home):
 
     return df
 
-# Function to convert DataFrame into styled HTML table
+# Function to convert DataFrame into styled HTML table (cached by content, see features.tables)
 def df_to_html_table(df, title):
     """Converts a Pandas DataFrame into a styled HTML table with no index."""
-    if df.empty:
-        return "<p style='color:red; font-weight:bold;'>No data available</p>"
-
-    table_html = f"""
-    <h3>{title}</h3>
-    {df.to_html(index=False, escape=False, border=0, classes="styled-table")}
-    """
-    return table_html
-
-# Global CSS for Styling
-st.markdown("""
-    <style>
-        .styled-table {
-            width: 100%;
-            border-collapse: collapse;
-            text-align: center;
-            font-family: Arial, sans-serif;
-        }
-        .styled-table th {
-            background-color: #003366;
-            color: white;
-            padding: 10px;
-            border: 1px solid #ddd;
-        }
-        .styled-table td {
-            padding: 8px;
-            border: 1px solid #ddd;
-        }
-        .styled-table tr:nth-child(even) {
-            background-color: #f2f2f2;
-        }
-        h3 {
-            text-align: center;
-            color: #003366;
-            margin-top: 20px;
-        }
-    </style>
-""", unsafe_allow_html=True)
+    return render_html(df, title)
 
 # Streamlit UI for Goals Prediction
 def goals_prediction():
+    inject_table_styles()
     st.subheader("⚽ Goals Prediction")
 
     st.markdown("""
@@ -126,31 +157,35 @@ def goals_prediction():
         **Prediction Methods:**
         - **Generic Prediction** → Based on teams' average goals scored
         - **Weighted Prediction** → 60% Home Team’s Scored + 40% Away Team’s Conceded
+        - **Model Prediction** → Dixon-Coles model of every team's attack and defence, with home advantage
 
         Press **Process Predictions** when ready.
     """, unsafe_allow_html=True)
 
-    # Fetch available teams
-    team_data = get_team_filters()
+    mode = st.radio("🗂️ Prediction Mode", ["Single Match", "Fixture List", "League Export"], horizontal=True)
+    if mode == "Fixture List":
+        fixture_predictions()
+        return
+    if mode == "League Export":
+        league_export()
+        return
+
+    # Available countries, leagues and teams from the shared catalog
+    catalog = get_catalog()
 
-    if team_data.empty:
+    if not catalog.teams():
         st.error("❌ No team data found. Please check the data source.")
         return
 
-    team_data.columns = team_data.columns.str.lower()
-
     # Country Selector
-    selected_country = st.selectbox("🌍 Select Country", ["All"] + list(team_data["country_name"].unique()))
+    selected_country = st.selectbox("🌍 Select Country", ["All"] + list(catalog.countries()))
 
-    # League Selector
-    leagues = team_data["league_name"].unique() if selected_country == "All" else \
-        team_data[team_data["country_name"] == selected_country]["league_name"].unique()
-    selected_league = st.selectbox("🏆 Select League", ["All"] + list(leagues))
+    # League Selector (leagues are shown by their short name)
+    leagues = [catalog.short_name(league) for league in catalog.leagues(selected_country)]
+    selected_league = st.selectbox("🏆 Select League", ["All"] + leagues)
 
     # Team Selector
-    teams = team_data["team_name"].unique() if selected_league == "All" else team_data[
-        (team_data["country_name"] == selected_country) & (team_data["league_name"] == selected_league)
-        ]["team_name"].unique()
+    teams = catalog.teams(country=selected_country, league=catalog.league_for_short_name(selected_league))
 
     if len(teams) == 0:
         st.warning("⚠️ No teams available. Try selecting a different country or league.")
@@ -175,27 +210,102 @@ def goals_prediction():
             st.warning("⚠️ Please select both Home and Away teams.")
             return
 
-        # Fetch Home & Away Team Stats
-        home_team_data = format_match_history(get_team_stats(home_team, num_games, game_role=1), home_team, is_home=True)
-        away_team_data = format_match_history(get_team_stats(away_team, num_games, game_role=2), away_team, is_home=False)
-
-        # **Calculate Predictions**
-        predicted_home_goals_generic = round(home_team_data['Home Score'].mean(), 2)
-        predicted_away_goals_generic = round(away_team_data['Away Score'].mean(), 2)
+        # Home & Away Team Stats, sliced from the in-memory match index
+        home_team_data = format_match_history(get_team_stats(home_team, num_games, 1), home_team, is_home=True)
+        away_team_data = format_match_history(get_team_stats(away_team, num_games, 2), away_team, is_home=False)
 
-        predicted_home_goals_weighted = round(
-            (0.7 * home_team_data['Home Score'].mean()) + (0.3 * away_team_data['Home Score'].mean()), 2)
+        # **Look Up Predictions** (teams from different leagues are computed on the spot)
+        prediction = get_prediction_matrices(refresh_snapshot()).predict(home_team, away_team, num_games)
+        if prediction is None:
+            pair = pd.DataFrame({"Home Team": [home_team], "Away Team": [away_team]})
+            prediction = predict_fixtures(pair, num_games).iloc[0].to_dict()
 
-        predicted_away_goals_weighted = round(
-            (0.6 * away_team_data['Away Score'].mean()) + (0.4 * home_team_data['Away Score'].mean()), 2)
+        predicted_home_goals_generic = round(prediction["Generic Home Goals"], 2)
+        predicted_away_goals_generic = round(prediction["Generic Away Goals"], 2)
+        predicted_home_goals_weighted = round(prediction["Weighted Home Goals"], 2)
+        predicted_away_goals_weighted = round(prediction["Weighted Away Goals"], 2)
 
         # Display Predictions & Match History
         st.markdown(df_to_html_table(pd.DataFrame({"Home Team": [home_team], "Away Team": [away_team], "Predicted Home Goals": [predicted_home_goals_generic], "Predicted Away Goals": [predicted_away_goals_generic]}), "📋 Generic Prediction"), unsafe_allow_html=True)
         st.markdown(df_to_html_table(pd.DataFrame({"Home Team": [home_team], "Away Team": [away_team], "Predicted Home Goals": [predicted_home_goals_weighted], "Predicted Away Goals": [predicted_away_goals_weighted]}), "⚖️ Weighted Prediction"), unsafe_allow_html=True)
 
+        model_prediction(home_team, away_team)
+
         st.markdown(df_to_html_table(home_team_data, f"🏠 {home_team} - Last {num_games} Home Games"), unsafe_allow_html=True)
         st.markdown(df_to_html_table(away_team_data, f"✈️ {away_team} - Last {num_games} Away Games"), unsafe_allow_html=True)
 
+# Model expected goals, outcome probabilities and the most likely scorelines
+def model_prediction(home_team, away_team, top=5):
+    prediction = predict_match(home_team, away_team)
+    if prediction is None:
+        return
+
+    st.markdown(df_to_html_table(pd.DataFrame({
+        "Home Team": [home_team],
+        "Away Team": [away_team],
+        "Expected Home Goals": [round(prediction["home_goals"], 2)],
+        "Expected Away Goals": [round(prediction["away_goals"], 2)],
+        "Home Win": [f"{prediction['home_win']:.0%}"],
+        "Draw": [f"{prediction['draw']:.0%}"],
+        "Away Win": [f"{prediction['away_win']:.0%}"],
+    }), "🎯 Model Prediction"), unsafe_allow_html=True)
+
+    scores = prediction["scores"]
+    best = np.argsort(scores, axis=None)[::-1][:top]
+    home_goals, away_goals = np.unravel_index(best, scores.shape)
+    st.markdown(df_to_html_table(pd.DataFrame({
+        "Score": [f"{h} - {a}" for h, a in zip(home_goals, away_goals)],
+        "Probability": [f"{p:.1%}" for p in scores.ravel()[best]],
+    }), "🔢 Most Likely Scores"), unsafe_allow_html=True)
+
+
+# Streamlit UI for batch predictions over an uploaded fixture list
+def fixture_predictions():
+    st.markdown("Upload a CSV with **Home Team** and **Away Team** columns to predict a whole matchday or season.")
+
+    uploaded = st.file_uploader("📄 Fixture List (CSV)", type="csv")
+    selected_dataset = st.radio("📊 Select Data Type for Prediction", ["All Games", "Last 10 Games", "Last 5 Games"],
+                                key="batch_dataset")
+    num_games = "All" if selected_dataset == "All Games" else 10 if selected_dataset == "Last 10 Games" else 5
+
+    if uploaded is None:
+        return
+
+    fixtures = pd.read_csv(uploaded)
+    missing_columns = [col for col in ["Home Team", "Away Team"] if col not in fixtures.columns]
+    if missing_columns:
+        st.error(f"❌ Missing expected columns in the fixture list: {missing_columns}")
+        return
+
+    predictions = predict_fixtures(fixtures, num_games)
+    if len(predictions) < len(fixtures):
+        st.warning(f"⚠️ {len(fixtures) - len(predictions)} row(s) without a Home Team or Away Team were skipped.")
+
+    unknown = predictions[predictions[["Generic Home Goals", "Generic Away Goals"]].isna().any(axis=1)]
+    if not unknown.empty:
+        st.warning(f"⚠️ {len(unknown)} fixture(s) have a team with no history for this selection.")
+
+    show_table(predictions, f"📋 Predictions for {len(predictions)} Fixtures")
+    st.download_button("⬇️ Download Predictions", predictions.to_csv(index=False), file_name="match_predictions.csv",
+                       mime="text/csv")
+
+# Streamlit UI for exporting every pairing of whole leagues
+def league_export():
+    st.markdown("Every home and away pairing of the selected leagues, in the same format as a fixture list export.")
+
+    matrices = get_prediction_matrices(refresh_snapshot())
+    selected_leagues = st.multiselect("🏆 Select Leagues", list(matrices.leagues))
+    selected_dataset = st.radio("📊 Select Data Type for Prediction", list(WINDOWS), key="export_dataset")
+
+    if not selected_leagues:
+        return
+
+    predictions = matrices.frame(WINDOWS[selected_dataset], selected_leagues)
+    st.success(f"✅ {len(predictions):,} pairings across {len(selected_leagues)} league(s).")
+    st.dataframe(predictions, hide_index=True)
+    st.download_button("⬇️ Download Predictions", predictions.to_csv(index=False), file_name="match_predictions.csv",
+                       mime="text/csv", key="export_download")
+
 # Run Streamlit App
 if __name__ == "__main__":
     goals_prediction()
\ No newline at end of file
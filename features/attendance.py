@@ -1,43 +1,102 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from utils import run_query
-import snowflake.connector
-import streamlit as st
+import numpy as np
+from utils import load_table, get_catalog, get_recorder, diagnostics_enabled
+from warehouse.instrument import feature, current_feature
+from features.downsample import lttb
+from features.standings_engine import SEASON_START
+
+# Points sent to the browser per chart, shared between the selected teams
+POINT_BUDGET = 2000
+# Above this many points the chart is drawn with WebGL instead of SVG
+WEBGL_POINTS = 1000
+
+
+# Attendance series for the selected teams from the local snapshot
+def get_attendance(team_names, attendance_view=None):
+    if attendance_view is None:
+        attendance_view = load_table("ATTENDeNCE_VIEW")
+
+    attendance_data = attendance_view.loc[
+        attendance_view["TEAM_NAME"].isin(team_names), ["PLAYED_ON", "TEAM_NAME", "ATTENDANCE"]
+    ].sort_values("PLAYED_ON", kind="stable")
+
+    # Convert PLAYED_ON to datetime
+    attendance_data["PLAYED_ON"] = pd.to_datetime(attendance_data["PLAYED_ON"])
+    return attendance_data
+
+
+# Per-match series, a rolling average over each team's last `window` matches, or one point per season
+def aggregate_attendance(attendance_data, mode="Every match", window=5):
+    if mode == "Rolling average":
+        rolled = attendance_data.groupby("TEAM_NAME", sort=False)["ATTENDANCE"].rolling(window, min_periods=1).mean()
+        return attendance_data.assign(ATTENDANCE=rolled.reset_index(level=0, drop=True))
+
+    if mode == "Season average":
+        played_on = attendance_data["PLAYED_ON"]
+        month, day = SEASON_START
+        before_start = (played_on.dt.month < month) | ((played_on.dt.month == month) & (played_on.dt.day < day))
+        season = played_on.dt.year - before_start.astype(int)
+        seasons = (attendance_data.assign(SEASON=season)
+                   .groupby(["TEAM_NAME", "SEASON"], as_index=False, sort=False)["ATTENDANCE"].mean())
+        # One point per season, placed on the season's first day
+        seasons["PLAYED_ON"] = pd.to_datetime({"year": seasons["SEASON"], "month": month, "day": day})
+        return seasons[["PLAYED_ON", "TEAM_NAME", "ATTENDANCE"]].sort_values("PLAYED_ON", kind="stable")
+
+    return attendance_data
+
+
+# Shape-preserving downsampling of each team's series to an equal share of the point budget
+def downsample_attendance(attendance_data, budget=POINT_BUDGET):
+    groups = attendance_data.groupby("TEAM_NAME", sort=False).indices
+    per_team = max(budget // max(len(groups), 1), 3)
+    if all(len(rows) <= per_team for rows in groups.values()):
+        return attendance_data
+
+    x = attendance_data["PLAYED_ON"].to_numpy().astype("datetime64[ns]").astype(np.int64)
+    y = attendance_data["ATTENDANCE"].to_numpy(dtype=np.float64)
+    kept = [rows[lttb(x[rows], y[rows], per_team)] for rows in groups.values()]
+    return attendance_data.iloc[np.sort(np.concatenate(kept))]
+
+
+# Line chart of attendance over time, one line per team
+def attendance_figure(attendance_data, render_mode="auto"):
+    # plotly is only imported once a chart is drawn
+    import plotly.express as px
+    return px.line(
+        attendance_data,
+        x="PLAYED_ON",
+        y="ATTENDANCE",
+        color="TEAM_NAME",
+        render_mode=render_mode,
+        title="Attendance Over Time",
+        labels={"PLAYED_ON": "Date", "ATTENDANCE": "Attendance", "TEAM_NAME": "Team"}
+    )
+
 
-def get_snowflake_connection():
-    """
-    Establishes a connection to Snowflake using Streamlit secrets.
-    Returns an active Snowflake connection object.
-    """
-    try:
-        conn = snowflake.connector.connect(
-            user=st.secrets["snowflake"]["user"],
-            password=st.secrets["snowflake"]["password"],
-            account=st.secrets["snowflake"]["account"],
-            warehouse=st.secrets["snowflake"]["warehouse"],
-            database=st.secrets["snowflake"]["database"],
-            schema=st.secrets["snowflake"]["schema"]
-        )
-        return conn
-    except Exception as e:
-        st.error(f"❌ Snowflake connection failed: {e}")
-        return None
+# Aggregation, downsampling and trace type for one chart, recorded in the query diagnostics
+def build_attendance_chart(attendance_data, mode="Every match", window=5, budget=POINT_BUDGET):
+    with get_recorder().track("attendance_chart", "render") as call:
+        series = downsample_attendance(aggregate_attendance(attendance_data, mode, window), budget)
+        fig = attendance_figure(series, "webgl" if len(series) > WEBGL_POINTS else "svg")
+        call["rows"] = len(series)
+        # Serializing again only to measure the payload is skipped unless someone is looking
+        if diagnostics_enabled():
+            call["bytes"] = len(fig.to_json())
+    return fig
 
 
 def attendance_analysis():
     st.subheader("📊 Attendance Analysis")
 
-    # Step 1: Fetch leagues
-    leagues_query = "SELECT DISTINCT LEAGUE_NAME FROM DIM_LEAGUES ORDER BY LEAGUE_NAME;"
-    league_data = run_query(leagues_query)
+    # Step 1: Fetch leagues (the attendance series is only read when a chart is drawn)
+    catalog = get_catalog()
+    leagues = list(catalog.leagues())
 
-    if league_data.empty:
+    if not leagues:
         st.warning("⚠ No leagues found.")
         return
 
-    leagues = league_data["LEAGUE_NAME"].tolist()
-
     # Step 2: User selects a league
     selected_league = st.selectbox("🏆 Select League", options=["Select a League"] + leagues, index=0)
 
@@ -46,16 +105,7 @@ def attendance_analysis():
         return
 
     # Step 3: Fetch teams for the selected league
-    conn = get_snowflake_connection()
-    cursor = conn.cursor()
-
-    teams_query = "SELECT DISTINCT TEAM_NAME FROM DIM_TEAMS WHERE LEAGUE_NAME = %s ORDER BY TEAM_NAME;"
-    cursor.execute(teams_query, (selected_league,))
-    team_data = cursor.fetchall()
-    available_teams = [row[0] for row in team_data]  # Convert tuples to list
-
-    cursor.close()
-    conn.close()
+    available_teams = list(catalog.teams(league=selected_league))
 
     if not available_teams:
         st.warning("⚠ No teams found for this league.")
@@ -65,17 +115,33 @@ def attendance_analysis():
     if "selected_teams" not in st.session_state:
         st.session_state.selected_teams = {}
 
+    # Picking teams and drawing the chart rerun on their own, without the rest of the page
+    team_picker(available_teams)
+    attendance_chart(current_feature())
+
+
+def _add_team():
+    new_team = st.session_state.temp_team_selector
+    if new_team != "Select a Team":
+        st.session_state.selected_teams[new_team] = True
+
+
+def _remove_team(team):
+    st.session_state.selected_teams.pop(team, None)
+
+
+# Team selection: every click here redraws only this block, and reads no data
+@st.fragment
+def team_picker(available_teams):
     # Step 5: Team Selection
-    new_team = st.selectbox(
+    st.selectbox(
         "🏟️ Select a Team to Add",
         options=["Select a Team"] + available_teams,
         key="temp_team_selector"
     )
 
-    # Step 6: Add Team Button
-    if st.button("➕ Add Team"):
-        if new_team != "Select a Team" and new_team not in st.session_state.selected_teams:
-            st.session_state.selected_teams[new_team] = True
+    # Step 6: Add Team Button (callbacks run before the redraw, so the list below is already up to date)
+    st.button("➕ Add Team", on_click=_add_team)
 
     # Step 7: Display Confirmed Teams with Remove Buttons
     if st.session_state.selected_teams:
@@ -85,50 +151,44 @@ def attendance_analysis():
             with col1:
                 st.write(f"🏟️ {team}")
             with col2:
-                if st.button(f"🗑 Remove {team}", key=f"remove_{team}"):
-                    del st.session_state.selected_teams[team]
+                st.button(f"🗑 Remove {team}", key=f"remove_{team}", on_click=_remove_team, args=(team,))
 
     # Step 8: Confirm Selection
     if st.button("✅ Confirm Selected Teams"):
         if not st.session_state.selected_teams:
             st.warning("⚠ Please add at least one team before confirming.")
 
+
+# Series options and chart; reruns on its own and reads the attendance snapshot only to draw
+@st.fragment
+def attendance_chart(page):
     # Step 9: Process Attendance Data
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        mode = st.radio("📐 Series", ["Every match", "Rolling average", "Season average"], horizontal=True)
+    with col2:
+        window = st.number_input("Rolling window (matches)", min_value=2, max_value=38, value=5,
+                                 disabled=mode != "Rolling average")
+
     if st.button("📈 Process Attendance"):
         if not st.session_state.selected_teams:
             st.warning("⚠ Please confirm at least one team.")
+            st.session_state.pop("charted_teams", None)
             return
+        st.session_state.charted_teams = list(st.session_state.selected_teams.keys())
 
-        # Convert selected teams into SQL-safe format
-        team_names = tuple(st.session_state.selected_teams.keys())
-
-        # If only one team is selected, format tuple correctly
-        team_names_sql = f"('{team_names[0]}')" if len(team_names) == 1 else str(team_names)
-
-        # Attendance Query (Safe Parameterized Query)
-        attendance_query = f"""
-        SELECT PLAYED_ON, TEAM_NAME, ATTENDANCE
-        FROM ATTENDeNCE_VIEW
-        WHERE TEAM_NAME IN {team_names_sql}
-        ORDER BY PLAYED_ON ASC;
-        """
+    # The processed teams stay charted while the series options change
+    team_names = st.session_state.get("charted_teams")
+    if not team_names:
+        return
 
-        attendance_data = run_query(attendance_query)
+    # Fragment reruns happen outside main.py's page block, so restore the attribution
+    with feature(page):
+        attendance_data = get_attendance(team_names)
 
         if attendance_data.empty:
             st.warning("❌ No attendance data found for the selected teams.")
             return
 
-        # Convert PLAYED_ON to datetime
-        attendance_data["PLAYED_ON"] = pd.to_datetime(attendance_data["PLAYED_ON"])
-
         # Step 10: Plot attendance trends
-        fig = px.line(
-            attendance_data,
-            x="PLAYED_ON",
-            y="ATTENDANCE",
-            color="TEAM_NAME",
-            title="Attendance Over Time",
-            labels={"PLAYED_ON": "Date", "ATTENDANCE": "Attendance", "TEAM_NAME": "Team"}
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_attendance_chart(attendance_data, mode, window), width="stretch")
@@ -0,0 +1,61 @@
+import streamlit as st
+import pandas as pd
+from utils import get_connection_pool, get_recorder, get_result_cache, get_shared_cache
+
+RECENT_COLUMNS = ["feature", "source", "name", "cache", "wall_ms", "warehouse_ms", "rows", "bytes", "error"]
+
+
+# Summary per (feature, source, query) over the calls still in the ring buffer
+def summarize_calls(calls):
+    if calls.empty:
+        return calls
+
+    grouped = calls.groupby(["feature", "source", "name"], sort=False)
+    summary = grouped["wall_ms"].agg(calls="size", p50_ms="median", p95_ms=lambda ms: ms.quantile(0.95))
+    summary["warehouse_ms"] = grouped["warehouse_ms"].sum()
+    summary["hit_rate"] = grouped["cache"].agg(lambda cache: (cache == "hit").sum() / max(cache.notna().sum(), 1))
+    summary["rows"] = grouped["rows"].sum()
+    return summary.reset_index().sort_values("p95_ms", ascending=False).round(2)
+
+
+# Optional sidebar panel, enabled with `[diagnostics] panel = true`
+def diagnostics_panel():
+    recorder = get_recorder()
+
+    with st.sidebar.expander("🩺 Diagnostics"):
+        calls = pd.DataFrame(recorder.recent(), columns=RECENT_COLUMNS)
+
+        st.markdown("**Slowest queries**")
+        st.dataframe(summarize_calls(calls), hide_index=True)
+
+        st.markdown("**Recent calls**")
+        st.dataframe(calls.tail(50).iloc[::-1].round(2), hide_index=True)
+
+        cache = get_result_cache()
+        stats = cache.stats()
+        st.markdown("**Result cache**")
+        st.caption(f"{stats['bytes'] / 1024 ** 2:,.1f} of {stats['max_bytes'] / 1024 ** 2:,.0f} MB in "
+                   f"{stats['entries']} entries · {stats['spilled_bytes'] / 1024 ** 2:,.1f} MB spilled · "
+                   f"hit rate {stats['hit_rate']:.0%} · {stats['evictions']} evictions")
+        metrics = recorder.to_prometheus() + cache.to_prometheus()
+
+        shared = get_shared_cache()
+        if shared is not None:
+            stats = shared.stats()
+            st.markdown("**Shared cache**")
+            st.caption(f"{stats['bytes'] / 1024 ** 2:,.1f} MB in {stats['entries']} files, {stats['mapped']} mapped here · "
+                       f"{stats['hits']} hits · {stats['waits']} waited for another process · {stats['loads']} loads")
+            metrics += shared.to_prometheus()
+
+        pool = get_connection_pool()
+        stats = pool.metrics()
+        st.markdown("**Connection pool**")
+        st.caption(f"{stats['idle']} idle of {stats['size']} · "
+                   f"{stats['connects']} connects, {stats['reuses']} reuses · "
+                   f"avg wait {stats['avg_wait_s'] * 1000:,.1f} ms · "
+                   f"{stats['evicted_idle'] + stats['evicted_expired']} evicted")
+        metrics += pool.to_prometheus()
+
+        st.download_button("⬇️ Prometheus metrics", metrics, file_name="queries.prom", mime="text/plain")
+        st.download_button("⬇️ Calls (JSON lines)", recorder.to_jsonl(), file_name="queries.jsonl",
+                           mime="application/x-ndjson")
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of `threshold - 2` equal
+    buckets in between, the point forming the largest triangle with the point
+    kept from the previous bucket and the average of the next bucket. Peaks,
+    troughs and trend changes survive, unlike with every-Nth sampling.
+
+    Args:
+        x (np.ndarray): Sorted x values (numeric; convert dates to integers first).
+        y (np.ndarray): y values.
+        threshold (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Indices of the kept points, ascending.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket i covers [edges[i], edges[i + 1]); the first and last points are their own buckets
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    # Average of each bucket, plus the last point as the "next bucket" of the final one
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = np.maximum(edges[1:] - edges[:-1], 1)
+    avg_x = np.append((cum_x[edges[1:]] - cum_x[edges[:-1]]) / sizes, x[-1])
+    avg_y = np.append((cum_y[edges[1:]] - cum_y[edges[:-1]]) / sizes, y[-1])
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Twice the triangle area for every candidate in the bucket (the constant factor does not change the argmax)
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
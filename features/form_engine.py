@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+RESULT_POINTS = {"win": 3, "draw": 1, "loss": 0}
+
+
+class FormEngine:
+    """
+    Answers "last N games" form queries for every team at once.
+
+    All teams' results are stored in one flat array ordered by (TEAM_ID, GAME_NUMBER),
+    with a cumulative win/draw/loss count per position. A team's tally over its
+    last N games is then the difference of two prefix sums, so a query over all
+    teams is a handful of vectorized subtractions.
+
+    Args:
+        facts (pd.DataFrame): FACT_TEAM_MATCH rows with TEAM_ID, GAME_NUMBER and POINTS.
+        teams (pd.DataFrame): DIM_TEAMS rows with TEAM_ID, TEAM_NAME and LEAGUE_NAME.
+    """
+
+    def __init__(self, facts, teams):
+        facts = facts[["TEAM_ID", "GAME_NUMBER", "POINTS"]].sort_values(["TEAM_ID", "GAME_NUMBER"], kind="stable")
+
+        team_ids = facts["TEAM_ID"].to_numpy()
+        points = pd.to_numeric(facts["POINTS"]).to_numpy()
+
+        # Per-team slices into the flat arrays
+        self.team_ids, first, counts = np.unique(team_ids, return_index=True, return_counts=True)
+        self.ends = (first + counts).astype(np.int64)
+        self.counts = counts.astype(np.int64)
+
+        # Prefix sums with a leading zero: games [a, b) sum to cum[b] - cum[a]
+        self.cum = {
+            result: np.concatenate(([0], np.cumsum(points == value, dtype=np.int32)))
+            for result, value in RESULT_POINTS.items()
+        }
+
+        names = teams.drop_duplicates("TEAM_ID").set_index("TEAM_ID")
+        self.team_names = names["TEAM_NAME"].reindex(self.team_ids).to_numpy()
+        self.league_names = names["LEAGUE_NAME"].reindex(self.team_ids).to_numpy()
+
+    def tallies(self, num_games):
+        """Returns (eligible, wins, draws, losses) arrays over each team's last `num_games` games."""
+        eligible = self.counts >= num_games
+        starts = np.maximum(self.ends - num_games, self.ends - self.counts)
+        wins, draws, losses = (self.cum[result][self.ends] - self.cum[result][starts]
+                               for result in ("win", "draw", "loss"))
+        return eligible, wins, draws, losses
+
+    def query(self, num_games, min_wins=0, min_draws=0, min_losses=0):
+        """
+        Teams with at least `num_games` games whose last `num_games` contain at least
+        the given number of wins, draws and losses, sorted by wins.
+
+        Returns:
+            pd.DataFrame: team_id, team_name, league_name, games, total_wins, total_losses, total_draws.
+        """
+        eligible, wins, draws, losses = self.tallies(num_games)
+        mask = eligible & (wins >= min_wins) & (draws >= min_draws) & (losses >= min_losses)
+
+        df = pd.DataFrame({
+            "team_id": self.team_ids[mask],
+            "team_name": self.team_names[mask],
+            "league_name": self.league_names[mask],
+            "games": num_games,
+            "total_wins": wins[mask],
+            "total_losses": losses[mask],
+            "total_draws": draws[mask],
+        })
+        return df.sort_values("total_wins", ascending=False, kind="stable").reset_index(drop=True)
@@ -1,3 +1,7 @@
+import pandas as pd
+from utils import get_catalog
+
+
 def get_unique_leagues_and_teams():
     query = """
     SELECT DISTINCT LEAGUE_NAME, HOME_TEAM_NAME
@@ -30,11 +34,15 @@ def get_attendance_data(teams):
 
 
 def get_team_filters():
-    query = """
-    SELECT DISTINCT COUNTRY_NAME, SHORT_NAME AS LEAGUE_NAME, TEAM_NAME 
-    FROM DIM_TEAMS_V2
-    """
-    return run_query(query)
+    """Country, league (short name) and team of every team, from the shared catalog."""
+    catalog = get_catalog()
+    rows = [
+        (country, catalog.short_name(league), team)
+        for country in catalog.countries()
+        for league in catalog.leagues(country)
+        for team in catalog.teams(league=league)
+    ]
+    return pd.DataFrame(rows, columns=["COUNTRY_NAME", "LEAGUE_NAME", "TEAM_NAME"])
 
 
 # Fetch team attributes from Team_Aggs view
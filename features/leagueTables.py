@@ -1,172 +1,194 @@
 import streamlit as st
-import pandas as pd
-import snowflake.connector
-
-
-# Snowflake connection function
-def get_snowflake_connection():
-    return snowflake.connector.connect(
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        account=st.secrets["snowflake"]["account"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
+from utils import get_result_cache, get_snapshot, load_table, load_tables, get_catalog, refresh_snapshot
+from warehouse.instrument import bind
+from warehouse.prefetch import Prefetcher
+from warehouse.snapshot import VersionChanged
+from features.standings_engine import StandingsEngine, TIEBREAKS
+from features.tables import show_table, inject_table_styles
 
 
 # Fetch unique countries (optional filter)
-@st.cache_data(ttl=600)
 def get_countries():
-    conn = get_snowflake_connection()
-    query = "SELECT DISTINCT country_name FROM dim_leagues ORDER BY country_name;"
+    return list(get_catalog().countries())  # Return just the list, not a DataFrame
 
-    # Execute the query directly
-    cursor = conn.cursor()
-    cursor.execute(query)
-    raw_data = cursor.fetchall()  # Fetch all results
 
-    # Print raw data for debugging
-    print("Raw Query Results:", raw_data)
+# Fetch leagues based on selected country (or all leagues if no filter)
+def get_leagues(selected_country=None):
+    return list(get_catalog().leagues(selected_country))  # Return just the list, not a DataFrame
 
-    # Convert raw tuples to a list of country names
-    country_list = [row[0] for row in raw_data]
 
-    # Close connection
-    cursor.close()
-    conn.close()
+# Format agg_league rows as a standings table
+def format_standings(rows):
+    df = rows[
+        ["TEAM_NAME", "GAMESPLAYED", "TOTALPOINTS", "WINS", "DRAWS", "LOSSES", "TOTALSCORED", "TOTALCONCEDED"]
+    ].rename(columns={
+        "GAMESPLAYED": "PLAYED",
+        "TOTALPOINTS": "POINTS",
+        "TOTALSCORED": "GOALS",
+        "TOTALCONCEDED": "CONCEEDED",
+    })
+    df["GOAL_DIFFERENCE"] = df["GOALS"] - df["CONCEEDED"]
 
-    return country_list  # Return just the list, not a DataFrame
+    return df.sort_values(TIEBREAKS + ["TEAM_NAME"], ascending=[False] * len(TIEBREAKS) + [True],
+                          kind="stable").reset_index(drop=True)
 
 
-# Fetch leagues based on selected country (or all leagues if no filter)
-@st.cache_data(ttl=600)
-def get_leagues(selected_country=None):
-    conn = get_snowflake_connection()
-    cursor = conn.cursor()
+# Most recently built standings engine per process, as {"last": (version, engine)}
+@st.cache_resource
+def _latest_standings_engine():
+    return {}
 
-    # Construct SQL query
-    if selected_country and selected_country != "All":
-        query = f"SELECT DISTINCT league_name FROM dim_leagues WHERE country_name = '{selected_country}' ORDER BY league_name;"
-    else:
-        query = "SELECT DISTINCT league_name FROM dim_leagues ORDER BY league_name;"
 
-    # Execute the query
-    cursor.execute(query)
-    raw_data = cursor.fetchall()  # Fetch all results
+# Standings engine built once per snapshot version, shared across sessions
+@st.cache_resource(max_entries=2)
+def get_standings_engine(version):
+    """
+    When the refresh that produced `version` only appended match facts, the previous
+    version's engine is copied and the new results are added to it; otherwise the
+    engine is rebuilt from the snapshot.
+    """
+    latest = _latest_standings_engine()
+    previous_version, previous = latest.get("last", (None, None))
+    engine = None
+    if previous is not None:
+        snapshot = get_snapshot()
+        try:
+            delta = snapshot.delta("FACT_TEAM_MATCH", version)
+            if delta is not None and delta[0] == previous_version:
+                engine = previous.with_facts(delta[1], snapshot.read("DIM_TEAMS", version=version))
+        except VersionChanged:
+            pass
+    if engine is None:
+        engine = StandingsEngine(*load_tables("FACT_TEAM_MATCH", "DIM_TEAMS"))
+    latest["last"] = (version, engine)
+    return engine
 
-    # Print raw data for debugging
-    print("Raw Query Results for Leagues:", raw_data)
 
-    # Convert list of tuples to a clean list of league names
-    league_list = [row[0] for row in raw_data]
+# Fetch league standings with selected attributes
+def get_league_table(selected_league, split="overall", start=None, end=None, country="All"):
+    """
+    Full-season overall standings come from `agg_league`; home-only, away-only and
+    date-window tables are computed from the match facts by the standings engine.
 
-    # Close connection
-    cursor.close()
-    conn.close()
+    Overall tables are taken from the standings prefetched for `country` when they
+    are ready, and read from the snapshot otherwise.
+    """
+    version = refresh_snapshot()
+    if split == "overall" and start is None and end is None:
+        prefetched = get_prefetcher().get(prefetch_key(version, country), {})
+        if selected_league in prefetched:
+            return prefetched[selected_league]
 
-    return league_list  # Return just the list, not a DataFrame
+        def build():
+            agg_league = load_table("agg_league")
+            return format_standings(agg_league[agg_league["FORMAL_LEAGUE_NAME"] == selected_league])
 
+        return get_result_cache().get(("standings", version, selected_league), build, ttl=None, spill=False)
 
-# Fetch league standings with selected attributes
+    return get_standings_engine(version).table(selected_league, split, start, end)
+
+
+def prefetch_key(version, country):
+    return ("standings", version, country)
 
-@st.cache_data(ttl=600)
-def get_league_table(selected_league):
-    conn = get_snowflake_connection()
-    cursor = conn.cursor()
-
-    query = """
-        SELECT 
-            team_name AS Team_Name,
-            GamesPlayed AS Played,
-            TOTALPOINTS AS Points,
-            WINS,
-            DRAWS,
-            LOSSES,
-            TOTALSCORED AS GOALS,
-            TOTALCONCEDED AS CONCEEDED
-        FROM agg_league 
-        WHERE FORMAL_LEAGUE_NAME = %s
-        ORDER BY Points DESC;
-    """
 
-    # Execute query securely using parameterized query
-    cursor.execute(query, (selected_league,))
-    raw_data = cursor.fetchall()  # Fetch results
+# Read only the country's agg_league rows from the snapshot and format one standings table per league
+def read_country_standings(snapshot, version, leagues_list):
+    rows = snapshot.read("agg_league", filters=[("FORMAL_LEAGUE_NAME", "in", list(leagues_list))], version=version)
+    return {league: format_standings(group) for league, group in rows.groupby("FORMAL_LEAGUE_NAME")}
 
-    # Print raw data for debugging
-    print("Raw Query Results for League Table:", raw_data)
 
-    # Convert to DataFrame with correct column names
-    df = pd.DataFrame(raw_data, columns=[desc[0] for desc in cursor.description])
+# One background prefetcher per server process
+@st.cache_resource
+def get_prefetcher():
+    return Prefetcher(max_queue=8, workers=1)
 
-    # Close connection
-    cursor.close()
-    conn.close()
 
-    return df
+def prefetch_country(selected_country, leagues_list):
+    """
+    Reads and formats all standings for the chosen country in the background before a
+    league is picked, and cancels (or drops) the standings of countries the user has
+    moved away from. `get_league_table` picks the result up with `Prefetcher.get`.
+    """
+    prefetcher = get_prefetcher()
+    version = refresh_snapshot()
+    key = prefetch_key(version, selected_country)
+
+    prefetcher.cancel(lambda queued: queued[0] == "standings" and queued != key)
+    if leagues_list:
+        # The snapshot store is looked up here: cached resources are not reachable from the worker thread
+        snapshot = get_snapshot()
+        prefetcher.submit(key, bind(lambda: read_country_standings(snapshot, version, leagues_list)))
 
 
 # Main function for the League Standings page
 def leagues():
+    inject_table_styles()
     st.title("🏆 Football League Table Viewer")
-    test_connection()
 
     # Country filter (optional)
     selected_country = st.selectbox("🌍 Select Country (Optional)", ["All"] + get_countries())
 
     # Fetch leagues based on selection
     leagues_list = get_leagues(selected_country)
+    prefetch_country(selected_country, leagues_list)
 
     # League selection
     selected_league = st.selectbox("⚽ Select League", leagues_list)
 
-    # Fetch and display league table
+    # Table variant: overall, home-only or away-only, optionally over a date window
+    split = st.radio("📋 Table", ["Overall", "Home", "Away"], horizontal=True).lower()
+    start = end = None
+    if st.checkbox("📅 Custom date range"):
+        engine = get_standings_engine(refresh_snapshot())
+        first, last = engine.date_range()
+        window = st.date_input("Matches played between", value=(max(engine.current_season(selected_league), first), last),
+                               min_value=first, max_value=last)
+        if len(window) == 2:
+            start, end = window
+
+    # Fetch and display league table, from the prefetched standings when they are ready
     if selected_league:
-        league_table = get_league_table(selected_league)
+        # Time travel through the current season's overall table, one matchday at a time
+        timeline = as_of = None
+        if (split, start, end) == ("overall", None, None):
+            timeline = get_standings_engine(refresh_snapshot()).timeline(selected_league)
+            if timeline.matchdays > 1:
+                matchday = st.slider("🗓️ Standings after matchday", 1, timeline.matchdays, timeline.matchdays)
+                as_of = matchday if matchday < timeline.matchdays else None
+
+        if as_of is not None:
+            league_table = timeline.table(as_of)
+        else:
+            league_table = get_league_table(selected_league, split, start, end, country=selected_country)
 
         if league_table.empty:
             st.warning("⚠ No data available for this league.")
         else:
-            st.subheader(f"📊 {selected_league} Standings")
-
-            # Custom Styled Table Display
-            st.markdown(
-                """
-                <style>
-                    table {
-                        width: 100%;
-                        border-collapse: collapse;
-                    }
-                    th, td {
-                        padding: 10px;
-                        border: 1px solid #ddd;
-                        text-align: center;
-                    }
-                    th {
-                        background-color: #003366;
-                        color: white;
-                    }
-                    tr:nth-child(even) {
-                        background-color: #f2f2f2;
-                    }
-                </style>
-                """,
-                unsafe_allow_html=True
-            )
-
-            st.write(league_table.to_html(index=False, escape=False), unsafe_allow_html=True)
-
-def test_connection():
-    try:
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT CURRENT_USER(), CURRENT_DATABASE(), CURRENT_SCHEMA();")
-        print(cursor.fetchall())
-        cursor.close()
-        conn.close()
-        print("✅ Snowflake connection successful!")
-    except Exception as e:
-        print(f"❌ Snowflake connection failed: {e}")
-
-
+            variant = "" if split == "overall" else f" ({split.title()})"
+            if as_of is not None:
+                variant += f" after Matchday {as_of}"
+            st.subheader(f"📊 {selected_league} Standings{variant}")
+
+            show_table(league_table, classes="league-table")
+
+            if timeline is not None and timeline.matchdays > 1 and st.checkbox("📈 Show position history"):
+                st.plotly_chart(position_history_figure(timeline), width="stretch")
+
+
+# League position of every team after each matchday (1st at the top)
+def position_history_figure(timeline):
+    # plotly is only imported once a chart is drawn
+    import plotly.express as px
+    fig = px.line(
+        timeline.position_history(),
+        x="MATCHDAY",
+        y="POSITION",
+        color="TEAM_NAME",
+        hover_data={"POINTS": True},
+        markers=True,
+        title=f"{timeline.league} Position History",
+        labels={"MATCHDAY": "Matchday", "POSITION": "Position", "TEAM_NAME": "Team", "POINTS": "Points"}
+    )
+    fig.update_yaxes(autorange="reversed", dtick=1)
+    return fig
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+HOME, AWAY = 1, 2
+
+
+class MatchIndex:
+    """
+    One row per GAME_ID with both teams, both scores and the match date, plus a
+    per-(team, role) lookup of that team's games ordered most recent first.
+
+    Every team's home and away games sit in contiguous slices of flat arrays, so
+    the last N home (or away) games of a team are a dictionary lookup and a slice,
+    and last-N averages for many teams are differences of prefix sums.
+
+    Args:
+        facts (pd.DataFrame): FACT_TEAM_MATCH rows with GAME_ID, TEAM_ID, GAMEROLE, PLAYED_ON, SCORED, CONCEEDED.
+        teams (pd.DataFrame): DIM_TEAMS rows with TEAM_ID and TEAM_NAME.
+    """
+
+    def __init__(self, facts, teams):
+        facts = facts[["GAME_ID", "TEAM_ID", "GAMEROLE", "PLAYED_ON", "SCORED", "CONCEEDED"]].copy()
+        facts[["SCORED", "CONCEEDED"]] = facts[["SCORED", "CONCEEDED"]].apply(pd.to_numeric).fillna(0)
+        facts["GAMEROLE"] = pd.to_numeric(facts["GAMEROLE"])
+
+        names = teams.drop_duplicates("TEAM_ID").set_index("TEAM_ID")["TEAM_NAME"]
+
+        # One row per game: the home side's row joined to the away side's row
+        home = facts[facts["GAMEROLE"] == HOME]
+        away = facts[facts["GAMEROLE"] == AWAY]
+        self.pairs = home.merge(away, on="GAME_ID", suffixes=("_HOME", "_AWAY"))
+        self.pairs = pd.DataFrame({
+            "GAME_ID": self.pairs["GAME_ID"],
+            "PLAYED_ON": self.pairs["PLAYED_ON_HOME"],
+            "HOME_TEAM_ID": self.pairs["TEAM_ID_HOME"],
+            "HOME_TEAM": self.pairs["TEAM_ID_HOME"].map(names),
+            "HOME_SCORE": self.pairs["SCORED_HOME"],
+            "AWAY_SCORE": self.pairs["SCORED_AWAY"],
+            "AWAY_TEAM": self.pairs["TEAM_ID_AWAY"].map(names),
+            "AWAY_TEAM_ID": self.pairs["TEAM_ID_AWAY"],
+        })
+
+        # Team perspective: each game appears twice, once per role
+        n = len(self.pairs)
+        perspective = pd.DataFrame({
+            "TEAM_ID": np.concatenate([self.pairs["HOME_TEAM_ID"].to_numpy(), self.pairs["AWAY_TEAM_ID"].to_numpy()]),
+            "ROLE": np.repeat([HOME, AWAY], n),
+            "PLAYED_ON": np.concatenate([self.pairs["PLAYED_ON"].to_numpy()] * 2),
+            "PAIR": np.concatenate([np.arange(n)] * 2),
+            "SCORED": np.concatenate([self.pairs["HOME_SCORE"].to_numpy(), self.pairs["AWAY_SCORE"].to_numpy()]),
+            "CONCEDED": np.concatenate([self.pairs["AWAY_SCORE"].to_numpy(), self.pairs["HOME_SCORE"].to_numpy()]),
+        }).sort_values(["TEAM_ID", "ROLE", "PLAYED_ON"], ascending=[True, True, False], kind="stable")
+
+        self.pair_rows = perspective["PAIR"].to_numpy()
+        self.cum_scored = np.concatenate(([0.0], np.cumsum(perspective["SCORED"].to_numpy(dtype=float))))
+        self.cum_conceded = np.concatenate(([0.0], np.cumsum(perspective["CONCEDED"].to_numpy(dtype=float))))
+
+        # Rows are sorted by key, so each (team, role) group is one contiguous slice
+        groups = perspective.reset_index(drop=True).groupby(["TEAM_ID", "ROLE"], sort=False).indices
+        self.slices = {(team_id, int(role)): (int(rows[0]), int(rows[-1]) + 1) for (team_id, role), rows in groups.items()}
+
+        self.team_ids_by_name = {}
+        for team_id, team_name in names.items():
+            self.team_ids_by_name.setdefault(team_name, []).append(team_id)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def team_ids(self, team_name):
+        return self.team_ids_by_name.get(team_name, [])
+
+    def games(self, team_id, role, num_games=None):
+        """Row positions in `pairs` of a team's last `num_games` games in `role`, most recent first."""
+        start, stop = self.slices.get((team_id, role), (0, 0))
+        if num_games not in (None, "All"):
+            stop = min(stop, start + int(num_games))
+        return self.pair_rows[start:stop]
+
+    def history(self, team_name, role, num_games=None):
+        """
+        A team's last `num_games` games in `role` from its own perspective.
+
+        Returns:
+            pd.DataFrame: match_date, team_role, goals_scored, goals_conceded, opponent (most recent first).
+        """
+        rows = np.concatenate([self.games(team_id, role, num_games) for team_id in self.team_ids(team_name)] or [[]])
+        games = self.pairs.iloc[rows.astype(int)]
+        own, other = ("HOME", "AWAY") if role == HOME else ("AWAY", "HOME")
+
+        df = pd.DataFrame({
+            "match_date": games["PLAYED_ON"].to_numpy(),
+            "team_role": role,
+            "goals_scored": games[f"{own}_SCORE"].to_numpy(),
+            "goals_conceded": games[f"{other}_SCORE"].to_numpy(),
+            "opponent": games[f"{other}_TEAM"].to_numpy(),
+        })
+        return df.sort_values("match_date", ascending=False, kind="stable").reset_index(drop=True)
+
+    def averages(self, team_ids, role, num_games=None):
+        """
+        Mean goals scored and conceded over each team's last `num_games` games in `role`.
+
+        Returns:
+            tuple: (scored, conceded) float arrays aligned with `team_ids`, NaN where a team has no games.
+        """
+        bounds = np.array([self.slices.get((team_id, role), (0, 0)) for team_id in team_ids], dtype=np.int64).reshape(-1, 2)
+        starts, stops = bounds[:, 0], bounds[:, 1]
+        if num_games not in (None, "All"):
+            stops = np.minimum(stops, starts + int(num_games))
+        counts = (stops - starts).astype(float)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scored = (self.cum_scored[stops] - self.cum_scored[starts]) / counts
+            conceded = (self.cum_conceded[stops] - self.cum_conceded[starts]) / counts
+        return scored, conceded
+
+    def name_averages(self, team_names, role, num_games=None):
+        """
+        Mean goals scored and conceded over the last `num_games` games in `role` of every
+        TEAM_ID carrying each name, pooled (as get_team_stats' per-name query did).
+
+        Returns:
+            tuple: (scored, conceded) float arrays aligned with `team_names`, NaN where a name has no games.
+        """
+        owners = [(position, team_id) for position, name in enumerate(team_names) for team_id in self.team_ids(name)]
+        positions = np.array([position for position, _ in owners], dtype=np.int64)
+        bounds = np.array([self.slices.get((team_id, role), (0, 0)) for _, team_id in owners], dtype=np.int64).reshape(-1, 2)
+        starts, stops = bounds[:, 0], bounds[:, 1]
+        if num_games not in (None, "All"):
+            stops = np.minimum(stops, starts + int(num_games))
+
+        n = len(team_names)
+        counts = np.bincount(positions, stops - starts, n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scored = np.bincount(positions, self.cum_scored[stops] - self.cum_scored[starts], n) / counts
+            conceded = np.bincount(positions, self.cum_conceded[stops] - self.cum_conceded[starts], n) / counts
+        return scored, conceded
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+NAME_COLUMNS = ["TEAM_NAME", "COUNTRY_NAME", "LEAGUE_NAME"]
+NUMBER_COLUMNS = ["TOTAL_MINUTESPLAYED", "TOTAL_GOALS", "TOTAL_ASSISTS"]
+
+
+class PlayerIndex:
+    """
+    `agg_player` held once in a compact frame, with the row positions of every
+    league's and team's goal contributors worked out up front.
+
+    Repeated names (team, country, league) are categoricals and the totals are
+    float32, so the whole table stays small, and a selection for one team, one
+    league or every league is a lookup and a `take` rather than string
+    comparisons over every row.
+
+    Args:
+        agg_player (pd.DataFrame): agg_player rows with PLAYER_NAME, TEAM_NAME, COUNTRY_NAME,
+            LEAGUE_NAME and the TOTAL_* columns.
+    """
+
+    def __init__(self, agg_player):
+        frame = pd.DataFrame({"player_name": agg_player["PLAYER_NAME"].to_numpy()})
+        for column in NAME_COLUMNS:
+            frame[column.lower()] = agg_player[column].astype("category").array
+        for column in NUMBER_COLUMNS:
+            frame[column.lower()] = agg_player[column].fillna(0).to_numpy(dtype=np.float32)
+        frame["goal_contributions"] = frame["total_goals"] + frame["total_assists"]
+
+        # Only players with at least one goal or assist are ever plotted
+        self.frame = frame[frame["goal_contributions"] > 0].reset_index(drop=True)
+
+        keys = ["country_name", "league_name"]
+        self.league_rows = self.frame.groupby(keys, observed=True, sort=False).indices
+        self.team_rows = self.frame.groupby(keys + ["team_name"], observed=True, sort=False).indices
+
+    def __len__(self):
+        return len(self.frame)
+
+    def select(self, country=None, league=None, team=None):
+        """
+        Goal contributors of one team, one league, or every league when `country`
+        and `league` are None or "All".
+
+        Returns:
+            pd.DataFrame: player_name, team_name, country_name, league_name, total_minutesplayed,
+            total_goals, total_assists, goal_contributions.
+        """
+        if country in (None, "All") or league in (None, "All"):
+            rows = None
+        elif team:
+            rows = self.team_rows.get((country, league, team), [])
+        else:
+            rows = self.league_rows.get((country, league), [])
+
+        df = self.frame if rows is None else self.frame.take(rows)
+        # Drop categories with no rows so legends and groupings only show what is plotted
+        return df.assign(**{
+            column.lower(): df[column.lower()].cat.remove_unused_categories() for column in NAME_COLUMNS
+        }).reset_index(drop=True)
@@ -1,98 +1,123 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from utils import run_query
+import numpy as np
+from utils import load_table, get_catalog, refresh_snapshot
+from features.player_index import PlayerIndex
+from features.similar_players import SimilarityIndex
 
+# Above this many points only the top contributors carry a player/team hover label
+HOVER_LIMIT = 5000
 
-# Function to fetch available countries, leagues, and teams from `dim_teams`
-def get_team_filters():
-    query = """
-    SELECT DISTINCT COUNTRY_NAME, LEAGUE_NAME, TEAM_ID, TEAM_NAME
-    FROM dim_teams
-    """
-    df = run_query(query)
-    df.columns = df.columns.str.lower()
-    return df
+
+# Compact agg_player index built once per snapshot version, shared across sessions
+@st.cache_resource(max_entries=2)
+def get_player_index(version):
+    return PlayerIndex(load_table("agg_player"))
 
 
 # Function to fetch player stats from `agg_player`
 def get_player_stats(selected_country, selected_league, selected_team):
-    query = f"""
-    SELECT 
-        PLAYER_NAME, TEAM_NAME, COUNTRY_NAME, LEAGUE_NAME, 
-        TOTAL_MINUTESPLAYED, TOTAL_GOALS, TOTAL_ASSISTS
-    FROM agg_player
-    WHERE COUNTRY_NAME = '{selected_country}'
-    AND LEAGUE_NAME = '{selected_league}'
-    {f"AND TEAM_NAME = '{selected_team}'" if selected_team else ""}
     """
+    Players with at least one goal contribution for a team, a league, or every
+    league ("All" as the country or league).
+    """
+    return get_player_index(refresh_snapshot()).select(selected_country, selected_league, selected_team)
+
 
-    df = run_query(query)
+# Nearest-neighbour index over VW_PLAYER_STATS, built once per snapshot version
+@st.cache_resource(max_entries=2)
+def get_similarity_index(version):
+    return SimilarityIndex(load_table("VW_PLAYER_STATS"))
 
-    # Ensure proper data types
-    df.columns = df.columns.str.lower()
-    df = df.fillna(0)
-    df["total_minutesplayed"] = pd.to_numeric(df["total_minutesplayed"], errors="coerce")
-    df["total_goals"] = pd.to_numeric(df["total_goals"], errors="coerce")
-    df["total_assists"] = pd.to_numeric(df["total_assists"], errors="coerce")
 
-    # Add a new column for goal contributions (goals + assists)
-    df["goal_contributions"] = df["total_goals"] + df["total_assists"]
+def find_similar_players(player, k=10):
+    """The `k` players most similar to `player` (PLAYER_ID or PLAYER_NAME) across every league."""
+    return get_similarity_index(refresh_snapshot()).similar(player, k)
 
-    # 🔥 **Filter out players with zero goal contributions**
-    df = df[df["goal_contributions"] > 0]
 
-    return df
+# Scatter plot of Minutes Played vs. Goal Contributions, one colour per team (or per league)
+def minutes_vs_goal_contributions_figure(players_df, color="team_name", hover_limit=HOVER_LIMIT):
+    # plotly is only imported once a chart is drawn
+    import plotly.graph_objects as go
+
+    minutes = players_df["total_minutesplayed"].to_numpy()
+    contributions = players_df["goal_contributions"].to_numpy()
+    sizes = 4 + 16 * np.sqrt(contributions / max(contributions.max(), 1))
+
+    # Hover labels are most of the payload: past the limit, only the top contributors keep theirs
+    labels = (players_df["player_name"].astype(str) + " (" + players_df["team_name"].astype(str) + ")").to_numpy()
+    if len(players_df) > hover_limit:
+        cutoff = np.partition(contributions, -hover_limit)[-hover_limit]
+        labels = np.where(contributions >= cutoff, labels, "")
+
+    fig = go.Figure()
+    groups = players_df.groupby(color, observed=True, sort=True).indices
+    for name, rows in groups.items():
+        fig.add_trace(go.Scattergl(
+            x=minutes[rows],
+            y=contributions[rows],
+            mode="markers",
+            name=str(name),
+            text=labels[rows],
+            marker={"size": sizes[rows], "opacity": 0.7},
+            hovertemplate="%{text}<br>Minutes: %{x:,.0f}<br>Goals + Assists: %{y:.0f}<extra></extra>",
+        ))
+
+    fig.update_layout(
+        title="Minutes Played vs Goal Contributions",
+        xaxis_title="Total Minutes Played",
+        yaxis_title="Goal Contributions (Goals + Assists)",
+        legend_title="Team" if color == "team_name" else "League",
+    )
+    return fig
 
 
 # Function to generate scatter plot
-def plot_minutes_vs_goal_contributions(players_df):
+def plot_minutes_vs_goal_contributions(players_df, color="team_name"):
     """Creates and displays a scatter plot of Minutes Played vs. Goal Contributions."""
     if players_df.empty:
         st.warning("⚠️ No player data available for the selected filters.")
         return
 
-    # Scatter plot
-    fig = px.scatter(
-        players_df,
-        x="total_minutesplayed",
-        y="goal_contributions",
-        size="goal_contributions",
-        color="team_name",
-        hover_data={"player_name": True, "team_name": True, "total_goals": True, "total_assists": True,
-                    "total_minutesplayed": True},
-        title="Minutes Played vs Goal Contributions",
-        labels={"total_minutesplayed": "Total Minutes Played",
-                "goal_contributions": "Goal Contributions (Goals + Assists)", "team_name": "Team"}
-    )
-
     # Display plot
-    st.plotly_chart(fig)
+    st.plotly_chart(minutes_vs_goal_contributions_figure(players_df, color))
 
 
 # Streamlit UI for Player Data Analysis
 def players_analysis():
     st.subheader("⚽ Player Performance Analysis")
 
-    # Fetch available teams and leagues
-    team_filters = get_team_filters()
+    # Available countries, leagues and teams from the shared catalog; both are cached per snapshot version
+    catalog = get_catalog()
+    player_index = get_player_index(refresh_snapshot())
 
-    countries = team_filters['country_name'].unique()
+    scope = st.radio("🌐 Scope", ["Single league", "All leagues", "Similar players"], horizontal=True)
+
+    if scope == "Similar players":
+        similar_players()
+        return
+
+    if scope == "All leagues":
+        if st.button("📊 Load & Plot Data"):
+            players_df = player_index.select()
+            if players_df.empty:
+                st.error("⚠️ No player data found.")
+            else:
+                st.success(f"✅ {len(players_df):,} players loaded! Generating visualization...")
+                plot_minutes_vs_goal_contributions(players_df, color="league_name")
+        return
 
     # Country Selection
-    selected_country = st.selectbox("🌍 Select Country", options=["Select"] + list(countries), index=0)
+    selected_country = st.selectbox("🌍 Select Country", options=["Select"] + list(catalog.countries()), index=0)
 
     leagues = []
     if selected_country != "Select":
-        leagues = team_filters[team_filters['country_name'] == selected_country]['league_name'].unique()
+        leagues = catalog.leagues(selected_country)
 
     selected_league = st.selectbox("🏆 Select League", options=["Select"] + list(leagues), index=0)
 
     teams = []
     if selected_league != "Select":
-        teams = team_filters[
-            (team_filters['country_name'] == selected_country) & (team_filters['league_name'] == selected_league)][
-            'team_name'].unique()
+        teams = catalog.teams(league=selected_league)
 
     selected_team = st.selectbox("🏟️ Select Team (Optional)", options=["All"] + list(teams), index=0)
 
@@ -103,8 +128,8 @@ def players_analysis():
             return
 
         # Fetch player data
-        players_df = get_player_stats(selected_country, selected_league,
-                                      selected_team if selected_team != "All" else "")
+        players_df = player_index.select(selected_country, selected_league,
+                                               selected_team if selected_team != "All" else "")
 
         if players_df.empty:
             st.error("⚠️ No player data found for the selected filters.")
@@ -113,6 +138,29 @@ def players_analysis():
             plot_minutes_vs_goal_contributions(players_df)
 
 
+# Streamlit UI for the similar-player search
+def similar_players():
+    index = get_similarity_index(refresh_snapshot())
+
+    search = st.text_input("🔎 Search Player", placeholder="Type part of a name")
+    if not search:
+        st.info("Type a player's name to find the most similar players across every league.")
+        return
+
+    matches = index.search(search)
+    if not matches:
+        st.warning(f"⚠️ No player with at least the minimum minutes matches '{search}'.")
+        return
+
+    player = st.selectbox("⚽ Player", matches)
+    k = st.slider("Number of similar players", min_value=5, max_value=50, value=10)
+
+    similar = index.similar(player, k)
+    st.markdown(f"**Players most similar to {player}** (distance in standard deviations across "
+                "G90, GPG, MPG, minutes, goals, assists and cards)")
+    st.dataframe(similar.drop(columns=["PLAYER_ID"]).round(2), hide_index=True)
+
+
 # Run Streamlit App
 if __name__ == "__main__":
     players_analysis()
@@ -0,0 +1,259 @@
+"""
+All-pairs goal predictions for every league, precomputed once per snapshot version.
+
+For each league and each history window of the Goals Prediction page, the
+generic and weighted expected goals of every home team against every away
+team are built with NumPy broadcasting and saved under
+`<out>/<snapshot version>/<league>.npz`. Any pairing is then an index lookup,
+and whole leagues can be exported in the match_predictions.csv format.
+
+    python -m features.prediction_matrix --snapshot .snapshot
+    python -m features.prediction_matrix --snapshot .snapshot --csv match_predictions.csv --window "Last 10 Games"
+"""
+import argparse
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from features.match_index import MatchIndex, HOME, AWAY
+from warehouse.filelock import file_lock
+
+# Page label -> number of games, as in goals_prediction
+WINDOWS = {"All Games": "All", "Last 10 Games": 10, "Last 5 Games": 5}
+
+# Matrix layers, in the match_predictions.csv column order
+COLUMNS = ["Generic Home Goals", "Generic Away Goals", "Weighted Home Goals", "Weighted Away Goals"]
+
+
+def _window_key(num_games):
+    return "all" if num_games in (None, "All") else f"last_{int(num_games)}"
+
+
+def _safe_name(name):
+    return re.sub(r"[^\w.@-]+", "_", str(name))
+
+
+def pair_matrix(index, team_ids, num_games):
+    """
+    Expected goals of every home team (rows) against every away team (columns).
+
+    Generic goals are each side's own scoring average; weighted goals mix in the
+    opponent's conceding average (70/30 for the home side, 60/40 for the away side),
+    as on the Goals Prediction page. A team against itself is NaN.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(COLUMNS), n, n).
+    """
+    home_scored, home_conceded = index.averages(team_ids, HOME, num_games)
+    away_scored, away_conceded = index.averages(team_ids, AWAY, num_games)
+
+    n = len(team_ids)
+    matrix = np.stack(np.broadcast_arrays(
+        home_scored[:, None],
+        away_scored[None, :],
+        0.7 * home_scored[:, None] + 0.3 * away_conceded[None, :],
+        0.6 * away_scored[None, :] + 0.4 * home_conceded[:, None],
+    )).astype(np.float32)
+    matrix[:, np.arange(n), np.arange(n)] = np.nan
+    return matrix
+
+
+class LeagueMatrix:
+    """One league's teams and its (len(COLUMNS), n, n) prediction matrix per window."""
+
+    def __init__(self, league, teams, matrices):
+        self.league = league
+        self.teams = np.asarray(teams)
+        self.positions = {team: i for i, team in enumerate(self.teams)}
+        self.matrices = matrices
+
+    def predict(self, home_team, away_team, num_games="All"):
+        """The four predicted values of one pairing keyed by COLUMNS, or None for an unknown team."""
+        h, a = self.positions.get(home_team), self.positions.get(away_team)
+        if h is None or a is None:
+            return None
+        return dict(zip(COLUMNS, self.matrices[_window_key(num_games)][:, h, a].tolist()))
+
+    def frame(self, num_games="All"):
+        """Every pairing of the league in the match_predictions.csv format."""
+        matrix = self.matrices[_window_key(num_games)]
+        h, a = np.nonzero(~np.eye(len(self.teams), dtype=bool))
+        df = pd.DataFrame({"Home Team": self.teams[h], "Away Team": self.teams[a]})
+        for i, column in enumerate(COLUMNS):
+            df[column] = np.round(matrix[i, h, a].astype(np.float64), 2)
+        return df
+
+
+class PredictionStore:
+    """
+    Prediction matrices on disk, one `.npz` file per league in a directory per
+    snapshot version. A version is written to a temporary directory and renamed
+    into place with a marker file once complete, and older versions are removed
+    after a newer one lands. Builds, loads and pruning hold one lock file, so
+    processes sharing the directory never see a half-written or half-removed version.
+
+    Args:
+        path (str): Root directory of the stored versions.
+        lock_timeout (float or None): Seconds to wait for another process's build before
+            raising TimeoutError; None waits indefinitely.
+    """
+
+    COMPLETE = ".complete"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, path, lock_timeout=None):
+        self.path = path
+        self.lock_timeout = lock_timeout
+
+    def _dir(self, version):
+        return os.path.join(self.path, _safe_name(version))
+
+    def _lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        return file_lock(os.path.join(self.path, self.LOCK_FILE), timeout=self.lock_timeout)
+
+    def has(self, version):
+        return os.path.exists(os.path.join(self._dir(version), self.COMPLETE))
+
+    def build(self, version, facts, teams):
+        """
+        Computes and saves every league's matrices for `version`, unless another process
+        already has. Returns the number of leagues.
+        """
+        with self._lock():
+            return self._build(version, facts, teams)
+
+    def load(self, version):
+        """Every league's LeagueMatrix for `version`, keyed by league name."""
+        with self._lock():
+            return self._load(version)
+
+    def load_or_build(self, version, read):
+        """
+        Loads `version`, building it first if no process has, under one hold of the lock so a
+        prune cannot remove it in between. `read(table)` returns FACT_TEAM_MATCH or DIM_TEAMS
+        as of `version` and is only called for a build.
+        """
+        with self._lock():
+            if not self.has(version):
+                self._build(version, read("FACT_TEAM_MATCH"), read("DIM_TEAMS"))
+            return self._load(version)
+
+    def _build(self, version, facts, teams):
+        directory = self._dir(version)
+        if self.has(version):
+            return sum(name.endswith(".npz") for name in os.listdir(directory))
+
+        index = MatchIndex(facts, teams)
+        teams = teams.drop_duplicates("TEAM_ID").dropna(subset=["LEAGUE_NAME"]).sort_values("TEAM_NAME", kind="stable")
+
+        # Only the lock holder writes, so leftovers of a crashed build can go
+        tmp = f"{directory}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        leagues = teams.groupby("LEAGUE_NAME", sort=True)
+        for league, rows in leagues:
+            team_ids = rows["TEAM_ID"].to_numpy()
+            matrices = {_window_key(n): pair_matrix(index, team_ids, n) for n in WINDOWS.values()}
+            np.savez(os.path.join(tmp, f"{_safe_name(league)}.npz"), league=np.array(league),
+                     teams=rows["TEAM_NAME"].to_numpy(dtype=str), **matrices)
+        with open(os.path.join(tmp, self.COMPLETE), "w") as f:
+            f.write(f"{len(leagues)}\n")
+
+        # A directory without the marker is an interrupted build from before the lock
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp, directory)
+        self._prune(version)
+        return len(leagues)
+
+    def _load(self, version):
+        leagues = {}
+        directory = self._dir(version)
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".npz"):
+                continue
+            with np.load(os.path.join(directory, name)) as data:
+                matrices = {_window_key(n): data[_window_key(n)] for n in WINDOWS.values()}
+                league = str(data["league"])
+                leagues[league] = LeagueMatrix(league, data["teams"], matrices)
+        return leagues
+
+    def prune(self, keep):
+        """Removes the stored matrices of every version older than `keep`."""
+        with self._lock():
+            self._prune(keep)
+
+    def _prune(self, keep):
+        # Processes still on an older snapshot may rebuild it; they never remove a newer one
+        newest = _version_time(_safe_name(keep))
+        if newest is None:
+            return
+        for name in os.listdir(self.path):
+            built = _version_time(name)
+            if built is not None and built < newest:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+
+def _version_time(name):
+    """Refresh time of a stored snapshot version (`<watermark>@<epoch seconds>`), or None for other entries."""
+    if name.startswith(".") or name.endswith(".tmp") or "@" not in name:
+        return None
+    try:
+        return float(name.rsplit("@", 1)[1])
+    except ValueError:
+        return None
+
+
+class PredictionMatrices:
+    """Every league's LeagueMatrix plus a team -> league lookup for answering any pairing."""
+
+    def __init__(self, leagues):
+        self.leagues = leagues
+        self.league_of = {}
+        for league, matrix in leagues.items():
+            for team in matrix.teams:
+                self.league_of.setdefault(team, league)
+
+    def predict(self, home_team, away_team, num_games="All"):
+        """Lookup of a pairing within one league; None when the teams are unknown or in different leagues."""
+        league = self.league_of.get(home_team)
+        if league is None or self.league_of.get(away_team) != league:
+            return None
+        return self.leagues[league].predict(home_team, away_team, num_games)
+
+    def frame(self, num_games="All", leagues=None):
+        """All pairings of `leagues` (default every league) in the match_predictions.csv format."""
+        frames = [self.leagues[league].frame(num_games) for league in (leagues or self.leagues)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["Home Team", "Away Team"] + COLUMNS)
+
+
+def main():
+    from warehouse.snapshot import SnapshotStore
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot", default=".snapshot", help="Snapshot directory to read")
+    parser.add_argument("--out", default=None, help="Matrix directory (default <snapshot>/predictions)")
+    parser.add_argument("--csv", default=None, help="Also export every league's pairings to this file")
+    parser.add_argument("--window", default="All Games", choices=list(WINDOWS), help="Window of the CSV export")
+    args = parser.parse_args()
+
+    snapshot = SnapshotStore(args.snapshot, fetch=None)
+    version = snapshot.version()
+    if version is None:
+        parser.error(f"No snapshot in {args.snapshot}")
+
+    store = PredictionStore(args.out or os.path.join(args.snapshot, "predictions"))
+    count = store.build(version, snapshot.read("FACT_TEAM_MATCH"), snapshot.read("DIM_TEAMS"))
+    print(f"Wrote prediction matrices for {count} leagues (snapshot {version})")
+
+    if args.csv:
+        predictions = PredictionMatrices(store.load(version)).frame(WINDOWS[args.window])
+        predictions.to_csv(args.csv, index=False)
+        print(f"Wrote {len(predictions):,} predictions to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
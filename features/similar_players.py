@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# Per-game rates, playing time, output and discipline
+FEATURES = ["G90", "GPG", "MPG", "T_MINUTES_PLAYED", "T_GOALS", "T_ASSISTS", "T_YELLOW_CARDS", "T_RED_CARDS"]
+INFO_COLUMNS = ["PLAYER_ID", "PLAYER_NAME", "TEAM_NAME", "LEAGUE_NAME", "COUNTRY_NAME"]
+
+
+class SimilarityIndex:
+    """
+    Nearest-neighbour search over players' per-90 and season metrics.
+
+    Every metric is standardized (zero mean, unit variance) so minutes do not
+    drown out rates, and the matrix is stored as float32 with each row's squared
+    norm. Squared distances from one player to all others are then a single
+    matrix-vector product, |a|^2 - 2 a.b + |b|^2, and the top k come from
+    `argpartition`, which stays well under a millisecond for tens of thousands
+    of players.
+
+    Args:
+        players (pd.DataFrame): VW_PLAYER_STATS rows with the FEATURES and INFO_COLUMNS.
+        min_minutes (float): Players with fewer minutes are left out; their per-90 numbers are noise.
+    """
+
+    def __init__(self, players, min_minutes=450):
+        players = players[players["T_MINUTES_PLAYED"].fillna(0) >= min_minutes]
+        self.players = players[INFO_COLUMNS].reset_index(drop=True)
+
+        values = players[FEATURES].fillna(0).to_numpy(dtype=np.float64)
+        self.mean = values.mean(axis=0) if len(values) else np.zeros(len(FEATURES))
+        scale = values.std(axis=0) if len(values) else np.ones(len(FEATURES))
+        self.scale = np.where(scale > 0, scale, 1.0)
+
+        self.values = values
+        self.matrix = ((values - self.mean) / self.scale).astype(np.float32)
+        self.norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+        self.rows_by_name = {}
+        for row, name in enumerate(self.players["PLAYER_NAME"]):
+            self.rows_by_name.setdefault(name, []).append(row)
+        self.rows_by_id = dict(zip(self.players["PLAYER_ID"], range(len(self.players))))
+
+    def __len__(self):
+        return len(self.players)
+
+    def row(self, player):
+        """Row of a player given a PLAYER_ID or a PLAYER_NAME (the first match), or None."""
+        if player in self.rows_by_id:
+            return self.rows_by_id[player]
+        rows = self.rows_by_name.get(player)
+        return rows[0] if rows else None
+
+    def search(self, text, limit=50):
+        """Player names containing `text` (case-insensitive), for pickers."""
+        names = self.players["PLAYER_NAME"]
+        return names[names.str.contains(text, case=False, regex=False)].head(limit).tolist()
+
+    def nearest(self, row, k=10):
+        """(rows, distances) of the `k` players closest to `row`, closest first, excluding the player."""
+        distances = self.norms - 2 * (self.matrix @ self.matrix[row]) + self.norms[row]
+        distances[row] = np.inf
+
+        k = min(k, len(distances) - 1)
+        if k <= 0:
+            return np.array([], dtype=np.int64), np.array([])
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return top, np.sqrt(np.maximum(distances[top], 0))
+
+    def similar(self, player, k=10):
+        """
+        The `k` most similar players to `player` (PLAYER_ID or PLAYER_NAME) across every league.
+
+        Returns:
+            pd.DataFrame: INFO_COLUMNS, the FEATURES and DISTANCE (in standard deviations), closest first.
+                Empty when the player is unknown or below the minutes threshold.
+        """
+        row = self.row(player)
+        if row is None:
+            return pd.DataFrame(columns=INFO_COLUMNS + FEATURES + ["DISTANCE"])
+
+        rows, distances = self.nearest(row, k)
+        result = self.players.iloc[rows].reset_index(drop=True)
+        for i, column in enumerate(FEATURES):
+            result[column] = self.values[rows, i]
+        result["DISTANCE"] = distances
+        return result
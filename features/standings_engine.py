@@ -0,0 +1,357 @@
+import copy
+import datetime
+
+import numpy as np
+import pandas as pd
+
+HOME, AWAY = 1, 2
+SPLITS = {"overall": 0, "home": HOME, "away": AWAY}
+
+# Per-game contribution to a team's line, in this column order
+FIELDS = ["PLAYED", "WINS", "DRAWS", "LOSSES", "GOALS", "CONCEEDED", "POINTS"]
+PLAYED, WINS, DRAWS, LOSSES, GOALS, CONCEEDED, POINTS = range(len(FIELDS))
+
+# Sort order of a table: every key descending, then team name ascending
+TIEBREAKS = ["POINTS", "GOAL_DIFFERENCE", "GOALS", "WINS"]
+
+# Seasons run from 1 August, as in agg_league
+SEASON_START = (8, 1)
+
+_DAY_OFFSET = 1 << 31
+_EPOCH = datetime.date(1970, 1, 1)
+
+
+def _day(value):
+    """Days since 1970-01-01 for a date, datetime or date string."""
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64))
+
+
+def _date(day):
+    return _EPOCH + datetime.timedelta(days=int(day))
+
+
+def season_start(value):
+    """First day of the season `value` falls in."""
+    date = pd.Timestamp(value).date()
+    start = datetime.date(date.year, *SEASON_START)
+    return start if date >= start else datetime.date(date.year - 1, *SEASON_START)
+
+
+def _lines(scored, conceded):
+    """(n, len(FIELDS)) int32 matrix of each game's contribution."""
+    scored = np.asarray(scored, dtype=np.int32)
+    conceded = np.asarray(conceded, dtype=np.int32)
+    wins, draws = scored > conceded, scored == conceded
+    return np.column_stack([
+        np.ones_like(scored), wins, draws, scored < conceded, scored, conceded, 3 * wins + draws,
+    ]).astype(np.int32)
+
+
+class StandingsEngine:
+    """
+    League tables computed from match facts in memory.
+
+    Current-season totals are kept per team for the overall, home-only and
+    away-only splits, so recording a new result is a constant number of array
+    increments (`add_match`) and reading any table is a slice and a sort. Each
+    league's current season is the one its own latest game falls in, so a league
+    that has finished, or plays a different calendar, keeps its last season's table.
+
+    Arbitrary date windows use prefix sums: each split's rows are sorted by
+    (team, date) with a running total per field, so a window's totals for every
+    team are two vectorized binary searches and a subtraction. Results added
+    since are merged into the prefix sums, in one pass, by the next window or
+    timeline read.
+
+    Engines are shared between sessions: add results to a `copy` (see `with_facts`),
+    never to an engine that is being read.
+
+    Tables are ordered by points, goal difference, goals scored and wins, then name.
+
+    Args:
+        facts (pd.DataFrame): FACT_TEAM_MATCH rows with TEAM_ID, GAMEROLE, PLAYED_ON, SCORED, CONCEEDED.
+        teams (pd.DataFrame): DIM_TEAMS rows with TEAM_ID, TEAM_NAME and LEAGUE_NAME.
+    """
+
+    def __init__(self, facts, teams):
+        facts = facts[["TEAM_ID", "GAMEROLE", "PLAYED_ON", "SCORED", "CONCEEDED"]].dropna(subset=["SCORED", "CONCEEDED"])
+        teams = teams.drop_duplicates("TEAM_ID").dropna(subset=["LEAGUE_NAME"])
+
+        self.team_ids = np.unique(np.concatenate([teams["TEAM_ID"].to_numpy(), facts["TEAM_ID"].to_numpy()]))
+        names = teams.set_index("TEAM_ID").reindex(self.team_ids)
+        self.team_names = names["TEAM_NAME"].fillna("").to_numpy()
+        self.league_names = names["LEAGUE_NAME"].to_numpy()
+        self._name_rank = np.unique(self.team_names, return_inverse=True)[1]
+        self.leagues = {
+            league: np.flatnonzero(self.league_names == league)
+            for league in pd.unique(self.league_names[pd.notna(self.league_names)])
+        }
+
+        positions = np.searchsorted(self.team_ids, facts["TEAM_ID"].to_numpy())
+        roles = pd.to_numeric(facts["GAMEROLE"]).to_numpy()
+        days = pd.to_datetime(facts["PLAYED_ON"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        lines = _lines(facts["SCORED"].to_numpy(), facts["CONCEEDED"].to_numpy())
+
+        # Prefix sums per split over rows sorted by (team, day)
+        self._keys, self._cum = {}, {}
+        for split, role in SPLITS.items():
+            mask = np.ones(len(roles), bool) if role == 0 else roles == role
+            keys = self._key(positions[mask], days[mask])
+            order = np.argsort(keys, kind="stable")
+            self._keys[split] = keys[order]
+            self._cum[split] = np.vstack([np.zeros((1, len(FIELDS)), np.int64), np.cumsum(lines[mask][order], axis=0)])
+
+        self.first_day = int(days.min()) if len(days) else _day(datetime.date.today())
+        self.last_day = int(days.max()) if len(days) else self.first_day
+        self._timelines = {}
+        # Results added since the prefix sums were built: (position, role, day, line)
+        self._pending = []
+
+        # Current season per league, from that league's latest game; teams without a league use the overall one
+        team_last_day = np.full(len(self.team_ids), -1, dtype=np.int64)
+        np.maximum.at(team_last_day, positions, days)
+        self.season_starts = {}
+        self._leagueless = np.flatnonzero(pd.isna(self.league_names))
+        self._season_days = np.full(len(self.team_ids), _day(season_start(_date(self.last_day))), dtype=np.int64)
+        for league, league_positions in self.leagues.items():
+            league_last_day = int(team_last_day[league_positions].max(initial=-1))
+            self.season_starts[league] = season_start(_date(league_last_day if league_last_day >= 0 else self.last_day))
+            self._season_days[league_positions] = _day(self.season_starts[league])
+
+        # Current-season totals: [split, team, field]
+        self._running = np.stack([
+            self._window(split, self._season_days, self.last_day) for split in SPLITS
+        ]).astype(np.int64)
+
+    @staticmethod
+    def _key(positions, days):
+        return (positions.astype(np.int64) << 32) | (days.astype(np.int64) + _DAY_OFFSET)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def copy(self):
+        """An engine to add results to while this one keeps serving readers; the prefix sums are shared until merged."""
+        other = copy.copy(self)
+        other._keys, other._cum = dict(self._keys), dict(self._cum)
+        other._running = self._running.copy()
+        other._season_days = self._season_days.copy()
+        other.season_starts = dict(self.season_starts)
+        other._pending = list(self._pending)
+        other._timelines = {}
+        return other
+
+    def with_facts(self, facts, teams):
+        """
+        A copy of the engine with FACT_TEAM_MATCH rows `facts` added, or None when a rebuild is
+        needed: `teams` (DIM_TEAMS) no longer matches the engine's teams, or a row's team is unknown.
+        """
+        teams = teams.drop_duplicates("TEAM_ID").dropna(subset=["LEAGUE_NAME"])
+        names = teams.set_index("TEAM_ID").reindex(self.team_ids)
+        if (not np.isin(teams["TEAM_ID"].to_numpy(), self.team_ids).all()
+                or not np.array_equal(names["TEAM_NAME"].fillna("").to_numpy(), self.team_names)
+                or not pd.Series(names["LEAGUE_NAME"].to_numpy()).equals(pd.Series(self.league_names))):
+            return None
+
+        engine = self.copy()
+        facts = facts.dropna(subset=["SCORED", "CONCEEDED"])
+        try:
+            for team_id, role, played_on, scored, conceded in zip(
+                    facts["TEAM_ID"], pd.to_numeric(facts["GAMEROLE"]), facts["PLAYED_ON"], facts["SCORED"],
+                    facts["CONCEEDED"]):
+                engine._add(engine._position(team_id), int(role), _day(played_on), scored, conceded)
+        except KeyError:
+            return None
+        engine._merge_pending()
+        return engine
+
+    def add_match(self, home_team_id, away_team_id, home_score, away_score, played_on):
+        """Records one result in O(1). A result from a later season starts a new current season for its league."""
+        day = _day(played_on)
+        home, away = self._position(home_team_id), self._position(away_team_id)
+        self._add(home, HOME, day, home_score, away_score)
+        self._add(away, AWAY, day, away_score, home_score)
+
+    def _add(self, position, role, day, scored, conceded):
+        league = self.league_names[position]
+        if pd.notna(league):
+            self._roll_season(self.leagues[league], day, league)
+        self.first_day, self.last_day = min(self.first_day, day), max(self.last_day, day)
+        # Teams without a league follow the latest game of any league
+        self._roll_season(self._leagueless, self.last_day, None)
+
+        line = _lines([scored], [conceded])[0]
+        self._pending.append((position, role, day, line))
+        if day >= self._season_days[position]:
+            self._running[0, position] += line
+            self._running[role, position] += line
+        self._timelines.clear()
+
+    def _roll_season(self, positions, day, league):
+        """Starts a new current season for `positions` (one league, or the teams without one) if `day` is past theirs."""
+        if not len(positions) or day < _day(datetime.date(_date(self._season_days[positions[0]]).year + 1, *SEASON_START)):
+            return
+        start = season_start(_date(day))
+        if league is not None:
+            self.season_starts[league] = start
+        self._season_days[positions] = _day(start)
+        self._running[:, positions] = 0
+
+    def _position(self, team_id):
+        position = int(np.searchsorted(self.team_ids, team_id))
+        if position == len(self.team_ids) or self.team_ids[position] != team_id:
+            raise KeyError(f"Unknown team {team_id}")
+        return position
+
+    def _merge_pending(self):
+        """Folds added results into each split's sorted keys and prefix sums."""
+        if not self._pending:
+            return
+        positions = np.array([position for position, _, _, _ in self._pending])
+        roles = np.array([role for _, role, _, _ in self._pending])
+        keys = self._key(positions, np.array([day for _, _, day, _ in self._pending]))
+        lines = np.array([line for _, _, _, line in self._pending], dtype=np.int64)
+        for split, role in SPLITS.items():
+            mask = np.ones(len(roles), bool) if role == 0 else roles == role
+            order = np.argsort(keys[mask], kind="stable")
+            new_keys, new_lines = keys[mask][order], lines[mask][order]
+            # After existing rows of the same (team, day), as a rebuild from the merged facts orders them
+            at = np.searchsorted(self._keys[split], new_keys, side="right")
+            merged = np.insert(np.diff(self._cum[split], axis=0), at, new_lines, axis=0)
+            self._keys[split] = np.insert(self._keys[split], at, new_keys)
+            self._cum[split] = np.vstack([np.zeros((1, len(FIELDS)), np.int64), np.cumsum(merged, axis=0)])
+        self._pending = []
+
+    # ------------------------------------------------------------------
+    # Tables
+    # ------------------------------------------------------------------
+    def _window(self, split, start_day, end_day):
+        """(teams, fields) totals of games in [start_day, end_day] for every team; days may be per-team arrays."""
+        self._merge_pending()
+        positions = np.arange(len(self.team_ids))
+        keys, cum = self._keys[split], self._cum[split]
+        lo = np.searchsorted(keys, self._key(positions, np.broadcast_to(start_day, positions.shape)), side="left")
+        hi = np.searchsorted(keys, self._key(positions, np.broadcast_to(end_day, positions.shape)), side="right")
+        return cum[hi] - cum[lo]
+
+    def totals(self, split="overall", start=None, end=None):
+        """(teams, fields) totals for every team: the running current season, or the games between `start` and `end`."""
+        if split not in SPLITS:
+            raise ValueError(f"Unknown split '{split}', expected one of {list(SPLITS)}")
+        if start is None and end is None:
+            return self._running[SPLITS[split]]
+        return self._window(split, self.first_day if start is None else _day(start),
+                            self.last_day if end is None else _day(end))
+
+    def _order(self, positions, totals):
+        """Table order of `positions` given their (teams, fields) totals."""
+        # lexsort: last key is the primary one
+        return np.lexsort((
+            self._name_rank[positions],
+            -totals[:, WINS],
+            -totals[:, GOALS],
+            -(totals[:, GOALS] - totals[:, CONCEEDED]),
+            -totals[:, POINTS],
+        ))
+
+    def _frame(self, positions, totals):
+        goal_difference = totals[:, GOALS] - totals[:, CONCEEDED]
+        order = self._order(positions, totals)
+        totals = totals[order]
+        return pd.DataFrame({
+            "TEAM_NAME": self.team_names[positions][order],
+            "PLAYED": totals[:, PLAYED],
+            "POINTS": totals[:, POINTS],
+            "WINS": totals[:, WINS],
+            "DRAWS": totals[:, DRAWS],
+            "LOSSES": totals[:, LOSSES],
+            "GOALS": totals[:, GOALS],
+            "CONCEEDED": totals[:, CONCEEDED],
+            "GOAL_DIFFERENCE": goal_difference[order],
+        })
+
+    def table(self, league, split="overall", start=None, end=None):
+        """
+        One league's standings.
+
+        Args:
+            league (str): LEAGUE_NAME.
+            split (str): "overall", "home" or "away".
+            start, end (date): Optional window; without one, the current season.
+
+        Returns:
+            pd.DataFrame: TEAM_NAME, PLAYED, POINTS, WINS, DRAWS, LOSSES, GOALS, CONCEEDED, GOAL_DIFFERENCE.
+        """
+        positions = self.leagues.get(league, np.array([], dtype=np.int64))
+        return self._frame(positions, self.totals(split, start, end)[positions])
+
+    def tables(self, split="overall", start=None, end=None):
+        """Every league's standings at once: {league: table}."""
+        totals = self.totals(split, start, end)
+        return {league: self._frame(positions, totals[positions]) for league, positions in self.leagues.items()}
+
+    def date_range(self):
+        return _date(self.first_day), _date(self.last_day)
+
+    def current_season(self, league):
+        """First day of `league`'s current season (the season of its latest game)."""
+        return self.season_starts.get(league, season_start(_date(self.last_day)))
+
+    def timeline(self, league, season=None):
+        """Matchday-by-matchday standings of one league's season (its current one by default)."""
+        season = self.current_season(league) if season is None else season_start(season)
+        self._merge_pending()
+        if (league, season) not in self._timelines:
+            self._timelines[(league, season)] = LeagueTimeline(self, league, season)
+        return self._timelines[(league, season)]
+
+
+class LeagueTimeline:
+    """
+    A league's standings after every matchday of a season.
+
+    Matchday K is each team's K-th game of the season. The engine's overall
+    prefix sums already hold each team's season as a contiguous run, so the
+    cumulative totals after 0..K games for every team are one fancy-indexed
+    subtraction into a (teams, matchdays + 1, fields) array. A table as of any
+    matchday is then a slice and a sort, and positions are ranked for every
+    matchday up front for the history chart.
+    """
+
+    def __init__(self, engine, league, season):
+        self.engine = engine
+        self.league = league
+        self.season = season
+        self.positions = engine.leagues.get(league, np.array([], dtype=np.int64))
+        self.team_names = engine.team_names[self.positions]
+
+        start = _day(season)
+        end = _day(datetime.date(season.year + 1, *SEASON_START)) - 1
+        keys, cum = engine._keys["overall"], engine._cum["overall"]
+        lo = np.searchsorted(keys, engine._key(self.positions, np.full(len(self.positions), start)), side="left")
+        hi = np.searchsorted(keys, engine._key(self.positions, np.full(len(self.positions), end)), side="right")
+
+        self.matchdays = int((hi - lo).max()) if len(self.positions) else 0
+        rows = np.minimum(lo[:, None] + np.arange(self.matchdays + 1), hi[:, None])
+        self.cumulative = cum[rows] - cum[lo][:, None]
+
+        # 1-based league position of every team after every matchday: (teams, matchdays + 1)
+        self.ranks = np.empty((len(self.positions), self.matchdays + 1), dtype=np.int32)
+        for matchday in range(self.matchdays + 1):
+            order = engine._order(self.positions, self.cumulative[:, matchday])
+            self.ranks[order, matchday] = np.arange(1, len(order) + 1)
+
+    def table(self, matchday):
+        """Standings after `matchday` (clipped to the season), in the engine's table format."""
+        matchday = int(np.clip(matchday, 0, self.matchdays))
+        return self.engine._frame(self.positions, self.cumulative[:, matchday])
+
+    def position_history(self):
+        """Long format MATCHDAY, TEAM_NAME, POSITION, POINTS for matchdays 1..K."""
+        matchdays = np.arange(1, self.matchdays + 1)
+        return pd.DataFrame({
+            "MATCHDAY": np.tile(matchdays, len(self.positions)),
+            "TEAM_NAME": np.repeat(self.team_names, self.matchdays),
+            "POSITION": self.ranks[:, 1:].ravel(),
+            "POINTS": self.cumulative[:, 1:, POINTS].ravel(),
+        })
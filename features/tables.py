@@ -0,0 +1,99 @@
+import hashlib
+import pickle
+
+import streamlit as st
+from utils import get_recorder
+from warehouse.instrument import mark_miss
+
+# Above this many rows tables are sent as Arrow through st.dataframe instead of as HTML
+ARROW_ROWS = 500
+
+# One stylesheet for every HTML table, scoped by class so pages do not restyle each other's tables
+TABLE_CSS = """
+<style>
+    .styled-table, .league-table {
+        width: 100%;
+        border-collapse: collapse;
+    }
+    .styled-table {
+        text-align: center;
+        font-family: Arial, sans-serif;
+    }
+    .styled-table th, .league-table th {
+        background-color: #003366;
+        color: white;
+        padding: 10px;
+        border: 1px solid #ddd;
+    }
+    .styled-table td {
+        padding: 8px;
+        border: 1px solid #ddd;
+    }
+    .league-table td {
+        padding: 10px;
+        border: 1px solid #ddd;
+        text-align: center;
+    }
+    .styled-table tr:nth-child(even), .league-table tr:nth-child(even) {
+        background-color: #f2f2f2;
+    }
+    h3.table-title {
+        text-align: center;
+        color: #003366;
+        margin-top: 20px;
+    }
+</style>
+"""
+
+EMPTY_HTML = "<p style='color:red; font-weight:bold;'>No data available</p>"
+
+
+def content_key(df):
+    """
+    Hash of a frame's pickled form. Equal pickles mean equal frames; equal frames
+    that pickle differently (shared vs. copied string objects) only cost a miss.
+    """
+    try:
+        data = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        # Cells that cannot be pickled: fall back to their text form
+        data = df.to_csv().encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# Rendered fragments keyed by content hash; the frame itself is not hashed again by Streamlit
+@st.cache_data(max_entries=256, show_spinner=False)
+def _render_html(key, title, classes, _df):
+    mark_miss()
+    table = _df.to_html(index=False, escape=False, border=0, classes=classes)
+    return f"<h3 class='table-title'>{title}</h3>\n{table}" if title else table
+
+
+def render_html(df, title=None, classes="styled-table"):
+    """
+    HTML of `df` (no index), with an optional centred title, rendered once per
+    distinct content and served from the cache on every later rerun.
+    """
+    if df.empty:
+        return EMPTY_HTML
+    with get_recorder().track(classes or "table", "render", cache="hit") as call:
+        call["rows"] = len(df)
+        return _render_html(content_key(df), title, classes, df)
+
+
+def inject_table_styles():
+    """The shared table stylesheet; call once near the top of a page that shows HTML tables."""
+    st.markdown(TABLE_CSS, unsafe_allow_html=True)
+
+
+def show_table(df, title=None, classes="styled-table", arrow_rows=ARROW_ROWS):
+    """
+    Displays `df` as a cached HTML table, or through Arrow with st.dataframe when
+    it has more than `arrow_rows` rows (sortable and virtualised, with no HTML built).
+    """
+    if len(df) > arrow_rows:
+        if title:
+            st.markdown(f"<h3 class='table-title'>{title}</h3>", unsafe_allow_html=True)
+        st.dataframe(df, hide_index=True, width="stretch")
+    else:
+        st.markdown(render_html(df, title, classes), unsafe_allow_html=True)
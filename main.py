@@ -1,9 +1,24 @@
+import importlib
 import streamlit as st
-from features.attendance import attendance_analysis
-from features.MatchResults import result_analysis
-from features.GoalsPredication import goals_prediction
-from features.players import players_analysis
-from features.leagueTables import leagues
+from warehouse.instrument import feature
+
+# Feature registry: page label -> (module, page function). A page's module is
+# imported the first time it is selected, so opening one page never pays for
+# the others' imports (plotly, prediction engines, ...).
+FEATURES = {
+    "League tables": ("features.leagueTables", "leagues"),
+    "Attendance analysis": ("features.attendance", "attendance_analysis"),
+    "Team form analysis": ("features.MatchResults", "result_analysis"),
+    "Goals prediction": ("features.GoalsPredication", "goals_prediction"),
+    "Player Actions": ("features.players", "players_analysis"),
+}
+
+
+def load_feature(name):
+    module_name, function_name = FEATURES[name]
+    return getattr(importlib.import_module(module_name), function_name)
+
+
 # Main app function
 def main():
     st.title("Football Analytics")
@@ -12,22 +27,17 @@ def main():
         """
     )
     # Sidebar for toggling between apps
-    app_options = ["League tables","Attendance analysis", "Team form analysis", "Goals prediction","Player Actions"]
-    selected_app = st.sidebar.selectbox("Select an App", app_options)
+    selected_app = st.sidebar.selectbox("Select an App", list(FEATURES))
 
-    if selected_app == "League tables":
-        leagues()
-    elif  selected_app == "Attendance analysis":
-        attendance_analysis()
+    if selected_app == "Player Actions":
+        st.header("Player Analysis")
 
-    elif selected_app == "Team form analysis":
-        result_analysis()
+    # Every data call the page makes is attributed to it in the query diagnostics
+    with feature(selected_app):
+        load_feature(selected_app)()
 
-    elif selected_app == "Player Actions":
-        st.header("Player Analysis")
-        players_analysis()
-    elif selected_app == "Goals prediction":
-        goals_prediction()
+    if st.secrets.get("diagnostics", {}).get("panel", False):
+        importlib.import_module("features.diagnostics").diagnostics_panel()
 
 
 
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from warehouse import synthetic
+
+
+@pytest.fixture(scope="session")
+def tables():
+    """Synthetic warehouse tables: two leagues, three seasons, with every view's inputs."""
+    return synthetic.generate(countries=2, leagues_per_country=1, seasons=3, seed=0)
+
+
+@pytest.fixture(scope="session")
+def frame():
+    """Factory for small deterministic frames: frame(seed, rows) with GOALS, XG and TEAM_NAME."""
+    def make(seed=0, rows=1000):
+        rng = np.random.default_rng(seed)
+        return pd.DataFrame({
+            "GOALS": rng.integers(0, 5, rows),
+            "XG": rng.normal(size=rows),
+            "TEAM_NAME": rng.choice(["Ashford", "Bexley", "Corby"], rows),
+        })
+    return make
+
+
+@pytest.fixture(scope="session")
+def warehouse(tables, tmp_path_factory):
+    """Read-only DuckDB connection to the same tables plus the warehouse views."""
+    duckdb = pytest.importorskip("duckdb")
+    path = str(tmp_path_factory.mktemp("warehouse") / "football.duckdb")
+    synthetic.write(path, tables)
+    conn = duckdb.connect(path, read_only=True)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="session")
+def sql(warehouse):
+    """Runs SQL against the synthetic warehouse and returns a DataFrame."""
+    def run(query, params=None):
+        return warehouse.execute(query, params or []).df()
+    return run
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.attendance import downsample_attendance
+from features.downsample import lttb
+
+
+def reference_lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets as in Steinarsson's thesis, one point at a time."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    kept, a = [0], 0
+    for i in range(threshold - 2):
+        avg_start = int(math.floor((i + 1) * every)) + 1
+        avg_stop = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = sum(x[avg_start:avg_stop]) / (avg_stop - avg_start)
+        avg_y = sum(y[avg_start:avg_stop]) / (avg_stop - avg_start)
+
+        start, stop = int(math.floor(i * every)) + 1, int(math.floor((i + 1) * every)) + 1
+        best, best_area = start, -1.0
+        for j in range(start, stop):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 5), (1000, 100), (1001, 37), (5000, 4999), (300, 3)])
+def test_matches_reference(n, threshold):
+    rng = np.random.default_rng(n + threshold)
+    x = np.sort(rng.uniform(0, 1e6, n))
+    y = rng.normal(size=n).cumsum()
+    assert lttb(x, y, threshold).tolist() == reference_lttb(x.tolist(), y.tolist(), threshold)
+
+
+def test_keeps_endpoints_and_peaks():
+    x = np.arange(10_000, dtype=float)
+    y = np.zeros(10_000)
+    y[[1234, 7777]] = [50.0, -50.0]
+    kept = lttb(x, y, 200)
+    assert len(kept) == 200 and kept[0] == 0 and kept[-1] == 9_999
+    assert {1234, 7777} <= set(kept.tolist())
+    assert (np.diff(kept) > 0).all()
+
+
+def test_short_series_are_returned_whole():
+    assert lttb(np.arange(5.0), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_attendance_budget_is_shared_between_teams(sql):
+    attendance = sql("SELECT PLAYED_ON, TEAM_NAME, ATTENDANCE FROM ATTENDeNCE_VIEW ORDER BY PLAYED_ON")
+    teams = attendance["TEAM_NAME"].unique()[:4]
+    attendance = attendance[attendance["TEAM_NAME"].isin(teams)].reset_index(drop=True)
+
+    sampled = downsample_attendance(attendance, budget=40)
+    counts = sampled["TEAM_NAME"].value_counts()
+    assert set(counts.index) == set(teams) and (counts == 10).all()
+    # Each team's first and last match survive
+    for team in teams:
+        rows = attendance[attendance["TEAM_NAME"] == team]
+        kept = sampled[sampled["TEAM_NAME"] == team]
+        assert kept["PLAYED_ON"].iloc[0] == rows["PLAYED_ON"].iloc[0]
+        assert kept["PLAYED_ON"].iloc[-1] == rows["PLAYED_ON"].iloc[-1]
+    pd.testing.assert_frame_equal(downsample_attendance(attendance, budget=10 ** 6), attendance)
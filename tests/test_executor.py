@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from warehouse.executor import QueryExecutor, QueryFailed, QueryTimeout
+
+
+@pytest.fixture
+def executor():
+    executor = QueryExecutor(max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+def test_calls_run_concurrently_and_keep_their_order(executor):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(value):
+        barrier.wait()  # only passes if both calls are running at once
+        return value
+
+    results = executor.gather({"b": (meet, 2), "a": (meet, 1)})
+    assert list(results.items()) == [("b", 2), ("a", 1)]
+
+
+def test_wrap_is_applied_to_every_call(executor):
+    seen = []
+
+    def wrap(task):
+        return lambda: seen.append(threading.current_thread().name) or task() * 10
+
+    assert executor.gather({"x": lambda: 1, "y": lambda: 2}, wrap=wrap) == {"x": 10, "y": 20}
+    assert len(seen) == 2 and all(name.startswith("query") for name in seen)
+
+
+def test_error_is_raised_as_query_failed_with_its_cause(executor):
+    def fail():
+        raise KeyError("DIM_TEAMS")
+
+    with pytest.raises(QueryFailed, match="'teams'") as raised:
+        executor.gather({"ok": lambda: 1, "teams": fail})
+    assert raised.value.name == "teams" and isinstance(raised.value.__cause__, KeyError)
+
+
+def test_timeout_names_the_call_and_cancels_calls_not_started(executor):
+    release = threading.Event()
+    ran = []
+
+    def slow():
+        release.wait(10)
+
+    # Both workers are busy with slow calls, so "queued" has not started when the first one times out
+    with pytest.raises(QueryTimeout) as raised:
+        executor.gather({"slow": slow, "also slow": slow, "queued": lambda: ran.append(1)}, timeout=0.1)
+    assert raised.value.name == "slow" and raised.value.timeout == 0.1
+    release.set()
+    executor.gather({"after": lambda: None})
+    assert ran == []
+
+
+def test_timeout_per_name(executor):
+    def sleep(seconds):
+        time.sleep(seconds)
+        return seconds
+
+    assert executor.gather({"quick": (sleep, 0), "unlimited": (sleep, 0.2)}, timeout={"quick": 0.1}) == {
+        "quick": 0, "unlimited": 0.2}
+    with pytest.raises(QueryTimeout) as raised:
+        executor.gather({"quick": (sleep, 0), "limited": (sleep, 0.5)}, timeout={"limited": 0.1})
+    assert raised.value.name == "limited"
+
+
+def test_nested_gather_runs_inline(executor):
+    def builder(name):
+        # Each builder gathers its own tables while both workers are taken by builders
+        return executor.gather({f"{name}.facts": lambda: name, f"{name}.teams": lambda: name})
+
+    results = executor.gather({"form": (builder, "form"), "standings": (builder, "standings")}, timeout=5)
+    assert results["form"] == {"form.facts": "form", "form.teams": "form"}
+
+    def failing_builder():
+        return executor.gather({"facts": lambda: 1 / 0})
+
+    with pytest.raises(QueryFailed, match="'builder'") as raised:
+        executor.gather({"builder": failing_builder}, timeout=5)
+    assert isinstance(raised.value.__cause__, QueryFailed) and raised.value.__cause__.name == "facts"
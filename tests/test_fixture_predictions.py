@@ -0,0 +1,91 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import GoalsPredication
+from features.match_index import MatchIndex
+from features.prediction_matrix import COLUMNS
+
+duckdb = pytest.importorskip("duckdb")
+
+# The per-match history query goals_prediction ran twice for every fixture
+TEAM_STATS_SQL = """
+WITH RankedMatches AS (
+    SELECT FTM.PLAYED_ON, FTM.SCORED AS goals_scored, FTM.CONCEEDED AS goals_conceded,
+           ROW_NUMBER() OVER (PARTITION BY FTM.TEAM_ID ORDER BY FTM.PLAYED_ON DESC) AS game_rank
+    FROM FACT_TEAM_MATCH FTM
+    JOIN DIM_TEAMS DT ON FTM.TEAM_ID = DT.TEAM_ID
+    WHERE DT.TEAM_NAME = ? AND FTM.GAMEROLE = ?
+)
+SELECT AVG(goals_scored) AS scored, AVG(goals_conceded) AS conceded FROM RankedMatches WHERE game_rank <= ?
+"""
+
+
+def renamed(tables):
+    """DIM_TEAMS with the second team of each league renamed to the first, so one name has two TEAM_IDs."""
+    teams = tables["DIM_TEAMS"].copy()
+    for _, rows in teams.groupby("LEAGUE_NAME"):
+        teams.loc[rows.index[1], "TEAM_NAME"] = teams.loc[rows.index[0], "TEAM_NAME"]
+    return teams
+
+
+@pytest.fixture(params=["unique names", "shared names"])
+def teams(request, tables):
+    return tables["DIM_TEAMS"] if request.param == "unique names" else renamed(tables)
+
+
+@pytest.fixture
+def index(tables, teams, monkeypatch):
+    index = MatchIndex(tables["FACT_TEAM_MATCH"], teams)
+    monkeypatch.setattr(GoalsPredication, "get_match_index", lambda version: index)
+    monkeypatch.setattr(GoalsPredication, "refresh_snapshot", lambda: "test")
+    return index
+
+
+def baseline(tables, teams, fixtures, num_games):
+    """Generic and weighted goals fixture by fixture, from the per-team SQL."""
+    limit = 10 ** 6 if num_games == "All" else num_games
+    with duckdb.connect() as conn:
+        conn.register("FACT_TEAM_MATCH", tables["FACT_TEAM_MATCH"])
+        conn.register("DIM_TEAMS", teams)
+        rows = []
+        for home_team, away_team in fixtures[["Home Team", "Away Team"]].itertuples(index=False):
+            home_scored, home_conceded = conn.execute(TEAM_STATS_SQL, [home_team, 1, limit]).fetchone()
+            away_scored, away_conceded = conn.execute(TEAM_STATS_SQL, [away_team, 2, limit]).fetchone()
+            rows.append([home_team, away_team, home_scored, away_scored,
+                         0.7 * home_scored + 0.3 * away_conceded, 0.6 * away_scored + 0.4 * home_conceded])
+    return pd.DataFrame(rows, columns=["Home Team", "Away Team"] + COLUMNS)
+
+
+@pytest.mark.parametrize("num_games", ["All", 10, 5])
+def test_batch_matches_per_fixture_queries(tables, teams, index, num_games):
+    names = teams["TEAM_NAME"].drop_duplicates().to_numpy()
+    rng = np.random.default_rng(0)
+    pairs = rng.choice(len(names), size=(40, 2))
+    fixtures = pd.DataFrame({"Home Team": names[pairs[:, 0]], "Away Team": names[pairs[:, 1]]})
+
+    actual = GoalsPredication.predict_fixtures(fixtures, num_games)
+    expected = baseline(tables, teams, fixtures, num_games)
+    pd.testing.assert_frame_equal(actual[["Home Team", "Away Team"]], expected[["Home Team", "Away Team"]])
+    np.testing.assert_allclose(actual[COLUMNS].to_numpy(float), expected[COLUMNS].to_numpy(float), atol=0.005 + 1e-9)
+
+
+def test_malformed_fixture_list(tables, teams, index):
+    home, away = teams["TEAM_NAME"].iloc[0], teams["TEAM_NAME"].iloc[3]
+    csv = (f"Home Team,Away Team\n{home},{away}\n,{away}\n{home},\n  \n{away} , {home}\nNowhere FC,{home}\n")
+    fixtures = pd.read_csv(io.StringIO(csv), skip_blank_lines=False)
+
+    predictions = GoalsPredication.predict_fixtures(fixtures)
+    assert predictions[["Home Team", "Away Team"]].values.tolist() == [[home, away], [away, home], ["Nowhere FC", home]]
+    # An unknown team has no history, the others still get predictions
+    assert predictions.iloc[:2, 2:].notna().all().all()
+    assert predictions.iloc[2][["Generic Home Goals", "Weighted Home Goals", "Weighted Away Goals"]].isna().all()
+
+
+def test_write_predictions(tables, teams, index, tmp_path):
+    fixtures = pd.DataFrame({"Home Team": teams["TEAM_NAME"].iloc[:4], "Away Team": teams["TEAM_NAME"].iloc[4:8].to_numpy()})
+    path = tmp_path / "match_predictions.csv"
+    written = GoalsPredication.write_predictions(fixtures, str(path))
+    pd.testing.assert_frame_equal(pd.read_csv(path), written, check_dtype=False)
@@ -0,0 +1,50 @@
+import pytest
+
+from features.form_engine import FormEngine
+
+# The fetch_team_results query FormEngine replaces, without the result filters
+FORM_SQL = """
+WITH RankedGames AS (
+    SELECT TEAM_ID, POINTS,
+           ROW_NUMBER() OVER (PARTITION BY TEAM_ID ORDER BY GAME_NUMBER DESC) AS game_rank
+    FROM FACT_TEAM_MATCH
+)
+SELECT RG.TEAM_ID AS team_id,
+       COUNT(*) AS games,
+       SUM(CASE WHEN POINTS = 3 THEN 1 ELSE 0 END) AS total_wins,
+       SUM(CASE WHEN POINTS = 0 THEN 1 ELSE 0 END) AS total_losses,
+       SUM(CASE WHEN POINTS = 1 THEN 1 ELSE 0 END) AS total_draws
+FROM RankedGames RG
+WHERE game_rank <= ?
+GROUP BY RG.TEAM_ID
+HAVING COUNT(*) >= ?
+"""
+
+
+@pytest.fixture(scope="module")
+def engine(tables):
+    return FormEngine(tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"])
+
+
+@pytest.mark.parametrize("num_games", [1, 5, 10, 38, 114, 500])
+def test_query_matches_sql(engine, sql, num_games):
+    expected = sql(FORM_SQL, [num_games, num_games]).sort_values("team_id").reset_index(drop=True)
+    actual = engine.query(num_games).sort_values("team_id").reset_index(drop=True)
+
+    assert actual["team_id"].tolist() == expected["team_id"].tolist()
+    for column in ["games", "total_wins", "total_losses", "total_draws"]:
+        assert actual[column].astype(int).tolist() == expected[column].astype(int).tolist(), column
+
+
+def test_query_filters_and_sorts(engine):
+    result = engine.query(10, min_wins=4, min_losses=2)
+    assert (result["total_wins"] >= 4).all() and (result["total_losses"] >= 2).all()
+    assert result["total_wins"].is_monotonic_decreasing
+    assert not engine.query(10, min_wins=11).shape[0]
+
+
+def test_names_come_from_dim_teams(engine, tables):
+    names = tables["DIM_TEAMS"].set_index("TEAM_ID")
+    result = engine.query(5)
+    assert (result["team_name"].to_numpy() == names.loc[result["team_id"], "TEAM_NAME"].to_numpy()).all()
+    assert (result["league_name"].to_numpy() == names.loc[result["team_id"], "LEAGUE_NAME"].to_numpy()).all()
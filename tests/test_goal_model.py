@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.goal_model import GoalModel, HOME, AWAY, MAX_GOALS, RHO_GRID
+
+
+def _games(tables):
+    facts = tables["FACT_TEAM_MATCH"].dropna(subset=["SCORED"])
+    home = facts[facts["GAMEROLE"] == HOME]
+    away = facts[facts["GAMEROLE"] == AWAY]
+    games = home.merge(away[["GAME_ID", "TEAM_ID", "SCORED"]], on="GAME_ID", suffixes=("_HOME", "_AWAY"))
+    leagues = tables["DIM_TEAMS"].drop_duplicates("TEAM_ID").set_index("TEAM_ID")["LEAGUE_NAME"]
+    return games.assign(LEAGUE_NAME=games["TEAM_ID_HOME"].map(leagues)).dropna(subset=["LEAGUE_NAME"])
+
+
+def reference_fit(games, half_life):
+    """
+    Weighted Poisson maximum likelihood by iteratively reweighted least squares, one league at a time.
+
+    Returns {league: (base, home_advantage, {TEAM_ID: attack}, {TEAM_ID: defence})}, with strengths
+    averaging zero within the league like GoalModel's.
+    """
+    fits = {}
+    for league, g in games.groupby("LEAGUE_NAME"):
+        teams = np.unique(np.concatenate([g["TEAM_ID_HOME"], g["TEAM_ID_AWAY"]]))
+        col = {team: i for i, team in enumerate(teams)}
+        n, k = len(g), len(teams)
+        h = g["TEAM_ID_HOME"].map(col).to_numpy()
+        a = g["TEAM_ID_AWAY"].map(col).to_numpy()
+
+        # Columns: base, home advantage, attack per team, defence per team; one row per side of each game
+        design = np.zeros((2 * n, 2 + 2 * k))
+        design[:, 0] = 1
+        design[:n, 1] = 1
+        design[np.arange(n), 2 + h] = 1
+        design[np.arange(n), 2 + k + a] = -1
+        design[n + np.arange(n), 2 + a] = 1
+        design[n + np.arange(n), 2 + k + h] = -1
+        # Dropping the first team's attack and defence fixes the scale; centring happens afterwards
+        design = np.delete(design, [2, 2 + k], axis=1)
+
+        goals = np.concatenate([g["SCORED_HOME"], g["SCORED_AWAY"]]).astype(float)
+        day = pd.to_datetime(g["PLAYED_ON"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        w = 0.5 ** ((day.max() - day) / half_life) if half_life else np.ones(n)
+        w = np.concatenate([w, w])
+
+        beta = np.zeros(design.shape[1])
+        beta[0] = np.log(goals.mean())
+        for _ in range(100):
+            rate = np.exp(design @ beta)
+            z = design @ beta + (goals - rate) / rate
+            sw = np.sqrt(w * rate)
+            step = np.linalg.lstsq(design * sw[:, None], z * sw, rcond=None)[0]
+            done = np.max(np.abs(step - beta)) < 1e-12
+            beta = step
+            if done:
+                break
+
+        attack = np.concatenate([[0.0], beta[2:1 + k]])
+        defence = np.concatenate([[0.0], beta[1 + k:]])
+        base = beta[0] + attack.mean() - defence.mean()
+        fits[league] = (base, beta[1], dict(zip(teams, attack - attack.mean())),
+                        dict(zip(teams, defence - defence.mean())))
+    return fits
+
+
+@pytest.mark.parametrize("half_life", [None, 365])
+def test_fit_matches_maximum_likelihood(tables, half_life):
+    # Without the prior the fit is the plain Poisson MLE, which every block has to reach
+    model = GoalModel(tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"], half_life=half_life, prior=0.0)
+    for league, (base, home_advantage, attack, defence) in reference_fit(_games(tables), half_life).items():
+        code = np.flatnonzero(model.league_names == league)[0]
+        assert model.base[code] == pytest.approx(base, abs=1e-5)
+        assert model.home_advantage[code] == pytest.approx(home_advantage, abs=1e-5)
+        rows = [model.row(team) for team in attack]
+        np.testing.assert_allclose(model.attack[rows], list(attack.values()), atol=1e-5)
+        np.testing.assert_allclose(model.defence[rows], list(defence.values()), atol=1e-5)
+
+
+def test_prior_shrinks_strengths(tables):
+    plain = GoalModel(tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"], prior=0.0)
+    shrunk = GoalModel(tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"], prior=20.0)
+    assert np.abs(shrunk.attack).sum() < np.abs(plain.attack).sum()
+    assert np.abs(shrunk.defence).sum() < np.abs(plain.defence).sum()
+
+
+def test_predictions_are_distributions(tables):
+    model = GoalModel(tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"])
+    assert set(model.rho) <= set(RHO_GRID)
+    names = tables["DIM_TEAMS"]["TEAM_NAME"].to_numpy()
+    for home, away in zip(names[:6], names[1:7]):
+        prediction = model.predict(home, away)
+        assert prediction["scores"].shape == (MAX_GOALS + 1, MAX_GOALS + 1)
+        assert (prediction["scores"] >= 0).all()
+        assert prediction["scores"].sum() == pytest.approx(1.0)
+        assert prediction["home_win"] + prediction["draw"] + prediction["away_win"] == pytest.approx(1.0)
+        assert (prediction["home_goals"], prediction["away_goals"]) == model.expected_goals(home, away)
+    assert model.predict("No Such Team", names[0]) is None
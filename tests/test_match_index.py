@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.match_index import MatchIndex, HOME, AWAY
+
+# The get_team_stats self-join MatchIndex replaces
+TEAM_STATS_SQL = """
+WITH RankedMatches AS (
+    SELECT FTM.GAME_ID, FTM.PLAYED_ON AS match_date, FTM.GAMEROLE AS team_role,
+           FTM.SCORED AS goals_scored, FTM.CONCEEDED AS goals_conceded,
+           ROW_NUMBER() OVER (PARTITION BY FTM.TEAM_ID ORDER BY FTM.PLAYED_ON DESC) AS game_rank
+    FROM FACT_TEAM_MATCH FTM
+    JOIN DIM_TEAMS DT ON FTM.TEAM_ID = DT.TEAM_ID
+    WHERE DT.TEAM_NAME = ? AND FTM.GAMEROLE = ?
+)
+SELECT RM.match_date, RM.team_role, RM.goals_scored, RM.goals_conceded, Opponent.TEAM_NAME AS opponent
+FROM RankedMatches RM
+JOIN FACT_TEAM_MATCH OpponentMatch ON RM.GAME_ID = OpponentMatch.GAME_ID
+JOIN DIM_TEAMS Opponent ON OpponentMatch.TEAM_ID = Opponent.TEAM_ID
+WHERE OpponentMatch.GAMEROLE != RM.team_role AND game_rank <= ?
+ORDER BY match_date DESC
+"""
+
+
+@pytest.fixture(scope="module")
+def index(tables):
+    return MatchIndex(tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"])
+
+
+def _normalized(df):
+    df = df[["match_date", "team_role", "goals_scored", "goals_conceded", "opponent"]].copy()
+    df["match_date"] = pd.to_datetime(df["match_date"])
+    df[["team_role", "goals_scored", "goals_conceded"]] = df[["team_role", "goals_scored", "goals_conceded"]].astype(int)
+    df["opponent"] = df["opponent"].astype(str)
+    return df.sort_values(["match_date", "opponent"], ascending=[False, True]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("role", [HOME, AWAY])
+@pytest.mark.parametrize("num_games", [1, 5, 19, "All"])
+def test_history_matches_sql(index, tables, sql, role, num_games):
+    for team in tables["DIM_TEAMS"]["TEAM_NAME"].iloc[::7]:
+        limit = 10 ** 6 if num_games == "All" else num_games
+        expected = _normalized(sql(TEAM_STATS_SQL, [team, role, limit]))
+        actual = _normalized(index.history(team, role, num_games))
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_history_of_unknown_team_is_empty(index):
+    assert index.history("No Such Team", HOME, 5).empty
+
+
+@pytest.mark.parametrize("num_games", [3, 10, None])
+def test_averages_match_history_means(index, tables, num_games):
+    teams = tables["DIM_TEAMS"]
+    scored, conceded = index.averages(teams["TEAM_ID"].to_numpy(), AWAY, num_games)
+    for position, team in enumerate(teams["TEAM_NAME"]):
+        history = index.history(team, AWAY, num_games)
+        assert scored[position] == pytest.approx(history["goals_scored"].mean())
+        assert conceded[position] == pytest.approx(history["goals_conceded"].mean())
+
+
+def test_averages_are_nan_without_games(index):
+    scored, conceded = index.averages([-1], HOME, 5)
+    assert np.isnan(scored[0]) and np.isnan(conceded[0])
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.player_index import NAME_COLUMNS, PlayerIndex
+
+COLUMNS = ["player_name", "team_name", "country_name", "league_name", "total_minutesplayed", "total_goals",
+           "total_assists", "goal_contributions"]
+
+
+def baseline(agg_player, country, league, team):
+    """The mask-and-fillna filter get_player_stats ran on every rerun before the index."""
+    mask = (agg_player["COUNTRY_NAME"] == country) & (agg_player["LEAGUE_NAME"] == league)
+    if team:
+        mask &= agg_player["TEAM_NAME"] == team
+    df = agg_player.loc[mask, ["PLAYER_NAME", "TEAM_NAME", "COUNTRY_NAME", "LEAGUE_NAME",
+                               "TOTAL_MINUTESPLAYED", "TOTAL_GOALS", "TOTAL_ASSISTS"]]
+    df.columns = df.columns.str.lower()
+    df = df.fillna(0)
+    df["goal_contributions"] = df["total_goals"] + df["total_assists"]
+    return df[df["goal_contributions"] > 0]
+
+
+def assert_same_players(actual, expected):
+    def normalized(df):
+        df = df[COLUMNS].astype({column.lower(): str for column in NAME_COLUMNS})
+        return df.sort_values(COLUMNS).reset_index(drop=True)
+    pd.testing.assert_frame_equal(normalized(actual), normalized(expected), check_dtype=False)
+
+
+@pytest.fixture(scope="module")
+def agg_player(sql):
+    # Snapshot dtypes, with a few missing totals the index has to fill like the baseline did
+    df = sql("SELECT * FROM agg_player").astype({"TOTAL_MINUTESPLAYED": float, "TOTAL_GOALS": float,
+                                                 "TOTAL_ASSISTS": float})
+    df.loc[df.index[::7], "TOTAL_ASSISTS"] = np.nan
+    df.loc[df.index[::11], "TOTAL_MINUTESPLAYED"] = np.nan
+    return df
+
+
+@pytest.fixture(scope="module")
+def index(agg_player):
+    return PlayerIndex(agg_player)
+
+
+def test_league_and_team_selections_match_the_baseline(index, agg_player):
+    for (country, league), teams in agg_player.groupby(["COUNTRY_NAME", "LEAGUE_NAME"])["TEAM_NAME"]:
+        assert_same_players(index.select(country, league, ""), baseline(agg_player, country, league, ""))
+        for team in teams.unique()[:3]:
+            assert_same_players(index.select(country, league, team), baseline(agg_player, country, league, team))
+
+
+def test_all_leagues_selects_every_contributor(index, agg_player):
+    expected = pd.concat([
+        baseline(agg_player, country, league, "")
+        for country, league in agg_player[["COUNTRY_NAME", "LEAGUE_NAME"]].drop_duplicates().itertuples(index=False)
+    ])
+    assert_same_players(index.select(), expected)
+    assert_same_players(index.select("All", "All", ""), expected)
+    assert len(index) == len(expected)
+
+
+def test_unknown_selection_is_empty(index, agg_player):
+    country, league = agg_player[["COUNTRY_NAME", "LEAGUE_NAME"]].iloc[0]
+    assert index.select(country, "No League", "").empty
+    assert index.select(country, league, "No Team").empty
+    assert list(index.select(country, "No League", "").columns) == COLUMNS
+
+
+def test_unused_categories_are_dropped(index, agg_player):
+    contributors = agg_player[agg_player["TOTAL_GOALS"].fillna(0) + agg_player["TOTAL_ASSISTS"].fillna(0) > 0]
+    country, league, team = contributors[["COUNTRY_NAME", "LEAGUE_NAME", "TEAM_NAME"]].iloc[0]
+    selected = index.select(country, league, team)
+    assert list(selected["team_name"].cat.categories) == [team]
+    assert list(selected["league_name"].cat.categories) == [league]
+    assert selected["total_goals"].dtype == np.float32
@@ -0,0 +1,174 @@
+import time
+
+import pytest
+
+from warehouse import pool as pool_module
+from warehouse.pool import ConnectionPool, PoolExhausted
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        if self.connection.closed or not self.connection.healthy:
+            raise RuntimeError("Session expired")
+        self.connection.queries.append(query)
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.healthy = True
+        self.closed = False
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnector:
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        self.opened.append(FakeConnection(len(self.opened)))
+        return self.opened[-1]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(pool_module, "time", clock)
+    return clock
+
+
+def make_pool(**options):
+    options = {"size": 2, "evict_every": None, **options}
+    connector = FakeConnector()
+    return ConnectionPool(connector, **options), connector
+
+
+def test_connections_are_reused():
+    pool, connector = make_pool()
+    for _ in range(3):
+        with pool.connection() as conn:
+            conn.cursor().execute("SELECT 2")
+    assert len(connector.opened) == 1
+    metrics = pool.metrics()
+    assert (metrics["checkouts"], metrics["connects"], metrics["reuses"]) == (3, 1, 2)
+
+
+def test_checkout_times_out_when_exhausted():
+    pool, _ = make_pool(size=1, checkout_timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolExhausted):
+            with pool.connection():
+                pass
+    assert pool.metrics()["timeouts"] == 1
+    # The slot is free again once the holder is done
+    with pool.connection():
+        pass
+
+
+def test_unhealthy_connection_is_replaced(clock):
+    pool, connector = make_pool(health_check_after=30)
+    with pool.connection():
+        pass
+    connector.opened[0].healthy = False
+
+    # Recently used connections are handed out without a ping
+    clock.now += 10
+    with pool.connection() as conn:
+        assert conn is connector.opened[0]
+
+    clock.now += 31
+    with pool.connection() as conn:
+        assert conn is connector.opened[1]
+    assert connector.opened[0].closed
+    assert connector.opened[0].queries == [] and pool.metrics()["failed_health_checks"] == 1
+
+
+@pytest.mark.parametrize("max_idle, max_lifetime, advance, counter", [
+    (300, 3600, 301, "evicted_idle"),
+    (10 ** 6, 3600, 3601, "evicted_expired"),
+])
+def test_stale_connections_are_evicted_on_checkout(clock, max_idle, max_lifetime, advance, counter):
+    pool, connector = make_pool(max_idle=max_idle, max_lifetime=max_lifetime, health_check_after=10 ** 6)
+    with pool.connection():
+        pass
+    clock.now += advance
+    with pool.connection() as conn:
+        assert conn is connector.opened[1]
+    assert connector.opened[0].closed and pool.metrics()[counter] == 1
+
+
+def test_evict_idle_closes_only_stale_connections(clock):
+    pool, connector = make_pool(max_idle=300, max_lifetime=3600)
+    with pool.connection(), pool.connection():
+        pass
+    clock.now += 200
+    with pool.connection():
+        pass  # refreshes one of the two
+    clock.now += 200
+    assert pool.evict_idle() == 1
+    assert [conn.closed for conn in connector.opened].count(True) == 1
+    assert pool.metrics()["idle"] == 1
+
+
+def test_reaper_evicts_without_checkouts():
+    pool, connector = make_pool(max_idle=0.05, evict_every=0.02)
+    try:
+        with pool.connection():
+            pass
+        deadline = time.monotonic() + 5
+        while not connector.opened[0].closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert connector.opened[0].closed and pool.metrics()["evicted_idle"] == 1
+    finally:
+        pool.close()
+
+
+def test_connection_failing_in_use_is_discarded():
+    pool, connector = make_pool(size=1, checkout_timeout=0.05)
+    with pytest.raises(ValueError):
+        with pool.connection():
+            raise ValueError("query failed")
+    assert connector.opened[0].closed and pool.metrics()["discarded"] == 1
+
+    # The slot was released: the next checkout opens a fresh connection
+    with pool.connection() as conn:
+        assert conn is connector.opened[1]
+    with pool.connection() as conn:
+        assert conn is connector.opened[1]
+
+
+def test_close_closes_idle_and_refuses_checkouts():
+    pool, connector = make_pool()
+    with pool.connection():
+        pass
+    pool.close()
+    assert connector.opened[0].closed
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            pass
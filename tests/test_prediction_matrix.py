@@ -0,0 +1,140 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.match_index import MatchIndex, HOME, AWAY
+from features.prediction_matrix import COLUMNS, WINDOWS, PredictionMatrices, PredictionStore
+
+VERSION = "2024-05-01@1714600000"
+
+
+def pandas_averages(tables, role, num_games):
+    """Mean SCORED and CONCEEDED over each team's latest `num_games` games in `role`, by TEAM_ID."""
+    facts = tables["FACT_TEAM_MATCH"].dropna(subset=["SCORED"])
+    facts = facts[facts["GAMEROLE"] == role].sort_values("PLAYED_ON", ascending=False, kind="stable")
+    if num_games != "All":
+        facts = facts.groupby("TEAM_ID", sort=False).head(num_games)
+    return facts.groupby("TEAM_ID")[["SCORED", "CONCEEDED"]].mean()
+
+
+@pytest.fixture(scope="module")
+def store(tables, tmp_path_factory):
+    store = PredictionStore(str(tmp_path_factory.mktemp("predictions")))
+    store.build(VERSION, tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"])
+    return store
+
+
+@pytest.mark.parametrize("window", list(WINDOWS))
+def test_matrices_match_pandas_averages(tables, store, window):
+    num_games = WINDOWS[window]
+    home, away = pandas_averages(tables, HOME, num_games), pandas_averages(tables, AWAY, num_games)
+    ids = tables["DIM_TEAMS"].drop_duplicates("TEAM_ID").set_index("TEAM_NAME")["TEAM_ID"]
+
+    matrices = PredictionMatrices(store.load(VERSION))
+    actual = matrices.frame(num_games)
+    h = home.reindex(ids[actual["Home Team"]].to_numpy())
+    a = away.reindex(ids[actual["Away Team"]].to_numpy())
+    expected = pd.DataFrame({
+        "Generic Home Goals": h["SCORED"].to_numpy(),
+        "Generic Away Goals": a["SCORED"].to_numpy(),
+        "Weighted Home Goals": 0.7 * h["SCORED"].to_numpy() + 0.3 * a["CONCEEDED"].to_numpy(),
+        "Weighted Away Goals": 0.6 * a["SCORED"].to_numpy() + 0.4 * h["CONCEEDED"].to_numpy(),
+    })
+    # Stored as float32 and rounded to two places
+    np.testing.assert_allclose(actual[COLUMNS].to_numpy(), expected.to_numpy(), atol=0.006)
+
+    teams = tables["DIM_TEAMS"].drop_duplicates("TEAM_ID").dropna(subset=["LEAGUE_NAME"])
+    pairs = sum(n * (n - 1) for n in teams.groupby("LEAGUE_NAME").size())
+    assert len(actual) == pairs
+
+
+def test_lookup_matches_frame(store):
+    matrices = PredictionMatrices(store.load(VERSION))
+    frame = matrices.frame("All")
+    for row in frame.iloc[::97].itertuples(index=False):
+        prediction = matrices.predict(row[0], row[1])
+        assert [round(prediction[column], 2) for column in COLUMNS] == pytest.approx(list(row[2:]))
+    league_a, league_b = list(matrices.leagues)[:2]
+    assert matrices.predict(matrices.leagues[league_a].teams[0], matrices.leagues[league_b].teams[0]) is None
+
+
+def test_concurrent_builds_write_once(tables, tmp_path, monkeypatch):
+    builds = []
+    original = MatchIndex.__init__
+
+    def counting(self, *args, **kwargs):
+        builds.append(threading.get_ident())
+        original(self, *args, **kwargs)
+
+    monkeypatch.setattr(MatchIndex, "__init__", counting)
+    store = PredictionStore(str(tmp_path))
+    results, errors = [], []
+
+    def build_and_load():
+        try:
+            store.build(VERSION, tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"])
+            results.append(PredictionMatrices(store.load(VERSION)).frame("All"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=build_and_load) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors and len(builds) == 1
+    for frame in results[1:]:
+        pd.testing.assert_frame_equal(frame, results[0])
+
+
+def test_prune_keeps_newer_versions(tables, tmp_path):
+    store = PredictionStore(str(tmp_path))
+    old, current, new = "2024-04-01@1712000000", VERSION, "2024-06-01@1717200000"
+    for version in (new, old, current):
+        store.build(version, tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"])
+
+    # Building `current` after `new` landed removed only `old`
+    assert not store.has(old) and store.has(current) and store.has(new)
+    store.prune(new)
+    assert not store.has(current) and store.has(new)
+    assert sorted(os.listdir(tmp_path)) == sorted([PredictionStore.LOCK_FILE, new])
+
+
+def test_load_or_build_reads_once_and_survives_a_concurrent_prune(tables, tmp_path):
+    store = PredictionStore(str(tmp_path))
+    old, new = "2024-04-01@1712000000", VERSION
+    reads, errors = [], []
+
+    def read(table):
+        reads.append(table)
+        return tables[table]
+
+    def load_old():
+        try:
+            assert store.load_or_build(old, read)
+        except Exception as e:
+            errors.append(e)
+
+    def build_new():
+        try:
+            # Prunes `old` whenever it gets the lock between two loads of it
+            PredictionStore(str(tmp_path)).build(new, tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load_old) for _ in range(4)] + [threading.Thread(target=build_new)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    # Once built, a version is loaded without reading the snapshot again
+    store.load_or_build(new, read)
+    reads.clear()
+    matrices = PredictionMatrices(store.load_or_build(new, read))
+    assert reads == [] and len(matrices.frame("All"))
@@ -0,0 +1,143 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from warehouse.prefetch import Prefetcher
+
+
+@pytest.fixture
+def gate():
+    """A job that blocks the worker until the test opens the gate."""
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        assert release.wait(10)
+        return "blocked"
+
+    job.started, job.release = started, release
+    yield job
+    release.set()
+
+
+def test_result_is_picked_up_with_get():
+    prefetcher = Prefetcher()
+    assert prefetcher.submit("a", lambda: 1)
+    prefetcher.wait(10)
+    assert prefetcher.get("a") == 1 and prefetcher.get("b", "missing") == "missing"
+    stats = prefetcher.stats()
+    assert (stats["submitted"], stats["completed"], stats["hits"], stats["misses"]) == (1, 1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_known_keys_are_not_submitted_twice(gate):
+    prefetcher = Prefetcher()
+    assert prefetcher.submit("running", gate)
+    gate.started.wait(10)
+    assert prefetcher.submit("queued", lambda: 1)
+    assert not prefetcher.submit("running", lambda: 2) and not prefetcher.submit("queued", lambda: 2)
+    gate.release.set()
+    prefetcher.wait(10)
+    assert not prefetcher.submit("queued", lambda: 2)
+    assert prefetcher.get("running") == "blocked" and prefetcher.get("queued") == 1
+
+
+def test_full_queue_drops_the_job(gate):
+    prefetcher = Prefetcher(max_queue=2)
+    prefetcher.submit("running", gate)
+    gate.started.wait(10)
+    assert prefetcher.submit("a", lambda: 1) and prefetcher.submit("b", lambda: 2)
+    assert not prefetcher.submit("c", lambda: 3)
+    gate.release.set()
+    prefetcher.wait(10)
+    assert prefetcher.stats()["dropped"] == 1 and prefetcher.get("c") is None
+
+
+def test_cancel_stops_queued_jobs_and_discards_running_ones(gate):
+    prefetcher = Prefetcher()
+    ran = []
+    prefetcher.submit(("standings", "Scotland"), gate)
+    gate.started.wait(10)
+    prefetcher.submit(("standings", "England"), lambda: ran.append("England"))
+    prefetcher.submit(("players", "England"), lambda: "kept")
+
+    assert prefetcher.cancel(lambda key: key[0] == "standings") == 2
+    gate.release.set()
+    prefetcher.wait(10)
+
+    assert ran == []
+    assert prefetcher.get(("standings", "Scotland")) is None
+    assert prefetcher.get(("players", "England")) == "kept"
+    assert prefetcher.stats()["cancelled"] == 2 and prefetcher.stats()["pending"] == 0
+    # A cancelled key can be submitted again
+    assert prefetcher.submit(("standings", "Scotland"), lambda: "again")
+
+
+def test_cancel_drops_finished_results():
+    prefetcher = Prefetcher()
+    prefetcher.submit("read", lambda: 1)
+    prefetcher.submit("unread", lambda: 2)
+    prefetcher.wait(10)
+    prefetcher.get("read")
+
+    assert prefetcher.cancel(lambda key: True) == 0
+    stats = prefetcher.stats()
+    assert stats["cached"] == 0 and stats["wasted"] == 1
+    assert prefetcher.get("read") is None
+
+
+def test_least_recently_used_results_are_evicted():
+    prefetcher = Prefetcher(max_results=2)
+    for key in "abc":
+        prefetcher.submit(key, lambda key=key: key)
+        prefetcher.wait(10)
+        if key == "a":
+            prefetcher.get("a")
+
+    # "a" was read before it was evicted; "b" goes next without ever being read
+    assert prefetcher.get("a") is None and prefetcher.stats()["wasted"] == 0
+    prefetcher.get("b")
+    prefetcher.submit("d", lambda: "d")
+    prefetcher.wait(10)
+    assert prefetcher.get("c") is None and prefetcher.stats()["wasted"] == 1
+    assert prefetcher.get("b") == "b" and prefetcher.get("d") == "d"
+
+
+def test_failed_job_is_counted_and_can_be_retried():
+    prefetcher = Prefetcher()
+
+    def fail():
+        raise RuntimeError("warehouse down")
+
+    prefetcher.submit("a", fail)
+    prefetcher.wait(10)
+    assert prefetcher.stats()["failed"] == 1 and prefetcher.get("a") is None
+    assert prefetcher.submit("a", lambda: 1)
+
+
+def test_country_standings_are_read_from_the_snapshot_and_picked_up(sql, tmp_path, monkeypatch):
+    pytest.importorskip("duckdb")
+    from features import leagueTables
+    from warehouse.snapshot import TABLES, SnapshotStore
+
+    store = SnapshotStore(str(tmp_path), lambda query, params, dtypes: sql(query, params),
+                          tables={"agg_league": TABLES["agg_league"]})
+    store.refresh()
+    version = store.version()
+    agg_league = sql("SELECT * FROM agg_league")
+    leagues = sorted(agg_league["FORMAL_LEAGUE_NAME"].unique())
+
+    standings = leagueTables.read_country_standings(store, version, leagues[:1])
+    assert list(standings) == leagues[:1]
+    expected = leagueTables.format_standings(agg_league[agg_league["FORMAL_LEAGUE_NAME"] == leagues[0]])
+    pd.testing.assert_frame_equal(standings[leagues[0]], expected, check_dtype=False)
+
+    # get_league_table serves the prefetched table instead of reading the snapshot again
+    prefetcher = Prefetcher()
+    prefetcher.submit(leagueTables.prefetch_key(version, "Ardenia"), lambda: standings)
+    prefetcher.wait(10)
+    monkeypatch.setattr(leagueTables, "get_prefetcher", lambda: prefetcher)
+    monkeypatch.setattr(leagueTables, "refresh_snapshot", lambda: version)
+    monkeypatch.setattr(leagueTables, "load_table", lambda table: pytest.fail("read the snapshot again"))
+    assert leagueTables.get_league_table(leagues[0], country="Ardenia") is standings[leagues[0]]
@@ -0,0 +1,61 @@
+import pytest
+
+from warehouse.query import Query, cache_key, canonical_params, canonical_sql
+
+
+def test_build_orders_predicates_and_binds_parameters():
+    template, params = (Query("agg_player", ["player_name", "TOTAL_GOALS"], distinct=True)
+                        .where_in("TEAM_NAME", ["Celtic", "Aberdeen", "Celtic"])
+                        .where("COUNTRY_NAME", "Scotland")
+                        .where("TOTAL_GOALS", 5, op=">=")
+                        .order_by("total_goals")
+                        .limit(10)
+                        .build())
+    assert template == ("SELECT DISTINCT PLAYER_NAME, TOTAL_GOALS FROM AGG_PLAYER "
+                        "WHERE COUNTRY_NAME = ? AND TEAM_NAME IN (?, ?) AND TOTAL_GOALS >= ? "
+                        "ORDER BY TOTAL_GOALS LIMIT 10")
+    assert params == ("Scotland", "Aberdeen", "Celtic", 5)
+
+
+def test_build_is_independent_of_call_order():
+    first = Query("agg_player").where("COUNTRY_NAME", "Scotland").where_in("TEAM_NAME", ["b", "a"]).build()
+    second = Query("agg_player").where_in("TEAM_NAME", ["a", "b"]).where("COUNTRY_NAME", "Scotland").build()
+    assert first == second
+    assert Query("DIM_TEAMS").build() == ("SELECT * FROM DIM_TEAMS", ())
+
+
+def test_conflicting_predicates_raise():
+    query = Query("agg_player").where("COUNTRY_NAME", "Scotland").where("COUNTRY_NAME", "Scotland")
+    with pytest.raises(ValueError, match="COUNTRY_NAME"):
+        query.where("country_name", "England")
+    with pytest.raises(ValueError):
+        Query("agg_player").where_in("TEAM_NAME", ["a"]).where_in("TEAM_NAME", ["b"])
+    # A different operator on the same column is a separate predicate
+    template, params = Query("FACT").where("PLAYED_ON", "2024-01-01", ">=").where("PLAYED_ON", "2024-06-30", "<").build()
+    assert template.endswith("WHERE PLAYED_ON < ? AND PLAYED_ON >= ?") and params == ("2024-06-30", "2024-01-01")
+
+
+def test_invalid_predicates_raise():
+    with pytest.raises(ValueError):
+        Query("agg_player").where("COUNTRY_NAME", "Scotland", op="LIKE")
+    with pytest.raises(ValueError):
+        Query("agg_player").where_in("TEAM_NAME", [])
+
+
+def test_canonical_sql_collapses_whitespace_outside_quotes():
+    assert canonical_sql("  SELECT *\n\tFROM  agg_league ;\n") == "SELECT * FROM agg_league"
+    assert (canonical_sql("SELECT  x FROM t WHERE name = 'St  Johnstone'\n AND \"Team  Name\" = 'It''s  here';")
+            == "SELECT x FROM t WHERE name = 'St  Johnstone' AND \"Team  Name\" = 'It''s  here'")
+
+
+def test_canonical_params():
+    assert canonical_params(None) == ()
+    assert canonical_params(["a", 1]) == ("a", 1)
+
+
+def test_cache_key():
+    key = cache_key("SELECT * FROM t WHERE a = ?", ["x"])
+    assert key == cache_key("SELECT *\n  FROM t WHERE a = ?;", ("x",))
+    assert key != cache_key("SELECT * FROM t WHERE a = ?", ["y"])
+    # Whitespace inside a literal is part of the statement
+    assert cache_key("SELECT * FROM t WHERE a = 'St  Mirren'") != cache_key("SELECT * FROM t WHERE a = 'St Mirren'")
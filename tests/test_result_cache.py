@@ -0,0 +1,143 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+from warehouse import result_cache
+from warehouse.result_cache import ResultCache, frame_bytes
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen time.time() for expiry tests; advance with clock[0] += seconds."""
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_evicts_least_recently_used(frame):
+    frames = {key: frame(key) for key in range(4)}
+    cache = ResultCache(max_bytes=3 * frame_bytes(frames[0]) + 100)
+    for key in range(3):
+        cache.put(key, frames[key])
+    cache.get(0, lambda: pytest.fail("cached"))
+    cache.put(3, frames[3])
+
+    # 1 was used least recently once 0 was read again
+    assert set(cache._entries) == {0, 2, 3}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_accounting(frame):
+    frames = [frame(seed, rows) for seed, rows in enumerate([10, 1000, 5000])]
+    cache = ResultCache(max_bytes=10 ** 9)
+    for key, df in enumerate(frames):
+        cache.put(key, df)
+    cache.put(1, frames[0])
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["bytes"] == 2 * frame_bytes(frames[0]) + frame_bytes(frames[2])
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
+
+
+def test_oversized_entries_are_returned_but_not_kept(frame):
+    df = frame(0)
+    cache = ResultCache(max_bytes=frame_bytes(df) - 1)
+    assert cache.get("big", lambda: df).equals(df)
+    assert cache.stats()["entries"] == 0 and cache.stats()["oversized"] == 1
+
+
+def test_expired_entries_are_reloaded(clock, frame):
+    cache = ResultCache(ttl=60)
+    cache.put("a", frame(0))
+    cache.put("b", frame(1), ttl=None)
+    clock[0] += 61
+    assert cache.get("a", lambda: frame(2)).equals(frame(2))
+    assert cache.get("b", lambda: pytest.fail("never expires")).equals(frame(1))
+    assert cache.stats()["expired"] == 1
+
+
+def test_spill_round_trip(tmp_path, frame):
+    frames = {key: frame(key) for key in range(3)}
+    cache = ResultCache(max_bytes=frame_bytes(frames[0]) + 100, spill_path=str(tmp_path))
+    for key, df in frames.items():
+        cache.put(key, df)
+    assert cache.stats()["spilled_entries"] == 2
+
+    df = cache.get(0, lambda: pytest.fail("spilled"))
+    pd.testing.assert_frame_equal(df, frames[0])
+    stats = cache.stats()
+    assert stats["spill_hits"] == 1 and stats["misses"] == 0
+    # Read back and promoted: 0 is in memory again and 2 went to disk in its place
+    assert set(cache._entries) == {0} and set(cache._spilled) == {1, 2}
+
+
+def test_unspillable_entries_are_dropped(tmp_path, frame):
+    cache = ResultCache(max_bytes=frame_bytes(frame(0)) + 100, spill_path=str(tmp_path))
+    cache.put("snapshot", frame(0), spill=False)
+    cache.put("query", frame(1))
+    assert cache.stats()["spilled_entries"] == 0
+
+
+def test_spill_budget_drops_oldest_files(tmp_path, frame):
+    cache = ResultCache(max_bytes=frame_bytes(frame(0)) + 100, spill_path=str(tmp_path))
+    cache.put(0, frame(0))
+    cache.put(1, frame(1))
+    cache.spill_max_bytes = cache.stats()["spilled_bytes"] + 10
+    cache.put(2, frame(2))
+    assert set(cache._spilled) == {1} and cache.stats()["spill_evictions"] == 1
+    assert len(os.listdir(cache._spill_dir)) == 1
+
+
+def test_processes_sharing_a_spill_path_keep_their_own_files(tmp_path, frame):
+    spill_path = str(tmp_path)
+    first = ResultCache(max_bytes=frame_bytes(frame(0)) + 100, spill_path=spill_path)
+    first.put("key", frame(0))
+    first.put("other", frame(1))
+
+    # A second cache on the same path, with entries under the same keys
+    second = ResultCache(max_bytes=frame_bytes(frame(0)) + 100, spill_path=spill_path)
+    second.put("key", frame(2))
+    second.put("other", frame(3))
+
+    pd.testing.assert_frame_equal(first.get("key", lambda: pytest.fail("spilled")), frame(0))
+    pd.testing.assert_frame_equal(second.get("key", lambda: pytest.fail("spilled")), frame(2))
+
+
+def test_directories_of_exited_processes_are_removed(tmp_path):
+    # The child exits without its atexit cleanup, as a killed server process would
+    script = ("import os, sys; from warehouse.result_cache import ResultCache; "
+              "print(ResultCache(spill_path=sys.argv[1])._spill_dir, flush=True); os._exit(0)")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    orphan = subprocess.run([sys.executable, "-c", script, str(tmp_path)], cwd=root,
+                            capture_output=True, text=True, check=True).stdout.strip()
+    assert os.path.isdir(orphan)
+
+    cache = ResultCache(spill_path=str(tmp_path))
+    assert not os.path.exists(orphan) and not os.path.exists(f"{orphan}.lock")
+    assert os.path.isdir(cache._spill_dir)
+
+
+def test_concurrent_misses_load_once(frame):
+    cache = ResultCache()
+    calls = []
+    started = threading.Event()
+
+    def load():
+        calls.append(1)
+        started.wait(1)
+        return frame(0)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("key", load))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and len(results) == 8
+    assert all(df.equals(results[0]) for df in results)
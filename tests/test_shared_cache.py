@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from warehouse.shared_cache import SharedCache
+
+
+def slow_load(log, df):
+    # Appends are atomic for short lines, so every process's load shows up once
+    with open(log, "a") as f:
+        f.write(f"{os.getpid()}\n")
+    time.sleep(0.3)
+    return df
+
+
+def worker(path, log, barrier, results, slot, expected):
+    cache = SharedCache(path)
+    barrier.wait()
+    df = cache.get("table", "v1", lambda: slow_load(log, expected))
+    results[slot] = df.equals(expected)
+
+
+def test_concurrent_threads_load_once(tmp_path, frame):
+    cache = SharedCache(str(tmp_path / "cache"))
+    log = str(tmp_path / "loads")
+    barrier = threading.Barrier(8)
+    results = [None] * 8
+
+    def run(slot):
+        barrier.wait()
+        results[slot] = cache.get("table", "v1", lambda: slow_load(log, frame()))
+
+    threads = [threading.Thread(target=run, args=(slot,)) for slot in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(open(log).read().split()) == 1
+    for df in results:
+        pd.testing.assert_frame_equal(df, frame())
+    stats = cache.stats()
+    assert stats["loads"] == 1 and stats["waits"] + stats["hits"] == 7 and stats["entries"] == 1
+
+
+def test_concurrent_processes_load_once(tmp_path, frame):
+    context = multiprocessing.get_context("spawn")
+    path, log = str(tmp_path / "cache"), str(tmp_path / "loads")
+    with context.Manager() as manager:
+        results = manager.dict()
+        barrier = context.Barrier(4)
+        processes = [context.Process(target=worker, args=(path, log, barrier, results, slot, frame()))
+                     for slot in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+        assert [process.exitcode for process in processes] == [0] * 4
+        assert dict(results) == {slot: True for slot in range(4)}
+    assert len(open(log).read().split()) == 1
+
+
+def test_mapped_frames_can_be_modified(tmp_path, frame):
+    cache = SharedCache(str(tmp_path))
+    cache.get("table", "v1", frame)
+    df = cache.get("table", "v1", lambda: pytest.fail("published"))
+    df.loc[0, "XG"] = 100.0
+    df["NEW"] = 1
+    assert cache.get("table", "v1", lambda: pytest.fail("published")).equals(frame())
+
+
+def test_publishing_removes_only_older_generations(tmp_path, frame):
+    cache = SharedCache(str(tmp_path))
+    cache.get("snapshot-T", "b@200", lambda: frame(2), generation=200)
+    # A process that has not seen the newer version yet publishes the older one
+    cache.get("snapshot-T", "a@100", lambda: frame(1), generation=100)
+    assert cache.stats()["entries"] == 2
+    assert cache.get("snapshot-T", "b@200", lambda: pytest.fail("kept"), generation=200).equals(frame(2))
+
+    cache.get("snapshot-T", "c@300", lambda: frame(3), generation=300)
+    cache.get("snapshot-U", "a@100", lambda: frame(4), generation=100)
+    assert sorted(name.split("-g")[1].split("-")[0] for name in os.listdir(tmp_path) if name.endswith(".arrow")) == [
+        "100", "300"]
+    assert cache.get("snapshot-U", "a@100", lambda: pytest.fail("other name kept"), generation=100).equals(frame(4))
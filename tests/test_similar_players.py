@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.similar_players import FEATURES, INFO_COLUMNS, SimilarityIndex
+
+
+def brute_force(players, player_id, k, min_minutes=450):
+    """Standardize every metric with pandas, then sort all players by Euclidean distance to one of them."""
+    players = players[players["T_MINUTES_PLAYED"].fillna(0) >= min_minutes].reset_index(drop=True)
+    values = players[FEATURES].fillna(0).astype(float)
+    scale = values.std(ddof=0).replace(0, 1)
+    standardized = (values - values.mean()) / scale
+
+    row = players.index[players["PLAYER_ID"] == player_id][0]
+    distances = np.sqrt(((standardized - standardized.loc[row]) ** 2).sum(axis=1))
+    ranked = players.assign(DISTANCE=distances).drop(index=row)
+    return ranked.sort_values("DISTANCE", kind="stable").head(k).reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def players(sql):
+    df = sql("SELECT * FROM VW_PLAYER_STATS")
+    # A few missing metrics, filled with 0 by both
+    df.loc[df.index[::13], "G90"] = np.nan
+    return df
+
+
+@pytest.fixture(scope="module")
+def index(players):
+    return SimilarityIndex(players)
+
+
+def test_nearest_players_match_a_brute_force_sort(index, players):
+    eligible = players.loc[players["T_MINUTES_PLAYED"] >= 450, "PLAYER_ID"]
+    assert len(index) == len(eligible)
+
+    for player_id in eligible.iloc[::97]:
+        similar = index.similar(player_id, 10)
+        expected = brute_force(players, player_id, 10)
+        np.testing.assert_allclose(similar["DISTANCE"], expected["DISTANCE"], rtol=1e-4, atol=1e-4)
+        # Ties within float32 rounding may swap places; everything else is in the same order
+        clear = np.diff(expected["DISTANCE"].to_numpy(), prepend=-1, append=np.inf)
+        distinct = (clear[:-1] > 1e-4) & (clear[1:] > 1e-4)
+        assert (similar["PLAYER_ID"].to_numpy()[distinct] == expected["PLAYER_ID"].to_numpy()[distinct]).all()
+        assert player_id not in similar["PLAYER_ID"].tolist()
+
+
+def test_similar_returns_the_players_metrics(index, players):
+    player_id = players.loc[players["T_MINUTES_PLAYED"] >= 450, "PLAYER_ID"].iloc[0]
+    similar = index.similar(player_id, 5)
+    assert list(similar.columns) == INFO_COLUMNS + FEATURES + ["DISTANCE"]
+    source = players.set_index("PLAYER_ID").loc[similar["PLAYER_ID"]]
+    np.testing.assert_allclose(similar["T_GOALS"], source["T_GOALS"])
+    assert similar["DISTANCE"].is_monotonic_increasing
+
+
+def test_lookup_by_name_and_unknown_players(index, players):
+    eligible = players[players["T_MINUTES_PLAYED"] >= 450]
+    name = eligible["PLAYER_NAME"].iloc[0]
+    assert index.row(name) == index.row(eligible.loc[eligible["PLAYER_NAME"] == name, "PLAYER_ID"].iloc[0])
+    assert name in index.search(name[:4].upper(), limit=len(index))
+
+    benched = players.loc[players["T_MINUTES_PLAYED"] < 450, "PLAYER_ID"]
+    assert index.similar("Nobody", 5).empty
+    if len(benched):
+        assert index.similar(benched.iloc[0], 5).empty
+
+
+def test_k_is_capped_by_the_number_of_players(players):
+    small = SimilarityIndex(players[players["T_MINUTES_PLAYED"] >= 450].head(4))
+    rows, distances = small.nearest(0, 10)
+    assert len(rows) == len(distances) == 3 and 0 not in rows
+    assert len(SimilarityIndex(players.head(1).assign(T_MINUTES_PLAYED=1000.0)).similar(players["PLAYER_ID"].iloc[0])) == 0
+    assert isinstance(small.similar("Nobody"), pd.DataFrame)
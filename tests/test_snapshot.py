@@ -0,0 +1,230 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from warehouse.backends import DuckDBBackend
+from warehouse.fetch import fetch_dataframe, iter_dataframes
+from warehouse.snapshot import TABLES, SnapshotStore, VersionChanged, WATERMARK_QUERY
+
+duckdb = pytest.importorskip("duckdb")
+
+SPECS = {table: TABLES[table] for table in ["FACT_TEAM_MATCH", "DIM_TEAMS"]}
+KEY = TABLES["FACT_TEAM_MATCH"]["key"]
+
+
+class Source:
+    """DuckDB stand-in for the warehouse: `fetch` as SnapshotStore calls it, plus writes between refreshes."""
+
+    def __init__(self, path, tables):
+        self.backend = DuckDBBackend(path, read_only=False)
+        self.queries = []
+        with duckdb.connect(path) as conn:
+            for name, df in tables.items():
+                conn.register("_frame", df)
+                conn.execute(f"CREATE TABLE {name} AS SELECT * FROM _frame")
+                conn.unregister("_frame")
+
+    def __call__(self, query, params, dtypes):
+        self.queries.append(query)
+        conn = self.backend.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return fetch_dataframe(cursor, dtypes)
+        finally:
+            conn.close()
+
+    def stream(self, query, params, dtypes):
+        """`stream` as SnapshotStore calls it, in small batches so every table spans several."""
+        self.queries.append(query)
+        conn = DuckDBBackend(self.backend.path, read_only=False, batch_size=50).connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            yield from iter_dataframes(cursor, dtypes)
+        finally:
+            conn.close()
+
+    def execute(self, sql, params=None):
+        with duckdb.connect(self.backend.path) as conn:
+            conn.execute(sql, params or [])
+
+    def insert(self, name, df):
+        with duckdb.connect(self.backend.path) as conn:
+            conn.register("_frame", df)
+            conn.execute(f"INSERT INTO {name} SELECT * FROM _frame")
+
+    def table(self, name):
+        with duckdb.connect(self.backend.path) as conn:
+            return conn.execute(f"SELECT * FROM {name}").df()
+
+
+def same_rows(actual, expected):
+    def normalized(df):
+        df = df.copy()
+        df["PLAYED_ON"] = pd.to_datetime(df["PLAYED_ON"]).astype("datetime64[ns]")
+        return df.astype({column: "int64" for column in df.columns if column != "PLAYED_ON"})
+    actual, expected = normalized(actual), normalized(expected)
+    pd.testing.assert_frame_equal(actual.sort_values(KEY).reset_index(drop=True),
+                                  expected[actual.columns].sort_values(KEY).reset_index(drop=True))
+
+
+@pytest.fixture
+def source(tables, tmp_path):
+    facts = tables["FACT_TEAM_MATCH"]
+    # The first half of the season is in the warehouse when the snapshot is first pulled
+    cutoff = sorted(facts["PLAYED_ON"].unique())[len(facts["PLAYED_ON"].unique()) // 2]
+    source = Source(str(tmp_path / "source.duckdb"),
+                    {"FACT_TEAM_MATCH": facts[facts["PLAYED_ON"] <= cutoff], "DIM_TEAMS": tables["DIM_TEAMS"]})
+    source.later = facts[facts["PLAYED_ON"] > cutoff]
+    return source
+
+
+@pytest.fixture
+def store(source, tmp_path):
+    return SnapshotStore(str(tmp_path / "snapshot"), source, tables=SPECS)
+
+
+def test_initial_pull(source, store):
+    assert store.version() is None
+    pulled = store.refresh()
+    assert pulled == {"FACT_TEAM_MATCH": len(source.table("FACT_TEAM_MATCH")), "DIM_TEAMS": len(source.table("DIM_TEAMS"))}
+    same_rows(store.read("FACT_TEAM_MATCH"), source.table("FACT_TEAM_MATCH"))
+    meta = store.meta()
+    assert meta["tables"]["FACT_TEAM_MATCH"]["watermark"] == str(source.table("FACT_TEAM_MATCH")["PLAYED_ON"].max().date())
+    assert store.version().startswith(meta["source_watermark"]["PLAYED_ON"])
+
+
+def test_streamed_pull_matches_a_fetched_pull(source, store, tmp_path):
+    fetched = store.refresh()
+    streamed = SnapshotStore(str(tmp_path / "streamed"), source, tables=SPECS, stream=source.stream)
+    assert streamed.refresh() == fetched
+    for table in SPECS:
+        pd.testing.assert_frame_equal(streamed.read(table), store.read(table))
+    facts = streamed.meta()["tables"]["FACT_TEAM_MATCH"]
+    assert facts["watermark"] == store.meta()["tables"]["FACT_TEAM_MATCH"]["watermark"]
+    assert facts["rows"] == len(source.table("FACT_TEAM_MATCH"))
+
+
+def test_unchanged_warehouse_pulls_nothing(source, store):
+    store.refresh()
+    version, source.queries = store.version(), []
+    assert store.refresh() == {}
+    assert source.queries == [WATERMARK_QUERY] and store.version() == version
+
+
+def test_appended_rows_are_pulled_past_the_watermark(source, store):
+    store.refresh()
+    watermark = store.meta()["tables"]["FACT_TEAM_MATCH"]["watermark"]
+    next_day = source.later[source.later["PLAYED_ON"] == source.later["PLAYED_ON"].min()]
+    source.insert("FACT_TEAM_MATCH", next_day)
+
+    version = store.version()
+    pulled = store.refresh()
+    # Rows of the watermark day itself are read again, then de-duplicated on the key
+    boundary = (source.table("FACT_TEAM_MATCH")["PLAYED_ON"].dt.strftime("%Y-%m-%d") == watermark).sum()
+    assert pulled == {"FACT_TEAM_MATCH": len(next_day) + boundary, "DIM_TEAMS": len(source.table("DIM_TEAMS"))}
+    assert store.version() != version
+    same_rows(store.read("FACT_TEAM_MATCH"), source.table("FACT_TEAM_MATCH"))
+
+
+def test_appended_rows_are_recorded_as_the_delta_from_the_previous_version(source, store):
+    store.refresh()
+    assert store.delta("FACT_TEAM_MATCH", store.version()) is None  # a full pull
+    before, version = source.table("FACT_TEAM_MATCH"), store.version()
+    source.insert("FACT_TEAM_MATCH", source.later)
+    store.refresh()
+
+    base, delta = store.delta("FACT_TEAM_MATCH", store.version())
+    assert base == version and store.delta("DIM_TEAMS", store.version()) is None
+    # Only the new rows, not the boundary day read again
+    same_rows(delta, source.later)
+    same_rows(pd.concat([before, delta]), source.table("FACT_TEAM_MATCH"))
+    with pytest.raises(VersionChanged):
+        store.delta("FACT_TEAM_MATCH", version)
+
+    # A refresh that only re-pulls the dimensions leaves no delta behind
+    store.full_refresh_every = 0
+    assert list(store.refresh()) == ["DIM_TEAMS"]
+    assert store.delta("FACT_TEAM_MATCH", store.version()) is None
+
+
+def test_late_row_on_the_boundary_day_replaces_by_key(source, store):
+    store.refresh()
+    facts = source.table("FACT_TEAM_MATCH")
+    last_day = facts["PLAYED_ON"].max()
+    game_id, team_id = facts.loc[facts["PLAYED_ON"] == last_day, ["GAME_ID", "TEAM_ID"]].iloc[0]
+    # A corrected score and a late game, both dated on the stored watermark
+    source.execute("UPDATE FACT_TEAM_MATCH SET SCORED = SCORED + 7 WHERE GAME_ID = ? AND TEAM_ID = ?",
+                   [int(game_id), int(team_id)])
+    source.execute("INSERT INTO FACT_TEAM_MATCH SELECT GAME_ID + 100000, TEAM_ID, GAME_NUMBER + 100000, GAMEROLE, "
+                   "PLAYED_ON, SCORED, CONCEEDED, POINTS FROM FACT_TEAM_MATCH WHERE GAME_ID = ?", [int(game_id)])
+
+    store.refresh()
+    snapshot = store.read("FACT_TEAM_MATCH")
+    assert not snapshot.duplicated(KEY).any()
+    same_rows(snapshot, source.table("FACT_TEAM_MATCH"))
+    # A corrected row cannot be applied as an append
+    assert store.delta("FACT_TEAM_MATCH", store.version()) is None
+
+
+def test_probe_interval_is_shared_between_processes(source, store):
+    store.probe_interval = 300
+    store.refresh()
+    source.queries = []
+    # Another process on the same directory, before the interval is over
+    other = SnapshotStore(store.path, source, tables=SPECS, probe_interval=300)
+    assert other.refresh() == {} and store.refresh() == {}
+    assert source.queries == []
+    assert other.refresh(force=True) and source.queries[0] == WATERMARK_QUERY
+
+
+def test_read_of_a_replaced_version_raises(source, store):
+    store.refresh()
+    old = store.version()
+    same_rows(store.read("FACT_TEAM_MATCH", version=old), source.table("FACT_TEAM_MATCH"))
+    source.insert("FACT_TEAM_MATCH", source.later)
+    store.refresh()
+    with pytest.raises(VersionChanged):
+        store.read("FACT_TEAM_MATCH", version=old)
+    same_rows(store.read("FACT_TEAM_MATCH", version=store.version()), source.table("FACT_TEAM_MATCH"))
+
+
+def test_read_during_a_refresh_waits_for_its_version(source, store):
+    store.refresh()
+    old = store.version()
+    source.insert("FACT_TEAM_MATCH", source.later)
+
+    # Hold the refresh between writing the new tables and recording the new version
+    written, release = threading.Event(), threading.Event()
+    write_meta = store._write_meta
+
+    def held(meta):
+        written.set()
+        release.wait(10)
+        write_meta(meta)
+
+    store._write_meta = held
+    refresh = threading.Thread(target=store.refresh)
+    refresh.start()
+    written.wait(10)
+
+    errors = []
+
+    def read_old():
+        try:
+            store.read("FACT_TEAM_MATCH", version=old)
+        except VersionChanged as e:
+            errors.append(e)
+
+    # The new file is on disk but the old version is still on record: the reader waits instead of mixing them
+    reader = threading.Thread(target=read_old)
+    reader.start()
+    reader.join(0.3)
+    assert reader.is_alive()
+    release.set()
+    refresh.join()
+    reader.join()
+
+    assert len(errors) == 1 and store.version() != old
@@ -0,0 +1,153 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from features.leagueTables import format_standings
+from features.standings_engine import StandingsEngine, TIEBREAKS
+from warehouse import synthetic
+
+COLUMNS = ["TEAM_NAME", "PLAYED", "POINTS", "WINS", "DRAWS", "LOSSES", "GOALS", "CONCEEDED", "GOAL_DIFFERENCE"]
+
+
+def agg_league(tables):
+    """The warehouse's agg_league view over `tables`."""
+    duckdb = pytest.importorskip("duckdb")
+    with duckdb.connect() as conn:
+        for name in ["FACT_TEAM_MATCH", "DIM_TEAMS"]:
+            conn.register(name, tables[name])
+        return conn.execute(synthetic.VIEWS["agg_league"]).df()
+
+
+def pandas_table(tables, league, role=None, start=None, end=None):
+    """Standings of one league straight from the facts with a pandas groupby."""
+    facts = tables["FACT_TEAM_MATCH"].merge(tables["DIM_TEAMS"][["TEAM_ID", "TEAM_NAME", "LEAGUE_NAME"]], on="TEAM_ID")
+    facts = facts[facts["LEAGUE_NAME"] == league]
+    played_on = pd.to_datetime(facts["PLAYED_ON"])
+    if role is not None:
+        facts = facts[facts["GAMEROLE"] == role]
+    if start is not None:
+        facts = facts[played_on.loc[facts.index] >= pd.Timestamp(start)]
+    if end is not None:
+        facts = facts[played_on.loc[facts.index] <= pd.Timestamp(end)]
+
+    table = facts.groupby("TEAM_NAME").agg(
+        PLAYED=("POINTS", "size"),
+        POINTS=("POINTS", "sum"),
+        WINS=("POINTS", lambda p: (p == 3).sum()),
+        DRAWS=("POINTS", lambda p: (p == 1).sum()),
+        LOSSES=("POINTS", lambda p: (p == 0).sum()),
+        GOALS=("SCORED", "sum"),
+        CONCEEDED=("CONCEEDED", "sum"),
+    ).reset_index()
+    table["GOAL_DIFFERENCE"] = table["GOALS"] - table["CONCEEDED"]
+    return table.sort_values(TIEBREAKS + ["TEAM_NAME"], ascending=[False] * len(TIEBREAKS) + [True],
+                             kind="stable").reset_index(drop=True)
+
+
+def assert_same_table(actual, expected):
+    actual = actual[COLUMNS].reset_index(drop=True)
+    expected = expected[COLUMNS].reset_index(drop=True)
+    assert actual["TEAM_NAME"].tolist() == expected["TEAM_NAME"].tolist()
+    for column in COLUMNS[1:]:
+        assert actual[column].astype(int).tolist() == expected[column].astype(int).tolist(), column
+
+
+@pytest.fixture(scope="module")
+def engine(tables):
+    return StandingsEngine(tables["FACT_TEAM_MATCH"], tables["DIM_TEAMS"])
+
+
+def test_current_season_matches_agg_league(engine, tables):
+    view = agg_league(tables)
+    for league, rows in view.groupby("FORMAL_LEAGUE_NAME"):
+        assert_same_table(engine.table(league), format_standings(rows))
+
+
+@pytest.mark.parametrize("split, role", [("home", 1), ("away", 2)])
+def test_splits_and_windows_match_pandas(engine, tables, split, role):
+    start, end = datetime.date(2021, 1, 1), datetime.date(2022, 3, 31)
+    for league in engine.leagues:
+        assert_same_table(engine.table(league, split, start, end), pandas_table(tables, league, role, start, end))
+        assert_same_table(engine.table(league, "overall", start=start), pandas_table(tables, league, start=start))
+
+
+def test_finished_league_keeps_its_last_season(tables):
+    # The second league stops a season early: its current table is still its own last season
+    leagues = tables["DIM_TEAMS"]["LEAGUE_NAME"].unique()
+    finished = tables["DIM_TEAMS"].loc[tables["DIM_TEAMS"]["LEAGUE_NAME"] == leagues[1], "TEAM_ID"]
+    facts = tables["FACT_TEAM_MATCH"]
+    early = facts[~(facts["TEAM_ID"].isin(finished) & (pd.to_datetime(facts["PLAYED_ON"]) >= "2022-08-01"))]
+    truncated = {**tables, "FACT_TEAM_MATCH": early.reset_index(drop=True)}
+
+    engine = StandingsEngine(truncated["FACT_TEAM_MATCH"], truncated["DIM_TEAMS"])
+    assert engine.current_season(leagues[0]) == datetime.date(2022, 8, 1)
+    assert engine.current_season(leagues[1]) == datetime.date(2021, 8, 1)
+
+    view = agg_league(truncated)
+    for league in leagues:
+        table = engine.table(league)
+        assert table["PLAYED"].sum() > 0
+        assert_same_table(table, format_standings(view[view["FORMAL_LEAGUE_NAME"] == league]))
+        assert engine.timeline(league).matchdays == table["PLAYED"].max()
+
+
+def test_timeline_ends_at_the_current_table(engine):
+    for league in engine.leagues:
+        timeline = engine.timeline(league)
+        assert_same_table(timeline.table(timeline.matchdays), engine.table(league))
+        assert (timeline.table(0)["PLAYED"] == 0).all()
+
+
+def assert_same_engine(actual, expected):
+    assert actual.date_range() == expected.date_range()
+    for league in expected.leagues:
+        assert actual.current_season(league) == expected.current_season(league)
+        for split in ["overall", "home", "away"]:
+            assert_same_table(actual.table(league, split), expected.table(league, split))
+            assert_same_table(actual.table(league, split, datetime.date(2021, 1, 1), datetime.date(2022, 3, 31)),
+                              expected.table(league, split, datetime.date(2021, 1, 1), datetime.date(2022, 3, 31)))
+        timeline, rebuilt = actual.timeline(league), expected.timeline(league)
+        assert timeline.matchdays == rebuilt.matchdays
+        assert (timeline.ranks == rebuilt.ranks).all() and (timeline.cumulative == rebuilt.cumulative).all()
+
+
+@pytest.mark.parametrize("cutoff", ["2022-03-01", "2022-07-15"])
+def test_added_facts_match_a_rebuilt_engine(tables, cutoff):
+    # The later rows run into a new season, which resets each league's current table as it starts
+    facts = tables["FACT_TEAM_MATCH"]
+    before = pd.to_datetime(facts["PLAYED_ON"]) <= cutoff
+    base = StandingsEngine(facts[before], tables["DIM_TEAMS"])
+
+    extended = base.with_facts(facts[~before], tables["DIM_TEAMS"])
+    assert_same_engine(extended, StandingsEngine(facts, tables["DIM_TEAMS"]))
+    # The engine it was copied from still serves the old tables
+    assert_same_engine(base, StandingsEngine(facts[before], tables["DIM_TEAMS"]))
+
+
+def test_add_match_matches_a_rebuilt_engine(tables):
+    facts = tables["FACT_TEAM_MATCH"]
+    last_day = facts["PLAYED_ON"].max()
+    before = facts[facts["PLAYED_ON"] < last_day]
+    engine = StandingsEngine(before, tables["DIM_TEAMS"])
+
+    games = facts[facts["PLAYED_ON"] == last_day]
+    home, away = games[games["GAMEROLE"] == 1], games[games["GAMEROLE"] == 2]
+    for _, game in home.merge(away, on="GAME_ID", suffixes=("_HOME", "_AWAY")).iterrows():
+        engine.add_match(game["TEAM_ID_HOME"], game["TEAM_ID_AWAY"], game["SCORED_HOME"], game["SCORED_AWAY"],
+                         game["PLAYED_ON_HOME"])
+        # Reads between results see every result so far
+        engine.table(next(iter(engine.leagues)), start=datetime.date(2020, 1, 1))
+    assert_same_engine(engine, StandingsEngine(facts, tables["DIM_TEAMS"]))
+
+
+def test_changed_teams_or_unknown_teams_need_a_rebuild(engine, tables):
+    teams = tables["DIM_TEAMS"].copy()
+    teams.loc[0, "TEAM_NAME"] = "Renamed FC"
+    assert engine.with_facts(tables["FACT_TEAM_MATCH"].head(0), teams) is None
+
+    facts = tables["FACT_TEAM_MATCH"].head(2).copy()
+    facts["TEAM_ID"] = -1
+    assert engine.with_facts(facts, tables["DIM_TEAMS"]) is None
+    with pytest.raises(KeyError):
+        engine.copy().add_match(-1, facts["TEAM_ID"].iloc[0], 1, 0, datetime.date(2023, 1, 1))
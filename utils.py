@@ -1,58 +1,279 @@
 # Function to run queries
 
+import threading
+import time
 import streamlit as st
-import snowflake.connector
-import pandas as pd
-@st.cache_data(ttl=600)
-def run_query(query):
-    # Open a new connection for each query
-    conn = snowflake.connector.connect(
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        account=st.secrets["snowflake"]["account"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from warehouse.backends import create_backend
+from warehouse.pool import ConnectionPool
+from warehouse.fetch import fetch_dataframe, iter_dataframes
+from warehouse.query import Query, canonical_sql, canonical_params
+from warehouse.catalog import DimensionCatalog
+from warehouse.executor import QueryExecutor, QueryFailed
+from warehouse.instrument import QueryRecorder, bind, mark_miss, query_name, record_result
+from warehouse.snapshot import SnapshotStore, VersionChanged, version_time
+from warehouse.result_cache import ResultCache
+from warehouse.shared_cache import SharedCache
+from warehouse.query import cache_key
+
+
+# Data backend selected by the optional [backend] secrets section (Snowflake by default)
+@st.cache_resource
+def get_backend():
+    kind = st.secrets.get("backend", {}).get("type", "snowflake")
+    return create_backend(kind, st.secrets.get(kind, {}))
+
+
+def get_connection():
+    return get_backend().connect()
+
+
+# One pool per server process, shared by every session and feature module
+@st.cache_resource
+def get_connection_pool():
+    config = st.secrets.get("pool", {})
+    return ConnectionPool(
+        get_connection,
+        size=int(config.get("size", 4)),
+        max_idle=float(config.get("max_idle", 300)),
+        max_lifetime=float(config.get("max_lifetime", 3600)),
+        health_check_after=float(config.get("health_check_after", 30)),
+        checkout_timeout=float(config.get("checkout_timeout", 30)),
+        evict_every=float(config.get("evict_every", 60)) or None,
+    )
+
+
+# Records every data call for the diagnostics panel, the exports and sampled logging
+@st.cache_resource
+def get_recorder():
+    config = st.secrets.get("diagnostics", {})
+    return QueryRecorder(
+        max_records=int(config.get("max_records", 500)),
+        sample_rate=float(config.get("log_sample_rate", 0.05)),
+        slow_ms=float(config.get("slow_ms", 1000)),
     )
-    try:
+
+
+def diagnostics_enabled():
+    """True when the sidebar diagnostics panel is on (`[diagnostics] panel = true`)."""
+    return bool(st.secrets.get("diagnostics", {}).get("panel", False))
+
+
+def execute_query(query, params=None, dtypes=None):
+    with get_recorder().track(query_name(query), "warehouse") as call:
+        # Borrow a long-lived connection from the pool instead of opening one per query
+        with get_connection_pool().connection() as conn:
+            cursor = conn.cursor()
+            try:
+                start = time.perf_counter()
+                cursor.execute(query, params)
+                df = fetch_dataframe(cursor, dtypes)
+                call["warehouse_ms"] = (time.perf_counter() - start) * 1000
+            finally:
+                cursor.close()
+        return record_result(call, df)
+
+
+# Byte-bounded LRU for query results and snapshot tables, sized by the optional [result_cache] section
+@st.cache_resource
+def get_result_cache():
+    config = st.secrets.get("result_cache", {})
+    return ResultCache(
+        max_bytes=int(float(config.get("max_mb", 512)) * 1024 ** 2),
+        ttl=float(config.get("ttl", 600)),
+        spill_path=config.get("spill_path"),
+        spill_max_bytes=int(float(config.get("spill_max_mb", 2048)) * 1024 ** 2),
+    )
+
+
+# Cross-process tier behind the result cache, on when the optional [shared_cache] section sets a
+# path on local disk that every server process on the host can reach
+@st.cache_resource
+def get_shared_cache():
+    config = st.secrets.get("shared_cache", {})
+    if not config.get("path"):
+        return None
+    return SharedCache(
+        config["path"],
+        ttl=float(config.get("ttl", st.secrets.get("result_cache", {}).get("ttl", 600))),
+        lock_timeout=float(config.get("lock_timeout", 300)),
+    )
+
+
+def _run_query_cached(template, params, dtypes, query):
+    # Keyed on the normalized template; `query` (the text actually sent) is not part of the key
+    def fetch():
+        return execute_query(query, params or None, dtypes)
+
+    dtypes_key = tuple(sorted(dtypes.items())) if dtypes else None
+
+    def load():
+        mark_miss()
+        shared = get_shared_cache()
+        if shared is None:
+            return fetch()
+        return shared.get("query", (cache_key(template, params), dtypes_key), fetch)
+
+    return get_result_cache().get(("query", template, params, dtypes_key), load)
+
+
+def run_query(query, params=None, dtypes=None):
+    """
+    Runs a query through the shared result cache.
+
+    `query` is either SQL with `?` placeholders or a `Query` builder. The cache is
+    keyed on the whitespace-normalized template plus the bound parameters, so
+    formatting differences and predicate order do not cause misses.
+    """
+    if isinstance(query, Query):
+        query, params = query.build()
+    with get_recorder().track(query_name(query), "query_cache", cache="hit") as call:
+        return record_result(call, _run_query_cached(canonical_sql(query), canonical_params(params), dtypes, query))
+
+
+def stream_query(query, params=None, dtypes=None):
+    """Yields a large result as DataFrame batches; the pooled connection is held until the generator finishes."""
+    # Wall time covers the whole stream, including the caller's work between batches
+    with get_recorder().track(query_name(query), "warehouse") as call, get_connection_pool().connection() as conn:
+        call["rows"] = call["bytes"] = 0
         cursor = conn.cursor()
-        cursor.execute(query)
-        df = pd.DataFrame(cursor.fetchall(), columns=[desc[0] for desc in cursor.description])
-    finally:
-        # Ensure the connection is closed properly
-        cursor.close()
-        conn.close()
-    return df
-
-def get_team_filters():
-    query = """
-    SELECT DISTINCT COUNTRY_NAME, SHORT_NAME AS LEAGUE_NAME, TEAM_NAME 
-    FROM DIM_TEAMS
+        try:
+            start = time.perf_counter()
+            cursor.execute(query, params)
+            for batch in iter_dataframes(cursor, dtypes):
+                call["warehouse_ms"] += (time.perf_counter() - start) * 1000
+                call["rows"] += len(batch)
+                call["bytes"] += int(batch.memory_usage(index=False).sum())
+                yield batch
+                start = time.perf_counter()
+        finally:
+            cursor.close()
+
+
+# Shared pool for running a page's independent queries concurrently
+@st.cache_resource
+def get_query_executor():
+    return QueryExecutor(max_workers=int(st.secrets.get("pool", {}).get("size", 4)))
+
+
+def gather_queries(calls, timeout=60):
+    """
+    Runs independent data calls at the same time and returns {name: result}.
+
+    `calls` maps a name to a zero-argument callable or a (callable, *args) tuple.
+    Worker threads get the caller's script context so st.cache_* functions
+    behave exactly as they do on the page thread, and the calls they make are
+    attributed to the caller's feature. A call that gathers again runs its own
+    calls inline (see QueryExecutor.gather).
     """
-    return run_query(query)
+    ctx = get_script_run_ctx()
+
+    def with_context(task):
+        task = bind(task)
+
+        def run():
+            add_script_run_ctx(threading.current_thread(), ctx)
+            return task()
+        return run
+
+    return get_query_executor().gather(calls, timeout=timeout, wrap=with_context)
 
 
-def get_player_stats(selected_country=None, selected_league=None):
-    query = """
-    SELECT PLAYER_ID, PLAYER_NAME, TEAM_NAME, LEAGUE_NAME, COUNTRY_NAME, 
-           T_GAMES_PLAYED, T_STARTER_GAMES, T_MINUTES_PLAYED, 
-           T_GOALS, T_ASSISTS, G90, GPG, MPG, 
-           T_YELLOW_CARDS, T_RED_CARDS
-    FROM VW_PLAYER_STATS
+# Local Parquet snapshot of the warehouse tables the pages read
+@st.cache_resource
+def get_snapshot():
+    config = st.secrets.get("snapshot", {})
+    return SnapshotStore(
+        config.get("path", ".snapshot"),
+        execute_query,
+        full_refresh_every=float(config.get("full_refresh_every", 24 * 3600)),
+        # Processes sharing the directory take turns probing instead of each probing per TTL
+        probe_interval=float(config.get("probe_interval", 300)),
+        # Full pulls go to disk batch by batch instead of through one DataFrame
+        stream=stream_query,
+    )
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _schedule_refresh():
+    # Runs once per TTL window; the cached return value only marks that it ran
+    snapshot = get_snapshot()
+    shared = get_shared_cache()
+    if shared is not None:
+        # Snapshot entries never expire; superseded versions are removed when a new one is published
+        shared.prune(name="query")
+    if snapshot.version() is None:
+        # Nothing to serve yet: the first pull has to finish before any page can render
+        snapshot.refresh()
+    else:
+        snapshot.refresh_in_background()
+    return True
+
+
+def refresh_snapshot():
+    """
+    Returns the current snapshot version, starting at most one watermark probe (plus
+    delta pull when needed) per TTL window on a background thread. Pages keep being
+    served the current version until that refresh lands, and keep it if the
+    warehouse is unavailable.
     """
+    _schedule_refresh()
+    return get_snapshot().version()
+
+
+# Snapshot tables share the result cache's byte budget; they never expire or spill, since the
+# snapshot itself is the copy on disk, and the version in the key retires old ones through LRU.
+# With a shared cache, processes map one Arrow copy per table and version instead of each
+# decoding its own from Parquet. Tables are read as of the version in the key, never newer.
+def _read_snapshot_table(table, version):
+    def read():
+        return get_snapshot().read(table, version=version)
+
+    def load():
+        mark_miss()
+        shared = get_shared_cache()
+        if shared is None:
+            return read()
+        return shared.get(f"snapshot-{table}", version, read, ttl=None, generation=version_time(version))
+
+    return get_result_cache().get(("snapshot", table, version), load, ttl=None, spill=False)
+
+
+def _load_version(table, version):
+    with get_recorder().track(table, "snapshot", cache="hit") as call:
+        return record_result(call, _read_snapshot_table(table, version))
+
 
-    conditions = []
+def load_table(table):
+    """Returns a warehouse table from the local snapshot, refreshing it at most once per TTL."""
+    while True:
+        try:
+            return _load_version(table, refresh_snapshot())
+        except VersionChanged:
+            # A refresh landed between reading the version and the table; read the new one
+            continue
 
-    if selected_country and selected_country != "Select":
-        conditions.append(f"COUNTRY_NAME = '{selected_country}'")
 
-    if selected_league and selected_league != "Select":
-        conditions.append(f"SHORT_NAME = '{selected_league}'")
+def load_tables(*tables):
+    """Reads several snapshot tables at the same time, all as of one snapshot version; returns them in order."""
+    while True:
+        version = refresh_snapshot()
+        try:
+            results = gather_queries({table: (_load_version, table, version) for table in tables})
+        except QueryFailed as e:
+            if isinstance(e.__cause__, VersionChanged):
+                continue
+            raise
+        return [results[table] for table in tables]
 
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
+@st.cache_resource(max_entries=2)
+def _build_catalog(version):
+    mark_miss()
+    return DimensionCatalog(*load_tables("DIM_TEAMS", "DIM_LEAGUES"))
 
-    # Debugging: Log final query
 
+def get_catalog():
+    """Country -> league -> team lookups shared by every page's dropdowns, rebuilt once per snapshot version."""
+    with get_recorder().track("catalog", "catalog", cache="hit"):
+        return _build_catalog(refresh_snapshot())
 
-    return run_query(query)
@@ -0,0 +1,114 @@
+"""
+Data backends behind the connection pool.
+
+A backend is anything with a `connect()` method returning a DB-API style
+connection whose cursors accept `?` placeholders. `SnowflakeBackend` talks to
+the warehouse; `DuckDBBackend` serves the same tables and views from a local
+DuckDB file (see `warehouse.synthetic` to generate one), so every page can run,
+be profiled and be load-tested without a Snowflake account.
+"""
+import pyarrow as pa
+
+
+class SnowflakeBackend:
+    name = "snowflake"
+
+    def __init__(self, config):
+        self.config = dict(config)
+
+    def connect(self):
+        # Imported on first connect: the connector is slow to import and most reruns are served from the snapshot
+        import snowflake.connector
+
+        return snowflake.connector.connect(
+            user=self.config["user"],
+            password=self.config["password"],
+            account=self.config["account"],
+            warehouse=self.config["warehouse"],
+            database=self.config["database"],
+            schema=self.config["schema"],
+            # Server-side binding: one statement text per query shape, so compiled plans are reused
+            paramstyle="qmark"
+        )
+
+
+class _DuckDBCursor:
+    """Adapts a DuckDB cursor to the subset of the Snowflake cursor API the app uses."""
+
+    def __init__(self, cursor, batch_size):
+        self._cursor = cursor
+        self._batch_size = batch_size
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, params=None):
+        self._cursor.execute(query, params or [])
+        return self
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def fetch_arrow_all(self):
+        return self._cursor.to_arrow_table()
+
+    def fetch_arrow_batches(self):
+        for batch in self._cursor.to_arrow_reader(self._batch_size):
+            yield pa.Table.from_batches([batch])
+
+    def close(self):
+        self._cursor.close()
+
+
+class _DuckDBConnection:
+    def __init__(self, connection, batch_size):
+        self._connection = connection
+        self._batch_size = batch_size
+
+    def cursor(self):
+        return _DuckDBCursor(self._connection.cursor(), self._batch_size)
+
+    def close(self):
+        self._connection.close()
+
+
+class DuckDBBackend:
+    """
+    Local DuckDB database with the warehouse's table and view names.
+
+    Args:
+        path (str): Database file, e.g. one written by `python -m warehouse.synthetic`.
+        read_only (bool): Open read-only so several pooled connections can share the file.
+        batch_size (int): Rows per Arrow batch when streaming.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, path, read_only=True, batch_size=100_000):
+        self.path = path
+        self.read_only = read_only
+        self.batch_size = batch_size
+
+    def connect(self):
+        import duckdb
+
+        return _DuckDBConnection(duckdb.connect(self.path, read_only=self.read_only), self.batch_size)
+
+
+BACKENDS = {
+    SnowflakeBackend.name: SnowflakeBackend,
+    DuckDBBackend.name: DuckDBBackend,
+}
+
+
+def create_backend(kind, config):
+    """Builds a backend from its name and its secrets section."""
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown data backend '{kind}', expected one of {sorted(BACKENDS)}")
+    if kind == DuckDBBackend.name:
+        return DuckDBBackend(config.get("path", "football.duckdb"), read_only=config.get("read_only", True))
+    return SnowflakeBackend(config)
@@ -0,0 +1,71 @@
+class DimensionCatalog:
+    """
+    Country -> league -> team hierarchy and id/name maps, built once from
+    DIM_TEAMS and DIM_LEAGUES so every selectbox is filled with a dict lookup.
+
+    Leagues are keyed by DIM_LEAGUES.LEAGUE_NAME; `short_name` / `league_for_short_name`
+    translate to and from the SHORT_NAME labels some pages display. Every list is
+    sorted and returned as a tuple, so callers cannot mutate the shared catalog.
+
+    Args:
+        teams (pd.DataFrame): DIM_TEAMS with TEAM_ID, TEAM_NAME, LEAGUE_NAME and COUNTRY_NAME.
+        leagues (pd.DataFrame): DIM_LEAGUES with LEAGUE_NAME, SHORT_NAME and COUNTRY_NAME.
+    """
+
+    def __init__(self, teams, leagues):
+        teams = teams.dropna(subset=["TEAM_NAME", "LEAGUE_NAME"])
+        leagues = leagues.dropna(subset=["LEAGUE_NAME"])
+
+        leagues_by_country = {}
+        for country, league in zip(leagues["COUNTRY_NAME"], leagues["LEAGUE_NAME"]):
+            leagues_by_country.setdefault(country, set()).add(league)
+        for country, league in zip(teams["COUNTRY_NAME"], teams["LEAGUE_NAME"]):
+            leagues_by_country.setdefault(country, set()).add(league)
+
+        teams_by_league = {}
+        teams_by_country = {}
+        for country, league, team in zip(teams["COUNTRY_NAME"], teams["LEAGUE_NAME"], teams["TEAM_NAME"]):
+            teams_by_league.setdefault(league, set()).add(team)
+            teams_by_country.setdefault(country, set()).add(team)
+
+        self._countries = tuple(sorted(country for country in leagues_by_country if country is not None))
+        self._leagues_by_country = {country: tuple(sorted(names)) for country, names in leagues_by_country.items()}
+        self._leagues = tuple(sorted(set().union(*leagues_by_country.values())))
+        self._teams_by_league = {league: tuple(sorted(names)) for league, names in teams_by_league.items()}
+        self._teams_by_country = {country: tuple(sorted(names)) for country, names in teams_by_country.items()}
+        self._teams = tuple(sorted(set(teams["TEAM_NAME"])))
+
+        self._short_names = dict(zip(leagues["LEAGUE_NAME"], leagues["SHORT_NAME"].fillna(leagues["LEAGUE_NAME"])))
+        self._leagues_by_short_name = {short: league for league, short in self._short_names.items()}
+
+        unique_teams = teams.drop_duplicates("TEAM_ID")
+        self.team_name_by_id = dict(zip(unique_teams["TEAM_ID"], unique_teams["TEAM_NAME"]))
+        self.team_id_by_name = dict(zip(unique_teams["TEAM_NAME"], unique_teams["TEAM_ID"]))
+        self.league_by_team = dict(zip(unique_teams["TEAM_NAME"], unique_teams["LEAGUE_NAME"]))
+
+    @staticmethod
+    def _is_set(value):
+        return value not in (None, "", "All", "Select")
+
+    def countries(self):
+        return self._countries
+
+    def leagues(self, country=None):
+        """League names, optionally limited to one country ("All"/"Select"/None mean no filter)."""
+        if not self._is_set(country):
+            return self._leagues
+        return self._leagues_by_country.get(country, ())
+
+    def teams(self, country=None, league=None):
+        """Team names under a league, a country, or everything."""
+        if self._is_set(league):
+            return self._teams_by_league.get(league, ())
+        if self._is_set(country):
+            return self._teams_by_country.get(country, ())
+        return self._teams
+
+    def short_name(self, league):
+        return self._short_names.get(league, league)
+
+    def league_for_short_name(self, short_name):
+        return self._leagues_by_short_name.get(short_name, short_name)
@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class QueryTimeout(Exception):
+    """Raised when a gathered query does not finish within its timeout."""
+
+    def __init__(self, name, timeout):
+        super().__init__(f"Query '{name}' did not finish within {timeout}s")
+        self.name = name
+        self.timeout = timeout
+
+
+class QueryFailed(Exception):
+    """Raised when a gathered query raises; the original exception is chained as __cause__."""
+
+    def __init__(self, name, error):
+        super().__init__(f"Query '{name}' failed: {error}")
+        self.name = name
+
+
+class QueryExecutor:
+    """
+    Bounded thread pool for running a page's independent queries at the same time.
+
+    `gather` submits every call at once and waits for all of them, so a page waits
+    for its slowest query instead of the sum of all of them. A failing or
+    timed-out call cancels the calls that have not started yet and is re-raised
+    as QueryFailed / QueryTimeout naming the call. Calls that are already running
+    cannot be interrupted; they finish in the background and their result is dropped.
+
+    A call that gathers again (e.g. a cached builder loading its tables while the
+    page gathers builders) runs its own calls inline on its worker: queueing them
+    behind itself could leave every worker waiting on work none of them can start.
+
+    Args:
+        max_workers (int): Maximum number of calls running at once (keep it <= the connection pool size).
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query")
+        self._worker = threading.local()
+
+    def gather(self, calls, timeout=30, wrap=None):
+        """
+        Runs `calls` concurrently.
+
+        Args:
+            calls (dict): name -> zero-argument callable, or (callable, *args).
+            timeout (float or dict): Seconds allowed per call, counted from submission;
+                a dict gives a timeout per name (missing names get no limit).
+            wrap (callable): Optional decorator applied to each call before submission
+                (e.g. to attach per-thread context).
+
+        Returns:
+            dict: name -> result, in the same order as `calls`.
+        """
+        tasks = {}
+        for name, call in calls.items():
+            fn, args = (call[0], call[1:]) if isinstance(call, tuple) else (call, ())
+            task = (lambda fn=fn, args=args: fn(*args))
+            tasks[name] = wrap(task) if wrap else task
+
+        if getattr(self._worker, "active", False):
+            return self._run_inline(tasks)
+
+        started = time.monotonic()
+        futures = {name: self._pool.submit(self._on_worker(task)) for name, task in tasks.items()}
+
+        results = {}
+        try:
+            for name, future in futures.items():
+                limit = timeout.get(name) if isinstance(timeout, dict) else timeout
+                remaining = None if limit is None else max(0.0, started + limit - time.monotonic())
+                try:
+                    results[name] = future.result(timeout=remaining)
+                except FutureTimeout:
+                    raise QueryTimeout(name, limit) from None
+                except Exception as e:
+                    raise QueryFailed(name, e) from e
+        except Exception:
+            for future in futures.values():
+                future.cancel()
+            raise
+        return results
+
+    def _on_worker(self, task):
+        def run():
+            self._worker.active = True
+            try:
+                return task()
+            finally:
+                self._worker.active = False
+        return run
+
+    @staticmethod
+    def _run_inline(tasks):
+        results = {}
+        for name, task in tasks.items():
+            try:
+                results[name] = task()
+            except Exception as e:
+                raise QueryFailed(name, e) from e
+        return results
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
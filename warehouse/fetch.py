@@ -0,0 +1,73 @@
+import pandas as pd
+import pyarrow as pa
+
+
+def _declared(table, dtypes):
+    """Casts the columns named in `dtypes` (Arrow type aliases such as "float64") in one pass."""
+    if not dtypes:
+        return table
+    schema = pa.schema([
+        pa.field(field.name, pa.type_for_alias(dtypes[field.name]) if field.name in dtypes else field.type)
+        for field in table.schema
+    ])
+    return table.cast(schema)
+
+
+def arrow_to_pandas(table, dtypes=None):
+    """
+    Converts an Arrow table to pandas without an intermediate Python-object copy.
+
+    `split_blocks` keeps one block per column so numeric columns can be handed over
+    without consolidation, and `self_destruct` frees each Arrow column as soon as it
+    has been converted, so peak memory stays close to the size of the result.
+    """
+    return _declared(table, dtypes).to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _columns(cursor):
+    return [desc[0] for desc in cursor.description]
+
+
+def _rows_to_arrow(cursor, rows):
+    # Cursors without Arrow support (other DB-API drivers, stand-ins)
+    return pa.Table.from_pandas(pd.DataFrame(rows, columns=_columns(cursor)), preserve_index=False)
+
+
+def fetch_dataframe(cursor, dtypes=None):
+    """
+    Fetches the full result of an executed cursor as a DataFrame.
+
+    Uses the connector's Arrow result (`fetch_arrow_all`) when available so values
+    are never boxed into Python tuples.
+
+    Args:
+        cursor: Executed DB-API cursor.
+        dtypes (dict): Optional column name -> Arrow type alias to declare result types.
+    """
+    fetch_arrow_all = getattr(cursor, "fetch_arrow_all", None)
+    table = fetch_arrow_all() if fetch_arrow_all is not None else _rows_to_arrow(cursor, cursor.fetchall())
+
+    if table is None:
+        # Snowflake returns None instead of an empty table when there are no rows
+        table = _rows_to_arrow(cursor, [])
+    return arrow_to_pandas(table, dtypes)
+
+
+def iter_dataframes(cursor, dtypes=None, batch_size=100_000):
+    """
+    Yields the result of an executed cursor as a sequence of DataFrames.
+
+    Uses the connector's Arrow batches (`fetch_arrow_batches`) when available so
+    only one batch is held in memory at a time.
+    """
+    fetch_arrow_batches = getattr(cursor, "fetch_arrow_batches", None)
+    if fetch_arrow_batches is not None:
+        for table in fetch_arrow_batches():
+            yield arrow_to_pandas(table, dtypes)
+        return
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield arrow_to_pandas(_rows_to_arrow(cursor, rows), dtypes)
@@ -0,0 +1,41 @@
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks; writers still publish with an atomic rename
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path, timeout=None, poll=0.05):
+    """
+    Exclusive advisory lock on `path` (created if missing), held for the block.
+
+    The lock is taken on a fresh file descriptor, so it excludes other threads
+    of this process as well as other processes. Raises TimeoutError when it is
+    not acquired within `timeout` seconds (None waits indefinitely).
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            if timeout is None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                deadline = time.monotonic() + timeout
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            raise TimeoutError(f"Timed out waiting for lock {path}")
+                        time.sleep(poll)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
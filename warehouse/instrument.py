@@ -0,0 +1,196 @@
+import contextvars
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("football.queries")
+
+# Page the current call is made for; set by main.py around each page run
+_feature = contextvars.ContextVar("feature", default="app")
+# Innermost tracked call, so nested calls can report warehouse time and cache misses upward
+_active = contextvars.ContextVar("active_call", default=None)
+
+_TABLE = re.compile(r"\bFROM\s+([\w.]+)", re.IGNORECASE)
+
+
+@contextmanager
+def feature(name):
+    """Attributes every data call made inside the block to the feature `name`."""
+    token = _feature.set(name)
+    try:
+        yield
+    finally:
+        _feature.reset(token)
+
+
+def current_feature():
+    """Name of the feature calls are currently attributed to."""
+    return _feature.get()
+
+
+def bind(fn):
+    """Wraps `fn` to run in a copy of the caller's context, so attribution follows work onto other threads."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def query_name(sql):
+    """Short, low-cardinality label for a statement: the first table it reads from."""
+    match = _TABLE.search(sql)
+    return match.group(1) if match else sql.split(None, 1)[0].upper()
+
+
+def mark_miss():
+    """Marks the innermost tracked call as a cache miss (call from inside the cached function body)."""
+    call = _active.get()
+    if call is not None:
+        call["cache"] = "miss"
+
+
+def record_result(call, df):
+    """Stores the row count and in-memory size of a result on a tracked call."""
+    call["rows"] = len(df)
+    call["bytes"] = int(df.memory_usage(index=False).sum())
+    return df
+
+
+class QueryRecorder:
+    """
+    Records every data access: wall time, time spent in the warehouse, rows,
+    payload bytes, cache hit/miss and the feature that made the call.
+
+    The most recent calls are kept in a ring buffer for the diagnostics panel;
+    running totals per (feature, source, query, cache) back the Prometheus
+    export. A sample of calls is logged as one JSON object per line to the
+    "football.queries" logger; slow and failed calls are always logged.
+
+    Args:
+        max_records (int): Number of recent calls kept.
+        sample_rate (float): Fraction of ordinary calls logged.
+        slow_ms (float): Calls at least this slow are always logged.
+    """
+
+    METRICS = [
+        ("calls", "football_query_calls_total", "Data access calls."),
+        ("errors", "football_query_errors_total", "Data access calls that raised."),
+        ("seconds", "football_query_seconds_total", "Wall time spent in data access calls."),
+        ("warehouse_seconds", "football_query_warehouse_seconds_total", "Time spent executing and fetching in the warehouse."),
+        ("rows", "football_query_rows_total", "Rows returned."),
+        ("bytes", "football_query_bytes_total", "In-memory bytes of the returned frames."),
+    ]
+
+    def __init__(self, max_records=500, sample_rate=0.05, slow_ms=1000):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max_records)
+        self._totals = {}
+        self._random = random.Random()
+        if not logger.handlers:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    @contextmanager
+    def track(self, name, source, cache=None):
+        """
+        Times the block as one call and yields its record for the caller to fill in
+        (`rows`, `bytes`, `warehouse_ms`; `cache` starts as given and `mark_miss` can flip it).
+        """
+        call = {
+            "at": time.time(),
+            "feature": _feature.get(),
+            "source": source,
+            "name": name,
+            "cache": cache,
+            "wall_ms": 0.0,
+            "warehouse_ms": 0.0,
+            "rows": None,
+            "bytes": None,
+            "error": None,
+        }
+        parent = _active.get()
+        token = _active.set(call)
+        start = time.perf_counter()
+        try:
+            yield call
+        except Exception as e:
+            call["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _active.reset(token)
+            call["wall_ms"] = (time.perf_counter() - start) * 1000
+            if parent is not None:
+                with self._lock:
+                    parent["warehouse_ms"] += call["warehouse_ms"]
+            self._record(call)
+
+    def _record(self, call):
+        key = (call["feature"], call["source"], call["name"], call["cache"] or "none")
+        with self._lock:
+            self._records.append(call)
+            totals = self._totals.setdefault(key, dict.fromkeys((field for field, _, _ in self.METRICS), 0))
+            totals["calls"] += 1
+            totals["errors"] += call["error"] is not None
+            totals["seconds"] += call["wall_ms"] / 1000
+            totals["warehouse_seconds"] += call["warehouse_ms"] / 1000
+            totals["rows"] += call["rows"] or 0
+            totals["bytes"] += call["bytes"] or 0
+            sampled = self._random.random() < self.sample_rate
+
+        if call["error"] is not None:
+            logger.warning(json.dumps(call, default=str))
+        elif sampled or call["wall_ms"] >= self.slow_ms:
+            logger.info(json.dumps(call, default=str))
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def recent(self, limit=None):
+        """Most recent calls, oldest first."""
+        with self._lock:
+            records = list(self._records)
+        return records[-limit:] if limit else records
+
+    def totals(self):
+        """Running totals, one dict per (feature, source, query, cache)."""
+        with self._lock:
+            return [
+                {"feature": feature, "source": source, "name": name, "cache": cache, **totals}
+                for (feature, source, name, cache), totals in self._totals.items()
+            ]
+
+    def to_jsonl(self, limit=None):
+        return "".join(json.dumps(call, default=str) + "\n" for call in self.recent(limit))
+
+    def to_prometheus(self):
+        """Running totals in the Prometheus text exposition format."""
+        totals = self.totals()
+        lines = []
+        for field, metric, help_text in self.METRICS:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for row in totals:
+                labels = ",".join(
+                    f'{label}="{_escape(row[key])}"'
+                    for label, key in [("feature", "feature"), ("source", "source"), ("query", "name"), ("cache", "cache")]
+                )
+                lines.append(f"{metric}{{{labels}}} {row[field]!r}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
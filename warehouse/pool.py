@@ -0,0 +1,238 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolExhausted(Exception):
+    """Raised when no connection could be checked out within the timeout."""
+
+
+class _PooledConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of long-lived warehouse connections.
+
+    Connections are created lazily through `connect` (any zero-argument
+    callable returning a DB-API connection), handed out by `connection()`
+    and returned to the pool afterwards instead of being closed.
+
+    Args:
+        connect (callable): Factory that opens a new connection.
+        size (int): Maximum number of open connections.
+        max_idle (float): Seconds a connection may sit unused before it is evicted.
+        max_lifetime (float): Seconds after which a connection is recycled (session expiry).
+        health_check_after (float): Idle seconds after which a connection is pinged before reuse.
+        checkout_timeout (float): Seconds to wait for a free connection before raising PoolExhausted.
+        health_check_query (str): Cheap query used to validate an idle connection.
+        evict_every (float or None): Seconds between background `evict_idle` sweeps, so a
+            quiet pool closes its sessions without waiting for a checkout; None disables them.
+    """
+
+    def __init__(self, connect, size=4, max_idle=300, max_lifetime=3600,
+                 health_check_after=30, checkout_timeout=30,
+                 health_check_query="SELECT 1", evict_every=60):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self._connect = connect
+        self.size = size
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.checkout_timeout = checkout_timeout
+        self.health_check_query = health_check_query
+
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._counters = {
+            "checkouts": 0,
+            "connects": 0,
+            "reuses": 0,
+            "evicted_idle": 0,
+            "evicted_expired": 0,
+            "failed_health_checks": 0,
+            "discarded": 0,
+            "timeouts": 0,
+        }
+        self._wait_total = 0.0
+        self._hold_total = 0.0
+        self._recent = deque(maxlen=100)
+
+        self._stop = threading.Event()
+        if evict_every:
+            threading.Thread(target=self._evict_loop, args=(evict_every,), daemon=True, name="pool-evict").start()
+
+    # ------------------------------------------------------------------
+    # Checkout / checkin
+    # ------------------------------------------------------------------
+    @contextmanager
+    def connection(self):
+        """Checks out a connection for the duration of the `with` block."""
+        requested = time.perf_counter()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            self._bump("timeouts")
+            raise PoolExhausted(f"No connection available after {self.checkout_timeout}s (size={self.size})")
+
+        try:
+            pooled, reused = self._acquire()
+        except Exception:
+            self._slots.release()
+            raise
+
+        acquired = time.perf_counter()
+        failed = False
+        try:
+            yield pooled.conn
+        except Exception:
+            # The connection may be left mid-transaction or broken; never hand it out again
+            failed = True
+            raise
+        finally:
+            released = time.perf_counter()
+            if failed or self._closed:
+                self._discard(pooled)
+            else:
+                pooled.last_used = time.monotonic()
+                with self._lock:
+                    self._idle.append(pooled)
+            self._slots.release()
+            self._record(acquired - requested, released - acquired, reused, failed)
+
+    def _acquire(self):
+        """Returns a healthy idle connection, or opens a new one."""
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                pooled = self._idle.pop() if self._idle else None
+
+            if pooled is None:
+                pooled = _PooledConnection(self._connect())
+                self._bump("connects")
+                return pooled, False
+
+            now = time.monotonic()
+            if now - pooled.created_at > self.max_lifetime:
+                self._bump("evicted_expired")
+                self._close_quietly(pooled)
+                continue
+            if now - pooled.last_used > self.max_idle:
+                self._bump("evicted_idle")
+                self._close_quietly(pooled)
+                continue
+            if now - pooled.last_used > self.health_check_after and not self._is_healthy(pooled):
+                # Expired session or dropped socket: reconnect transparently
+                self._bump("failed_health_checks")
+                self._close_quietly(pooled)
+                continue
+
+            self._bump("reuses")
+            return pooled, True
+
+    def _is_healthy(self, pooled):
+        try:
+            cursor = pooled.conn.cursor()
+            try:
+                cursor.execute(self.health_check_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, pooled):
+        self._bump("discarded")
+        self._close_quietly(pooled)
+
+    @staticmethod
+    def _close_quietly(pooled):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def evict_idle(self):
+        """Closes idle connections past `max_idle` or `max_lifetime`. Returns the number evicted."""
+        now = time.monotonic()
+        expired, idle, keep = [], [], deque()
+        with self._lock:
+            while self._idle:
+                pooled = self._idle.popleft()
+                if now - pooled.created_at > self.max_lifetime:
+                    expired.append(pooled)
+                elif now - pooled.last_used > self.max_idle:
+                    idle.append(pooled)
+                else:
+                    keep.append(pooled)
+            self._idle = keep
+            self._counters["evicted_expired"] += len(expired)
+            self._counters["evicted_idle"] += len(idle)
+
+        for pooled in expired + idle:
+            self._close_quietly(pooled)
+        return len(expired) + len(idle)
+
+    def _evict_loop(self, interval):
+        while not self._stop.wait(interval):
+            self.evict_idle()
+
+    def close(self):
+        """Closes every idle connection; connections in use are closed on checkin."""
+        self._stop.set()
+        with self._lock:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    def _bump(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _record(self, wait, hold, reused, failed):
+        with self._lock:
+            self._counters["checkouts"] += 1
+            self._wait_total += wait
+            self._hold_total += hold
+            self._recent.append({"wait_s": wait, "hold_s": hold, "reused": reused, "failed": failed})
+
+    def metrics(self):
+        """Returns pool counters, averages and the most recent checkouts."""
+        with self._lock:
+            checkouts = self._counters["checkouts"]
+            return {
+                **self._counters,
+                "size": self.size,
+                "idle": len(self._idle),
+                "avg_wait_s": self._wait_total / checkouts if checkouts else 0.0,
+                "avg_hold_s": self._hold_total / checkouts if checkouts else 0.0,
+                "recent": list(self._recent),
+            }
+
+    def to_prometheus(self):
+        """Counters and gauges in the Prometheus text exposition format."""
+        metrics = self.metrics()
+        lines = []
+        for field in ["checkouts", "connects", "reuses", "evicted_idle", "evicted_expired",
+                      "failed_health_checks", "discarded", "timeouts"]:
+            lines.append(f"# TYPE football_pool_{field}_total counter")
+            lines.append(f"football_pool_{field}_total {metrics[field]}")
+        for field in ["size", "idle", "avg_wait_s", "avg_hold_s"]:
+            lines.append(f"# TYPE football_pool_{field} gauge")
+            lines.append(f"football_pool_{field} {metrics[field]}")
+        return "\n".join(lines) + "\n"
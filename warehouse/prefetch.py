@@ -0,0 +1,145 @@
+import logging
+import queue
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """
+    Runs speculative jobs on background threads and keeps their results for later pickup.
+
+    Jobs are identified by a hashable key. A key that is already queued, running
+    or cached is not submitted twice. The queue is bounded: when it is full the
+    new job is dropped rather than blocking the page. Cancelling a key stops it
+    if it is still queued, discards its result if it is already running, and
+    drops its result if it has finished.
+
+    Args:
+        max_queue (int): Maximum number of jobs waiting to run.
+        workers (int): Number of worker threads.
+        max_results (int): Number of finished results kept (least recently used are evicted).
+    """
+
+    def __init__(self, max_queue=8, workers=1, max_results=64):
+        self.max_results = max_results
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pending = {}       # key -> cancel Event, for queued and running jobs
+        self._results = OrderedDict()
+        self._used = set()       # keys whose result has been read at least once
+        self._stats = {
+            "submitted": 0,
+            "dropped": 0,
+            "cancelled": 0,
+            "completed": 0,
+            "failed": 0,
+            "hits": 0,
+            "misses": 0,
+            "wasted": 0,
+        }
+        self._workers = [threading.Thread(target=self._run, daemon=True, name=f"prefetch-{i}") for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+    def submit(self, key, fn):
+        """Queues `fn()` under `key`. Returns False if the key is already known or the queue is full."""
+        with self._lock:
+            if key in self._pending or key in self._results:
+                return False
+            cancelled = threading.Event()
+            try:
+                self._queue.put_nowait((key, fn, cancelled))
+            except queue.Full:
+                self._stats["dropped"] += 1
+                return False
+            self._pending[key] = cancelled
+            self._stats["submitted"] += 1
+            return True
+
+    def cancel(self, predicate):
+        """
+        Cancels queued or running jobs whose key matches `predicate(key)` and drops matching
+        finished results. Returns the number of jobs cancelled.
+        """
+        with self._lock:
+            keys = [key for key in self._pending if predicate(key)]
+            for key in keys:
+                self._pending.pop(key).set()
+            self._stats["cancelled"] += len(keys)
+            for key in [key for key in self._results if predicate(key)]:
+                self._discard(key)
+            return len(keys)
+
+    def _run(self):
+        while True:
+            key, fn, cancelled = self._queue.get()
+            try:
+                if cancelled.is_set():
+                    continue
+                try:
+                    result = fn()
+                except Exception as e:
+                    with self._lock:
+                        self._stats["failed"] += 1
+                        self._pending.pop(key, None)
+                    logger.warning("Prefetch %r failed: %s", key, e)
+                    continue
+
+                with self._lock:
+                    if cancelled.is_set():
+                        continue
+                    self._pending.pop(key, None)
+                    self._store(key, result)
+                    self._stats["completed"] += 1
+            finally:
+                self._queue.task_done()
+
+    def _store(self, key, result):
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._discard(next(iter(self._results)))
+
+    def _discard(self, key):
+        del self._results[key]
+        if key not in self._used:
+            self._stats["wasted"] += 1
+        self._used.discard(key)
+
+    # ------------------------------------------------------------------
+    # Pickup
+    # ------------------------------------------------------------------
+    def get(self, key, default=None):
+        """Returns a finished result (a hit) or `default` (a miss). Never waits for a running job."""
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self._used.add(key)
+                self._stats["hits"] += 1
+                return self._results[key]
+            self._stats["misses"] += 1
+            return default
+
+    def wait(self, timeout=None):
+        """Blocks until every queued job has finished (used by benchmarks and scripts)."""
+        with self._queue.all_tasks_done:
+            if timeout is None:
+                while self._queue.unfinished_tasks:
+                    self._queue.all_tasks_done.wait()
+            else:
+                self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "pending": len(self._pending),
+                "cached": len(self._results),
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,98 @@
+import hashlib
+import re
+
+_WHITESPACE = re.compile(r"\s+")
+# Quoted string literals and identifiers, with doubled quotes as escapes; split() keeps them as odd items
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+_OPERATORS = {"=", "!=", "<>", "<", "<=", ">", ">="}
+
+
+def canonical_sql(sql):
+    """
+    Collapses whitespace and drops the trailing semicolon so formatting never changes a cache key.
+    Quoted literals and identifiers are kept as written: their whitespace is part of the value.
+    """
+    parts = _QUOTED.split(sql)
+    parts[::2] = [_WHITESPACE.sub(" ", part) for part in parts[::2]]
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def canonical_params(params):
+    if params is None:
+        return ()
+    return tuple(params)
+
+
+def cache_key(template, params=None):
+    """Stable key for a (template, params) pair, usable across processes."""
+    payload = canonical_sql(template) + "\x00" + repr(canonical_params(params))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class Query:
+    """
+    Small builder producing a canonical (template, params) pair with `?` placeholders.
+
+    Predicates are kept in a fixed order and IN-lists are de-duplicated and sorted,
+    so logically identical requests always produce the same template and
+    parameters: the result cache hits, and the warehouse sees one statement text
+    per query shape and can reuse its compiled plan.
+
+        template, params = (Query("agg_player", ["PLAYER_NAME", "TOTAL_GOALS"])
+                            .where("COUNTRY_NAME", "Scotland")
+                            .where_in("TEAM_NAME", ["Celtic", "Aberdeen"])
+                            .build())
+    """
+
+    def __init__(self, table, columns=("*",), distinct=False):
+        self.table = table
+        self.columns = [column.upper() if column != "*" else column for column in columns]
+        self.distinct = distinct
+        self._predicates = {}
+        self._order_by = []
+        self._limit = None
+
+    def where(self, column, value, op="="):
+        if op not in _OPERATORS:
+            raise ValueError(f"Unsupported operator: {op}")
+        return self._add((column.upper(), op), ("?", (value,)))
+
+    def where_in(self, column, values):
+        values = sorted(set(values), key=lambda value: (type(value).__name__, value))
+        if not values:
+            raise ValueError(f"Empty IN-list for {column}")
+        return self._add((column.upper(), "IN"), (f"({', '.join('?' * len(values))})", tuple(values)))
+
+    def _add(self, key, predicate):
+        # Repeating a predicate is harmless; a second value for the same column and operator is a bug
+        if self._predicates.get(key, predicate) != predicate:
+            column, op = key
+            raise ValueError(f"Conflicting predicates on {column} {op}: {self._predicates[key][1]} and {predicate[1]}")
+        self._predicates[key] = predicate
+        return self
+
+    def order_by(self, *columns):
+        self._order_by = [column.upper() for column in columns]
+        return self
+
+    def limit(self, n):
+        self._limit = int(n)
+        return self
+
+    def build(self):
+        """Returns (template, params)."""
+        sql = f"SELECT {'DISTINCT ' if self.distinct else ''}{', '.join(self.columns)} FROM {self.table.upper()}"
+        params = []
+
+        if self._predicates:
+            clauses = []
+            for (column, op), (placeholder, values) in sorted(self._predicates.items()):
+                clauses.append(f"{column} {op} {placeholder}")
+                params.extend(values)
+            sql += " WHERE " + " AND ".join(clauses)
+        if self._order_by:
+            sql += " ORDER BY " + ", ".join(self._order_by)
+        if self._limit is not None:
+            sql += f" LIMIT {self._limit}"
+
+        return sql, tuple(params)
@@ -0,0 +1,283 @@
+import atexit
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import ExitStack
+
+import pandas as pd
+
+from warehouse import filelock
+
+logger = logging.getLogger(__name__)
+
+# Marks "use the cache's default ttl"; None means never expire
+DEFAULT = object()
+
+
+def frame_bytes(df):
+    """In-memory size of a DataFrame, including the Python objects behind string columns."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class ResultCache:
+    """
+    Thread-safe, byte-bounded LRU cache of DataFrames.
+
+    Every entry is measured when it is stored (`frame_bytes`). When the total
+    goes over `max_bytes`, least recently used entries are evicted until it
+    fits; an entry larger than the whole budget is returned but never kept.
+    With a `spill_path`, evicted entries are written there as zstd-compressed
+    Parquet instead of being dropped and read back (and promoted) on their next
+    use; the spill directory has its own LRU byte budget.
+
+    Concurrent misses on the same key run the loader once: the other callers
+    wait for its result. Results are shared between callers, so each call gets
+    a shallow copy (adding or dropping columns does not touch the cached frame;
+    copy-on-write covers value edits).
+
+    Entries that are cheap to rebuild (e.g. tables read from a local snapshot)
+    can be stored with `spill=False` and `ttl=None`.
+
+    Args:
+        max_bytes (int): Memory budget for cached frames.
+        ttl (float or None): Seconds an entry stays valid, in memory or on disk.
+        spill_path (str or None): Directory for evicted entries; None drops them. Each process
+            spills into its own subdirectory, held with a lock file and removed at exit, so
+            server processes can share the path; subdirectories of processes that are gone
+            are removed on start.
+        spill_max_bytes (int): Disk budget for spilled entries (compressed size).
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2, ttl=None, spill_path=None, spill_max_bytes=2 * 1024 ** 3):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self._spill_dir = None
+        if spill_path:
+            os.makedirs(spill_path, exist_ok=True)
+            _remove_orphans(spill_path)
+            # The lock is taken before the directory exists, so no other process sweeps it as an orphan
+            name = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+            self._spill_owner = ExitStack()
+            self._spill_owner.enter_context(filelock.file_lock(os.path.join(spill_path, f"{name}.lock")))
+            self._spill_dir = os.path.join(spill_path, name)
+            os.makedirs(self._spill_dir)
+            atexit.register(self._remove_spill_dir)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (frame, bytes, expires, spill)
+        self._spilled = OrderedDict()   # key -> (file, file bytes, expires)
+        self._loading = {}              # key -> Event set when the running load finishes
+        self._bytes = 0
+        self._spilled_bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "spill_hits": 0,
+            "evictions": 0,
+            "spills": 0,
+            "spill_evictions": 0,
+            "expired": 0,
+            "oversized": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def get(self, key, load, ttl=DEFAULT, spill=True):
+        """
+        Returns the cached frame for `key`, calling `load()` and storing its result on a miss.
+
+        `ttl` overrides the cache's default (None never expires); `spill=False` drops
+        the entry on eviction instead of writing it to disk.
+        """
+        while True:
+            with self._lock:
+                df = self._lookup(key)
+                if df is not None:
+                    return df.copy(deep=False)
+                waiting = self._loading.get(key)
+                if waiting is None:
+                    self._loading[key] = threading.Event()
+                    break
+            # Another thread is loading this key; use its result once it lands
+            waiting.wait()
+
+        try:
+            df = self._read_spilled(key) if spill else None
+            if df is None:
+                with self._lock:
+                    self._stats["misses"] += 1
+                df = load()
+            self.put(key, df, ttl, spill)
+            return df.copy(deep=False)
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        df, size, expires, _ = entry
+        if expires is not None and expires < time.time():
+            del self._entries[key]
+            self._bytes -= size
+            self._stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return df
+
+    def put(self, key, df, ttl=DEFAULT, spill=True):
+        size = frame_bytes(df)
+        ttl = self.ttl if ttl is DEFAULT else ttl
+        expires = time.time() + ttl if ttl else None
+        spilling = []
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                self._stats["oversized"] += 1
+                return
+            self._entries[key] = (df, size, expires, spill)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted, (frame, evicted_size, evicted_expires, evicted_spill) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+                if evicted_spill:
+                    spilling.append((evicted, frame, evicted_expires))
+
+        # Disk writes happen outside the lock
+        if self.spill_path:
+            for evicted, frame, evicted_expires in spilling:
+                self._spill(evicted, frame, evicted_expires)
+
+    # ------------------------------------------------------------------
+    # Disk spill
+    # ------------------------------------------------------------------
+    def _file(self, key):
+        return os.path.join(self._spill_dir, hashlib.sha256(repr(key).encode()).hexdigest() + ".parquet")
+
+    def _spill(self, key, df, expires):
+        if expires is not None and expires < time.time():
+            return
+        path = self._file(key)
+        try:
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            df.to_parquet(tmp, compression="zstd")
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        except Exception as e:
+            logger.warning("Could not spill cache entry %r: %s", key, e)
+            return
+
+        with self._lock:
+            if key in self._spilled:
+                self._spilled_bytes -= self._spilled.pop(key)[1]
+            self._spilled[key] = (path, size, expires)
+            self._spilled_bytes += size
+            self._stats["spills"] += 1
+            dropped = []
+            while self._spilled_bytes > self.spill_max_bytes and self._spilled:
+                _, (old_path, old_size, _) = self._spilled.popitem(last=False)
+                self._spilled_bytes -= old_size
+                self._stats["spill_evictions"] += 1
+                dropped.append(old_path)
+        for old_path in dropped:
+            _remove(old_path)
+
+    def _read_spilled(self, key):
+        with self._lock:
+            entry = self._spilled.pop(key, None)
+            if entry is None:
+                return None
+            path, size, expires = entry
+            self._spilled_bytes -= size
+        try:
+            if expires is not None and expires < time.time():
+                with self._lock:
+                    self._stats["expired"] += 1
+                return None
+            df = pd.read_parquet(path)
+        except Exception as e:
+            logger.warning("Could not read spilled cache entry %r: %s", key, e)
+            return None
+        finally:
+            _remove(path)
+        with self._lock:
+            self._stats["spill_hits"] += 1
+        return df
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def clear(self):
+        with self._lock:
+            paths = [path for path, _, _ in self._spilled.values()]
+            self._entries.clear()
+            self._spilled.clear()
+            self._bytes = self._spilled_bytes = 0
+        for path in paths:
+            _remove(path)
+
+    def _remove_spill_dir(self):
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+        _remove(f"{self._spill_dir}.lock")
+        self._spill_owner.close()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["spill_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "spilled_entries": len(self._spilled),
+                "spilled_bytes": self._spilled_bytes,
+                "hit_rate": (self._stats["hits"] + self._stats["spill_hits"]) / lookups if lookups else 0.0,
+            }
+
+    def to_prometheus(self):
+        """Counters and gauges in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = []
+        for field in ["hits", "misses", "spill_hits", "evictions", "spills", "spill_evictions", "expired", "oversized"]:
+            lines.append(f"# TYPE football_result_cache_{field}_total counter")
+            lines.append(f"football_result_cache_{field}_total {stats[field]}")
+        for field in ["entries", "bytes", "max_bytes", "spilled_entries", "spilled_bytes"]:
+            lines.append(f"# TYPE football_result_cache_{field} gauge")
+            lines.append(f"football_result_cache_{field} {stats[field]}")
+        return "\n".join(lines) + "\n"
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_orphans(spill_path):
+    """Removes spill subdirectories whose owning process has exited, which released its lock."""
+    if filelock.fcntl is None:
+        # Without advisory locks a live owner cannot be told from a dead one
+        return
+    for name in os.listdir(spill_path):
+        if not name.endswith(".lock"):
+            continue
+        lock = os.path.join(spill_path, name)
+        try:
+            with filelock.file_lock(lock, timeout=0):
+                shutil.rmtree(lock[:-len(".lock")], ignore_errors=True)
+                _remove(lock)
+        except TimeoutError:
+            continue
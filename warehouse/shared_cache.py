@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from warehouse.filelock import file_lock
+
+logger = logging.getLogger(__name__)
+
+# Marks "use the cache's default ttl"; None means never expire
+DEFAULT = object()
+
+
+class SharedCache:
+    """
+    Cross-process cache of DataFrames stored as Arrow IPC files in a local directory.
+
+    Every server process on the host points at the same directory. A hit
+    memory-maps the file and converts it without copying (`split_blocks=True`),
+    so the column buffers are page-cache pages shared by every process that
+    reads them rather than one private copy per process.
+
+    A miss takes an exclusive file lock on the entry and checks again before
+    loading, so exactly one process (or thread) runs the loader while the rest
+    wait and then map what it wrote. Entries are written to a temporary file and
+    renamed into place, so readers never see a partial file. Expiry uses the
+    file's modification time, which every process agrees on.
+
+    The mapped buffers are read-only, so each process keeps the frame it mapped
+    for a file and hands out shallow copies of it: copy-on-write then copies a
+    column the first time a caller modifies it instead of failing.
+
+    Args:
+        path (str): Directory shared by the processes.
+        ttl (float or None): Seconds an entry stays valid; None never expires.
+        lock_timeout (float): Seconds to wait for another process's load before loading
+            without the lock (the result is then returned but not published).
+    """
+
+    def __init__(self, path, ttl=None, lock_timeout=300):
+        self.path = path
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._mapped = {}   # path -> (inode, mtime_ns, frame) for files this process has mapped
+        self._stats = {"hits": 0, "waits": 0, "loads": 0, "timeouts": 0, "errors": 0}
+
+    def _file(self, name, key, generation=None):
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+        if generation is None:
+            return os.path.join(self.path, f"{name}-{digest}.arrow")
+        return os.path.join(self.path, f"{name}-g{int(generation)}-{digest}.arrow")
+
+    def _count(self, field):
+        with self._lock:
+            self._stats[field] += 1
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def get(self, name, key, load, ttl=DEFAULT, generation=None):
+        """
+        Returns the frame stored under (`name`, `key`), calling `load()` in one process on a miss.
+
+        `name` prefixes the file name and must be filesystem-safe. A `generation` is a
+        number that grows with each replacement of the entry (e.g. the refresh time of
+        a snapshot version): publishing removes the entries under the same name with a
+        lower generation, so a process still on an older one never removes a newer entry.
+        """
+        ttl = self.ttl if ttl is DEFAULT else ttl
+        path = self._file(name, key, generation)
+        df = self._read(path, ttl)
+        if df is not None:
+            self._count("hits")
+            return df
+
+        try:
+            with file_lock(path + ".lock", timeout=self.lock_timeout):
+                # Whoever held the lock before us may have just published it
+                df = self._read(path, ttl)
+                if df is not None:
+                    self._count("waits")
+                    return df
+                self._count("loads")
+                df = load()
+                if not self._publish(path, df):
+                    return df
+        except TimeoutError:
+            logger.warning("Timed out waiting for shared cache entry %s; loading it locally", path)
+            self._count("timeouts")
+            return load()
+
+        if generation is not None:
+            self._remove_older(name, generation)
+        # Serve the mapped copy so this process shares the pages with the others
+        mapped = self._read(path, None)
+        return df if mapped is None else mapped
+
+    def _read(self, path, ttl):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._forget(path)
+            return None
+        if ttl is not None and stat.st_mtime + ttl < time.time():
+            self._forget(path)
+            return None
+
+        with self._lock:
+            mapped = self._mapped.get(path)
+        if mapped is None or mapped[:2] != (stat.st_ino, stat.st_mtime_ns):
+            try:
+                with pa.memory_map(path) as source:
+                    table = ipc.open_file(source).read_all()
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                logger.warning("Could not read shared cache entry %s: %s", path, e)
+                self._count("errors")
+                return None
+            # The frame's buffers point into the mapping, which stays alive as long as they do
+            mapped = (stat.st_ino, stat.st_mtime_ns, table.to_pandas(split_blocks=True, self_destruct=True))
+            with self._lock:
+                self._mapped[path] = mapped
+        return mapped[2].copy(deep=False)
+
+    def _forget(self, path):
+        with self._lock:
+            self._mapped.pop(path, None)
+
+    def _publish(self, path, df):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.OSFile(tmp, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)
+            return True
+        except Exception as e:
+            logger.warning("Could not publish shared cache entry %s: %s", path, e)
+            self._count("errors")
+            _remove(tmp)
+            return False
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def _remove_older(self, name, generation):
+        # Processes still mapping a removed file keep their pages until they drop the frame
+        pattern = re.compile(rf"{re.escape(name)}-g(\d+)-[0-9a-f]{{32}}\.arrow")
+        for entry in os.scandir(self.path):
+            match = pattern.fullmatch(entry.name)
+            if match and int(match.group(1)) < int(generation):
+                _remove(entry.path)
+                _remove(entry.path + ".lock")
+                self._forget(entry.path)
+
+    def prune(self, max_age=None, name=None):
+        """
+        Removes entries older than `max_age` (default the cache ttl), only those under
+        `name` when given, and temp files left by crashed writers.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        now = time.time()
+        removed = 0
+        for entry in os.scandir(self.path):
+            try:
+                age = now - entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith(".tmp") and age > self.lock_timeout:
+                _remove(entry.path)
+            elif (entry.name.endswith(".arrow") and max_age is not None and age > max_age
+                  and (name is None or entry.name.startswith(f"{name}-"))):
+                _remove(entry.path)
+                _remove(entry.path + ".lock")
+                self._forget(entry.path)
+                removed += 1
+        # Drop mappings of files another process removed, so their disk space is released
+        with self._lock:
+            paths = list(self._mapped)
+        for path in paths:
+            if not os.path.exists(path):
+                self._forget(path)
+        return removed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["entries"] = stats["bytes"] = 0
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".arrow"):
+                try:
+                    stats["bytes"] += entry.stat().st_size
+                    stats["entries"] += 1
+                except FileNotFoundError:
+                    continue
+        with self._lock:
+            stats["mapped"] = len(self._mapped)
+        return stats
+
+    def to_prometheus(self):
+        """Counters and gauges in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = []
+        for field in ["hits", "waits", "loads", "timeouts", "errors"]:
+            lines.append(f"# TYPE football_shared_cache_{field}_total counter")
+            lines.append(f"football_shared_cache_{field}_total {stats[field]}")
+        for field in ["entries", "bytes", "mapped"]:
+            lines.append(f"# TYPE football_shared_cache_{field} gauge")
+            lines.append(f"football_shared_cache_{field} {stats[field]}")
+        return "\n".join(lines) + "\n"
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
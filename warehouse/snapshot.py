@@ -0,0 +1,421 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from warehouse.filelock import file_lock
+from warehouse.query import Query
+
+logger = logging.getLogger(__name__)
+
+# Tables mirrored locally. Fact-like tables carry a watermark column and are
+# pulled incrementally; the small dimension/aggregate tables are re-pulled in
+# full, but only when the fact watermark moves (they are derived from it).
+# `dtypes` declares Arrow types for columns the pages compute with, so the
+# local copy never needs pd.to_numeric coercion after loading. Queries are
+# builders, so the incremental pull adds its watermark predicate as a bound
+# parameter instead of pasting SQL together.
+TABLES = {
+    "FACT_TEAM_MATCH": {
+        "query": Query("FACT_TEAM_MATCH"),
+        "watermark": "PLAYED_ON",
+        "key": ["GAME_ID", "TEAM_ID"],
+        "dtypes": {
+            "GAME_NUMBER": "int32",
+            "GAMEROLE": "int8",
+            "PLAYED_ON": "date32",
+            "SCORED": "int16",
+            "CONCEEDED": "int16",
+            "POINTS": "int8",
+        },
+    },
+    "ATTENDeNCE_VIEW": {
+        "query": Query("ATTENDeNCE_VIEW", ["PLAYED_ON", "TEAM_NAME", "ATTENDANCE"]),
+        "watermark": "PLAYED_ON",
+        "key": ["PLAYED_ON", "TEAM_NAME"],
+        "dtypes": {"PLAYED_ON": "date32", "ATTENDANCE": "float64"},
+    },
+    "DIM_TEAMS": {"query": Query("DIM_TEAMS")},
+    "DIM_LEAGUES": {"query": Query("DIM_LEAGUES")},
+    "agg_league": {
+        "query": Query("agg_league"),
+        "dtypes": {
+            "GAMESPLAYED": "int32",
+            "TOTALPOINTS": "int32",
+            "WINS": "int32",
+            "DRAWS": "int32",
+            "LOSSES": "int32",
+            "TOTALSCORED": "int32",
+            "TOTALCONCEDED": "int32",
+        },
+    },
+    "agg_player": {
+        "query": Query("agg_player"),
+        "dtypes": {
+            "TOTAL_MINUTESPLAYED": "float64",
+            "TOTAL_GOALS": "float64",
+            "TOTAL_ASSISTS": "float64",
+        },
+    },
+    # Per-player totals and per-game rates, for the similar-player index
+    "VW_PLAYER_STATS": {
+        "query": Query("VW_PLAYER_STATS", [
+            "PLAYER_ID", "PLAYER_NAME", "TEAM_NAME", "LEAGUE_NAME", "COUNTRY_NAME",
+            "T_GAMES_PLAYED", "T_STARTER_GAMES", "T_MINUTES_PLAYED",
+            "T_GOALS", "T_ASSISTS", "G90", "GPG", "MPG",
+            "T_YELLOW_CARDS", "T_RED_CARDS",
+        ]),
+        "dtypes": {
+            "T_GAMES_PLAYED": "float64",
+            "T_STARTER_GAMES": "float64",
+            "T_MINUTES_PLAYED": "float64",
+            "T_GOALS": "float64",
+            "T_ASSISTS": "float64",
+            "G90": "float64",
+            "GPG": "float64",
+            "MPG": "float64",
+            "T_YELLOW_CARDS": "float64",
+            "T_RED_CARDS": "float64",
+        },
+    },
+}
+
+# Cheap probe deciding whether anything changed since the last refresh
+WATERMARK_QUERY = "SELECT MAX(PLAYED_ON) AS PLAYED_ON, MAX(GAME_NUMBER) AS GAME_NUMBER FROM FACT_TEAM_MATCH"
+
+
+class VersionChanged(Exception):
+    """Raised when a table is read as of a snapshot version that a refresh has since replaced."""
+
+
+def version_time(version):
+    """Refresh time (epoch seconds) of a snapshot version (`<watermark>@<time>`), or None."""
+    try:
+        return float(str(version).rsplit("@", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _file_identity(stat):
+    # A table is rewritten under a temporary name and renamed into place, so the inode changes on every write
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+def _delta_name(table):
+    # Rows the last incremental refresh appended, next to the table itself
+    return f"{table}.delta"
+
+
+def _to_json(value):
+    if hasattr(value, "item"):
+        value = value.item()  # numpy scalar
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.isoformat()
+    if value is None or pd.isna(value):
+        return None
+    return value if isinstance(value, (int, float, str)) else str(value)
+
+
+class SnapshotStore:
+    """
+    Local Parquet copy of the warehouse tables used by the feature pages.
+
+    Args:
+        path (str): Directory holding one `<table>.parquet` file per table plus `_meta.json`.
+        fetch (callable): `fetch(query, params, dtypes)` returning a DataFrame from the warehouse.
+        tables (dict): Table name -> spec (`query` as a `Query` builder, optional `watermark`, `key`
+            and `dtypes`); defaults to TABLES.
+        full_refresh_every (float): Seconds after which non-watermarked tables are re-pulled
+            even if the fact watermark has not moved (catches dimension edits).
+        probe_interval (float): Seconds after any process's probe during which `refresh`
+            skips probing again, so server processes sharing the directory probe once between them.
+        stream (callable or None): `stream(query, params, dtypes)` yielding the result as DataFrame
+            batches; full pulls then write each table batch by batch instead of holding all of it.
+    """
+
+    META_FILE = "_meta.json"
+    LOCK_FILE = ".refresh.lock"
+
+    def __init__(self, path, fetch, tables=None, full_refresh_every=24 * 3600, probe_interval=0, stream=None):
+        self.path = path
+        self.fetch = fetch
+        self.stream = stream
+        self.tables = tables or TABLES
+        self.full_refresh_every = full_refresh_every
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._worker = None
+        self._meta_cache = (None, None)  # (file identity, meta) of the last _meta.json read
+        os.makedirs(path, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Metadata
+    # ------------------------------------------------------------------
+    def _meta_path(self):
+        return os.path.join(self.path, self.META_FILE)
+
+    def meta(self):
+        try:
+            # Pages ask for the version many times per rerun; re-parse only when the file changed
+            stat = os.stat(self._meta_path())
+            # _write_meta renames a new file into place, so the inode changes on every write
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            cached_identity, meta = self._meta_cache
+            if cached_identity != identity:
+                with open(self._meta_path()) as f:
+                    meta = json.load(f)
+                self._meta_cache = (identity, meta)
+            return copy.deepcopy(meta)
+        except FileNotFoundError:
+            return {"version": None, "source_watermark": None, "tables": {}}
+
+    def version(self):
+        """Opaque string that changes whenever any table in the snapshot changes."""
+        return self.meta()["version"]
+
+    def _write_meta(self, meta):
+        tmp = self._meta_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, self._meta_path())
+
+    # ------------------------------------------------------------------
+    # Table files
+    # ------------------------------------------------------------------
+    def _table_path(self, table):
+        return os.path.join(self.path, f"{table}.parquet")
+
+    def has(self, table):
+        return os.path.exists(self._table_path(table))
+
+    def read(self, table, columns=None, filters=None, version=None):
+        """
+        Reads a table from the local snapshot. Raises FileNotFoundError if it was never pulled.
+
+        `filters` uses the pyarrow predicate form, e.g. [("LEAGUE_NAME", "in", leagues)].
+        With `version`, the table is read as it is in that snapshot version, and
+        VersionChanged is raised if a refresh has replaced the version.
+        """
+        if version is None:
+            return pd.read_parquet(self._table_path(table), columns=columns, filters=filters)
+
+        with open(self._table_path(table), "rb") as f:
+            meta = self.meta()
+            if (meta["version"] == version
+                    and meta["tables"].get(table, {}).get("file") == _file_identity(os.fstat(f.fileno()))):
+                return pd.read_parquet(f, columns=columns, filters=filters)
+
+        # A refresh writes its tables before the new version: wait for it, then the files match the meta
+        with file_lock(os.path.join(self.path, self.LOCK_FILE)):
+            if self.version() != version:
+                raise VersionChanged(f"Snapshot version {version} of {table} was replaced by {self.version()}")
+            return pd.read_parquet(self._table_path(table), columns=columns, filters=filters)
+
+    def delta(self, table, version):
+        """
+        Rows the refresh that produced `version` appended to `table`, as (previous version, DataFrame),
+        so state built for the previous version can be extended instead of rebuilt. None when that
+        refresh did more than append (a full pull, a corrected row) or did not pull the table.
+
+        Raises VersionChanged if a refresh has replaced `version`.
+        """
+        meta = self.meta()
+        if meta["version"] != version:
+            raise VersionChanged(f"Snapshot version {version} of {table} was replaced by {meta['version']}")
+        delta = meta["tables"].get(table, {}).get("delta")
+        if delta is None:
+            return None
+        with open(self._table_path(_delta_name(table)), "rb") as f:
+            if _file_identity(os.fstat(f.fileno())) != delta["file"]:
+                raise VersionChanged(f"Snapshot version {version} of {table} was replaced")
+            return delta["base"], pd.read_parquet(f)
+
+    def _write(self, table, df):
+        tmp = self._table_path(table) + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, self._table_path(table))
+
+    def _pull(self, table, spec):
+        """
+        Fetches a whole table and writes it. Returns (rows, max of the watermark column or None).
+
+        With `stream`, batches go to the Parquet file as they arrive, so a large table is never
+        in memory all at once.
+        """
+        if self.stream is not None:
+            try:
+                pulled = self._pull_streamed(table, spec)
+                if pulled is not None:
+                    return pulled
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:
+                # Batches disagree on a column's type (e.g. all null in the first one)
+                logger.info("Could not stream %s (%s); pulling it in one piece", table, e)
+
+        column = spec.get("watermark")
+        query, params = spec["query"].build()
+        df = self.fetch(query, params or None, spec.get("dtypes"))
+        self._write(table, df)
+        return len(df), (df[column].max() if column and not df.empty else None)
+
+    def _pull_streamed(self, table, spec):
+        """Writes a table batch by batch; None when the result had no batches to take the columns from."""
+        column = spec.get("watermark")
+        query, params = spec["query"].build()
+        tmp = self._table_path(table) + ".tmp"
+        rows, watermark, writer = 0, None, None
+        try:
+            for batch in self.stream(query, params or None, spec.get("dtypes")):
+                arrow = pa.Table.from_pandas(batch, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, arrow.schema)
+                elif arrow.schema != writer.schema:
+                    arrow = arrow.cast(writer.schema)
+                writer.write_table(arrow)
+                rows += len(batch)
+                if column and not batch.empty:
+                    top = batch[column].max()
+                    watermark = top if watermark is None or top > watermark else watermark
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        if writer is None:
+            return None
+        writer.close()
+        os.replace(tmp, self._table_path(table))
+        return rows, watermark
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+    def refresh(self, force=False):
+        """
+        Brings the snapshot up to date with the warehouse.
+
+        One probe query checks the fact watermark. If it has not moved, nothing
+        else is pulled. Otherwise watermarked tables fetch only rows at or after
+        their stored watermark (de-duplicated on their key) and the small derived
+        tables are re-pulled in full.
+
+        Processes sharing the directory refresh one at a time under a file lock;
+        one that finds a probe newer than `probe_interval` (usually another
+        process's, made while it waited) returns without querying.
+
+        Returns:
+            dict: Rows pulled per table (empty when nothing changed).
+        """
+        with self._lock, file_lock(os.path.join(self.path, self.LOCK_FILE)):
+            meta = self.meta()
+            now = time.time()
+            if not force and now - meta.get("probed_at", 0) < self.probe_interval:
+                return {}
+
+            probe = self.fetch(WATERMARK_QUERY, None, None)
+            source_watermark = {col: _to_json(probe[col].iloc[0]) for col in probe.columns} if not probe.empty else None
+
+            facts_moved = force or source_watermark != meta["source_watermark"]
+            pulled = {}
+
+            for table, spec in self.tables.items():
+                state = dict(meta["tables"].get(table, {}))
+                missing = not self.has(table)
+
+                if spec.get("watermark"):
+                    if not (facts_moved or missing):
+                        continue
+                    pulled[table], state = self._refresh_incremental(table, spec, state, full=missing or force)
+                else:
+                    stale = now - state.get("pulled_at", 0) > self.full_refresh_every
+                    if not (facts_moved or missing or stale):
+                        continue
+                    pulled[table], _ = self._pull(table, spec)
+                    state = {"rows": pulled[table], "pulled_at": now}
+                meta["tables"][table] = state
+
+            if pulled:
+                previous = meta["version"]
+                meta["source_watermark"] = source_watermark
+                meta["version"] = f"{(source_watermark or {}).get('PLAYED_ON')}@{now:.0f}"
+                # Appended rows recorded by this refresh lead from the previous version; older ones lead nowhere
+                for table, state in meta["tables"].items():
+                    delta = state.get("delta")
+                    if table in pulled and delta is not None and "base" not in delta:
+                        delta["base"] = previous
+                        delta["file"] = _file_identity(os.stat(self._table_path(_delta_name(table))))
+                    else:
+                        state.pop("delta", None)
+            meta["probed_at"] = now
+            # The files each version was written with, so readers can tell a table of the next one
+            for table in self.tables:
+                if self.has(table):
+                    meta["tables"].setdefault(table, {})["file"] = _file_identity(os.stat(self._table_path(table)))
+            self._write_meta(meta)
+            return pulled
+
+    def refresh_in_background(self, force=False):
+        """
+        Starts `refresh` on a daemon thread unless one is already running, so readers keep
+        getting the current version while the warehouse is probed. Failures are logged.
+
+        Returns:
+            threading.Thread or None: The new worker, or None if a refresh was already running.
+        """
+        with self._state_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return None
+            self._worker = threading.Thread(target=self._refresh_logged, args=(force,), daemon=True,
+                                            name="snapshot-refresh")
+            self._worker.start()
+            return self._worker
+
+    def _refresh_logged(self, force):
+        try:
+            pulled = self.refresh(force)
+            if pulled:
+                logger.info("Snapshot refreshed to version %s: %s", self.version(), pulled)
+        except Exception as e:
+            logger.warning("Snapshot refresh failed, serving version %s: %s", self.version(), e)
+
+    def _refresh_incremental(self, table, spec, state, full):
+        column = spec["watermark"]
+        watermark = state.get("watermark")
+
+        if full or watermark is None:
+            rows, top = self._pull(table, spec)
+            return rows, {"rows": rows, "watermark": _to_json(top), "pulled_at": time.time()}
+
+        # ">=" re-reads the boundary day so rows landing late for that date are not missed
+        query, params = copy.deepcopy(spec["query"]).where(column, watermark, ">=").build()
+        delta = self.fetch(query, params, spec.get("dtypes"))
+        delta_rows = len(delta)
+        if not delta_rows:
+            self._write(_delta_name(table), delta)
+            return 0, {**state, "delta": {"rows": 0}}
+        stored = self.read(table)
+        merged = pd.concat([stored, delta], ignore_index=True)
+        merged = merged.drop_duplicates(subset=spec["key"], keep="last")
+
+        self._write(table, merged)
+        state = {
+            "rows": len(merged),
+            "watermark": _to_json(merged[column].max()) if not merged.empty else None,
+            "pulled_at": time.time(),
+        }
+
+        # Re-read rows that came back unchanged leave the new rows as a pure append, which readers
+        # can apply to what they built for the previous version (see `delta`)
+        known = pd.MultiIndex.from_frame(delta[spec["key"]]).isin(pd.MultiIndex.from_frame(stored[spec["key"]]))
+        if len(delta[known].merge(stored, how="inner")) == known.sum():
+            self._write(_delta_name(table), delta[~known])
+            state["delta"] = {"rows": int((~known).sum())}
+        return delta_rows, state
@@ -0,0 +1,278 @@
+"""
+Seeded synthetic football data written to a DuckDB file with the warehouse's
+table and view names (FACT_TEAM_MATCH, DIM_TEAMS, DIM_LEAGUES, agg_league,
+agg_player, ATTENDeNCE_VIEW, VW_PLAYER_STATS).
+
+    python -m warehouse.synthetic --out football.duckdb --countries 4 --leagues-per-country 2 --seasons 5
+
+Point the app at the file with:
+
+    [backend]
+    type = "duckdb"
+
+    [duckdb]
+    path = "football.duckdb"
+"""
+import argparse
+import datetime
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+COUNTRIES = [
+    "Ardenia", "Borland", "Caledon", "Drevia", "Estoria", "Falmark", "Galvia", "Hestia",
+    "Istrana", "Jorvik", "Kestrel", "Lunaria", "Moravel", "Norvane", "Ostmark", "Pellaria",
+]
+TIERS = ["Premier Division", "Championship", "League One", "League Two", "National League"]
+PLACES = [
+    "Ashford", "Bramwell", "Carrow", "Dunmore", "Eastleigh", "Fenwick", "Glenholm", "Harrow", "Ivybridge",
+    "Kingsmoor", "Larkfield", "Marston", "Northam", "Oakridge", "Penhallow", "Queensbury", "Redcliffe",
+    "Stanmore", "Thornbury", "Upton", "Valemouth", "Westbrook", "Yarrow", "Ambleside", "Brackley", "Coldwater",
+    "Dalton", "Elmstead", "Farrowdale", "Greystone", "Holloway", "Irongate", "Kelby", "Lowther", "Millbrook",
+    "Newhaven", "Ormsby", "Portwell", "Ravensworth", "Saltash",
+]
+SUFFIXES = ["United", "City", "Town", "Rovers", "Athletic", "Albion", "Wanderers", "Rangers", "County", "FC",
+            "Villa", "Harriers"]
+FIRST_NAMES = ["Alex", "Ben", "Carlos", "Dan", "Eli", "Finn", "Gabe", "Hugo", "Ivan", "Jon", "Kai", "Leo",
+               "Marco", "Nico", "Owen", "Pablo", "Rafa", "Sami", "Theo", "Victor"]
+LAST_NAMES = ["Adler", "Brook", "Costa", "Dahl", "Evans", "Ferro", "Grant", "Holm", "Ibsen", "Jensen", "Kovac",
+              "Lund", "Moreau", "Novak", "Okafor", "Perez", "Quinn", "Rossi", "Silva", "Toft"]
+
+
+def double_round_robin(n_teams):
+    """(home, away, round) index arrays for a double round robin using the circle method."""
+    teams = list(range(n_teams))
+    first_half = []
+    for round_number in range(n_teams - 1):
+        for i in range(n_teams // 2):
+            home, away = teams[i], teams[n_teams - 1 - i]
+            # Alternate the fixed team's venue so home games are spread evenly
+            if i == 0 and round_number % 2:
+                home, away = away, home
+            first_half.append((home, away, round_number))
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+
+    second_half = [(away, home, round_number + n_teams - 1) for home, away, round_number in first_half]
+    fixtures = np.array(first_half + second_half)
+    return fixtures[:, 0], fixtures[:, 1], fixtures[:, 2]
+
+
+def _team_names(count, rng):
+    combos = [f"{place} {suffix}" for place, suffix in itertools.product(PLACES, SUFFIXES)]
+    names = [combos[i] for i in rng.permutation(len(combos))[:count]]
+    # More teams than name combinations: number the extras
+    names += [f"{combos[i % len(combos)]} {i // len(combos) + 1}" for i in range(len(names), count)]
+    return names
+
+
+def generate(countries=2, leagues_per_country=1, teams_per_league=20, seasons=3, players_per_team=25,
+             start_year=2020, seed=0):
+    """
+    Builds the warehouse tables as DataFrames.
+
+    Goals are Poisson with per-team attack/defence strengths that drift between
+    seasons plus a home advantage, so form, standings and predictions behave
+    like real data. The same arguments always produce the same data.
+
+    Returns:
+        dict: table name -> DataFrame (base tables only; views are created by `write`).
+    """
+    if teams_per_league % 2:
+        raise ValueError("teams_per_league must be even")
+    if not 1 <= countries <= len(COUNTRIES) or not 1 <= leagues_per_country <= len(TIERS):
+        raise ValueError(f"Between 1 and {len(COUNTRIES)} countries and 1 and {len(TIERS)} leagues per country")
+
+    rng = np.random.default_rng(seed)
+    n_leagues = countries * leagues_per_country
+    team_names = _team_names(n_leagues * teams_per_league, rng)
+    home_idx, away_idx, round_idx = double_round_robin(teams_per_league)
+
+    leagues, teams, games = [], [], []
+    team_id = 0
+    for c, country in enumerate(COUNTRIES[:countries]):
+        for tier in range(leagues_per_country):
+            league_id = len(leagues) + 1
+            league_name = f"{country} {TIERS[tier]}"
+            short_name = f"{country[:3].upper()}{tier + 1}"
+            leagues.append({"LEAGUE_ID": league_id, "LEAGUE_NAME": league_name, "SHORT_NAME": short_name,
+                            "COUNTRY_NAME": country})
+
+            ids = np.arange(team_id + 1, team_id + teams_per_league + 1)
+            for i, tid in enumerate(ids):
+                teams.append({"TEAM_ID": int(tid), "TEAM_NAME": team_names[team_id + i], "LEAGUE_NAME": league_name,
+                              "COUNTRY_NAME": country, "SHORT_NAME": short_name})
+            team_id += teams_per_league
+
+            attack = rng.normal(0, 0.25, teams_per_league)
+            defence = rng.normal(0, 0.25, teams_per_league)
+            for season in range(seasons):
+                attack += rng.normal(0, 0.05, teams_per_league)
+                defence += rng.normal(0, 0.05, teams_per_league)
+
+                # Weekly rounds from early August, leagues staggered by a day
+                season_start = datetime.date(start_year + season, 8, 5) + datetime.timedelta(days=tier)
+                played_on = np.array([season_start + datetime.timedelta(weeks=int(r)) for r in round_idx])
+
+                home_goals = rng.poisson(np.exp(0.15 + 0.25 + attack[home_idx] - defence[away_idx]))
+                away_goals = rng.poisson(np.exp(0.15 + attack[away_idx] - defence[home_idx]))
+                games.append(pd.DataFrame({
+                    "PLAYED_ON": played_on,
+                    "HOME_TEAM_ID": ids[home_idx],
+                    "AWAY_TEAM_ID": ids[away_idx],
+                    "HOME_SCORE": home_goals,
+                    "AWAY_SCORE": away_goals,
+                }))
+
+    games = pd.concat(games, ignore_index=True).sort_values(["PLAYED_ON", "HOME_TEAM_ID"], kind="stable")
+    games["GAME_ID"] = np.arange(1, len(games) + 1)
+
+    home_points = np.select([games["HOME_SCORE"] > games["AWAY_SCORE"], games["HOME_SCORE"] == games["AWAY_SCORE"]],
+                            [3, 1], 0)
+    away_points = np.select([games["AWAY_SCORE"] > games["HOME_SCORE"], games["HOME_SCORE"] == games["AWAY_SCORE"]],
+                            [3, 1], 0)
+    facts = pd.concat([
+        pd.DataFrame({"GAME_ID": games["GAME_ID"], "TEAM_ID": games["HOME_TEAM_ID"], "GAMEROLE": 1,
+                      "PLAYED_ON": games["PLAYED_ON"], "SCORED": games["HOME_SCORE"],
+                      "CONCEEDED": games["AWAY_SCORE"], "POINTS": home_points}),
+        pd.DataFrame({"GAME_ID": games["GAME_ID"], "TEAM_ID": games["AWAY_TEAM_ID"], "GAMEROLE": 2,
+                      "PLAYED_ON": games["PLAYED_ON"], "SCORED": games["AWAY_SCORE"],
+                      "CONCEEDED": games["HOME_SCORE"], "POINTS": away_points}),
+    ], ignore_index=True).sort_values(["TEAM_ID", "PLAYED_ON", "GAME_ID"], kind="stable")
+    facts.insert(2, "GAME_NUMBER", facts.groupby("TEAM_ID").cumcount() + 1)
+    facts = facts.sort_values(["GAME_ID", "GAMEROLE"], kind="stable").reset_index(drop=True)
+
+    # Home attendance: a stadium-sized base per team with match-to-match noise
+    capacity = rng.lognormal(9.6, 0.6, team_id + 1)
+    attendance = pd.DataFrame({
+        "GAME_ID": games["GAME_ID"],
+        "ATTENDANCE": np.round(capacity[games["HOME_TEAM_ID"]] * rng.uniform(0.6, 1.0, len(games))).astype(int),
+    })
+
+    players = _players(pd.DataFrame(teams), players_per_team, rng)
+
+    return {
+        "DIM_LEAGUES": pd.DataFrame(leagues),
+        "DIM_TEAMS": pd.DataFrame(teams),
+        "FACT_TEAM_MATCH": facts,
+        "MATCH_ATTENDANCE": attendance,
+        "PLAYER_STATS": players,
+    }
+
+
+def _players(teams, players_per_team, rng):
+    n = len(teams) * players_per_team
+    team_ids = np.repeat(teams["TEAM_ID"].to_numpy(), players_per_team)
+    games = rng.integers(0, 39, n)
+    starts = np.minimum(games, rng.binomial(games, 0.7))
+    minutes = starts * rng.integers(60, 91, n) + (games - starts) * rng.integers(1, 30, n)
+    scoring_rate = rng.gamma(1.2, 0.15, n)
+    goals = rng.poisson(minutes / 90 * scoring_rate)
+    assists = rng.poisson(minutes / 90 * scoring_rate * 0.7)
+    played = np.maximum(games, 1)
+
+    names = [f"{FIRST_NAMES[rng.integers(len(FIRST_NAMES))]} {LAST_NAMES[rng.integers(len(LAST_NAMES))]}"
+             for _ in range(n)]
+    return pd.DataFrame({
+        "PLAYER_ID": np.arange(1, n + 1),
+        "PLAYER_NAME": [f"{name} ({i + 1})" for i, name in enumerate(names)],
+        "TEAM_ID": team_ids,
+        "T_GAMES_PLAYED": games,
+        "T_STARTER_GAMES": starts,
+        "T_MINUTES_PLAYED": minutes,
+        "T_GOALS": goals,
+        "T_ASSISTS": assists,
+        "G90": np.round(np.where(minutes > 0, goals / np.maximum(minutes, 1) * 90, 0), 3),
+        "GPG": np.round(goals / played, 3),
+        "MPG": np.round(minutes / played, 1),
+        "T_YELLOW_CARDS": rng.poisson(games * 0.12),
+        "T_RED_CARDS": rng.poisson(games * 0.01),
+    })
+
+
+VIEWS = {
+    "ATTENDeNCE_VIEW": """
+        SELECT F.PLAYED_ON, T.TEAM_NAME, A.ATTENDANCE
+        FROM FACT_TEAM_MATCH F
+        JOIN DIM_TEAMS T ON F.TEAM_ID = T.TEAM_ID
+        JOIN MATCH_ATTENDANCE A ON A.GAME_ID = F.GAME_ID
+        WHERE F.GAMEROLE = 1
+    """,
+    # Current-season totals per team (seasons start in August)
+    "agg_league": """
+        WITH SEASONAL AS (
+            SELECT F.*, T.TEAM_NAME, T.LEAGUE_NAME, YEAR(F.PLAYED_ON - INTERVAL 7 MONTH) AS SEASON
+            FROM FACT_TEAM_MATCH F JOIN DIM_TEAMS T ON F.TEAM_ID = T.TEAM_ID
+        ),
+        CURRENT_SEASON AS (
+            SELECT LEAGUE_NAME, MAX(SEASON) AS SEASON FROM SEASONAL GROUP BY LEAGUE_NAME
+        )
+        SELECT
+            S.LEAGUE_NAME AS FORMAL_LEAGUE_NAME,
+            S.TEAM_NAME,
+            CAST(COUNT(*) AS INTEGER) AS GAMESPLAYED,
+            CAST(SUM(S.POINTS) AS INTEGER) AS TOTALPOINTS,
+            CAST(COUNT_IF(S.POINTS = 3) AS INTEGER) AS WINS,
+            CAST(COUNT_IF(S.POINTS = 1) AS INTEGER) AS DRAWS,
+            CAST(COUNT_IF(S.POINTS = 0) AS INTEGER) AS LOSSES,
+            CAST(SUM(S.SCORED) AS INTEGER) AS TOTALSCORED,
+            CAST(SUM(S.CONCEEDED) AS INTEGER) AS TOTALCONCEDED
+        FROM SEASONAL S
+        JOIN CURRENT_SEASON C ON S.LEAGUE_NAME = C.LEAGUE_NAME AND S.SEASON = C.SEASON
+        GROUP BY S.LEAGUE_NAME, S.TEAM_NAME
+    """,
+    "agg_player": """
+        SELECT
+            P.PLAYER_ID, P.PLAYER_NAME, T.TEAM_NAME, T.COUNTRY_NAME, T.LEAGUE_NAME,
+            P.T_MINUTES_PLAYED AS TOTAL_MINUTESPLAYED, P.T_GOALS AS TOTAL_GOALS, P.T_ASSISTS AS TOTAL_ASSISTS,
+            P.T_GAMES_PLAYED, P.G90, P.GPG, P.MPG, P.T_YELLOW_CARDS, P.T_RED_CARDS
+        FROM PLAYER_STATS P JOIN DIM_TEAMS T ON P.TEAM_ID = T.TEAM_ID
+    """,
+    "VW_PLAYER_STATS": """
+        SELECT
+            P.PLAYER_ID, P.PLAYER_NAME, T.TEAM_NAME, T.LEAGUE_NAME, T.COUNTRY_NAME, T.SHORT_NAME,
+            P.T_GAMES_PLAYED, P.T_STARTER_GAMES, P.T_MINUTES_PLAYED, P.T_GOALS, P.T_ASSISTS,
+            P.G90, P.GPG, P.MPG, P.T_YELLOW_CARDS, P.T_RED_CARDS
+        FROM PLAYER_STATS P JOIN DIM_TEAMS T ON P.TEAM_ID = T.TEAM_ID
+    """,
+}
+
+
+def write(path, tables, overwrite=True):
+    """Writes the base tables and the warehouse views to a DuckDB file."""
+    import duckdb
+
+    if overwrite and os.path.exists(path):
+        os.remove(path)
+    with duckdb.connect(path) as conn:
+        for name, df in tables.items():
+            conn.register("_frame", df)
+            conn.execute(f"CREATE TABLE {name} AS SELECT * FROM _frame")
+            conn.unregister("_frame")
+        for name, sql in VIEWS.items():
+            conn.execute(f"CREATE VIEW {name} AS {sql}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="football.duckdb")
+    parser.add_argument("--countries", type=int, default=2)
+    parser.add_argument("--leagues-per-country", type=int, default=1)
+    parser.add_argument("--teams", type=int, default=20, help="Teams per league (even)")
+    parser.add_argument("--seasons", type=int, default=3, help="1 to 50")
+    parser.add_argument("--players", type=int, default=25, help="Players per team")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not 1 <= args.seasons <= 50:
+        parser.error("--seasons must be between 1 and 50")
+
+    tables = generate(args.countries, args.leagues_per_country, args.teams, args.seasons, args.players,
+                      seed=args.seed)
+    write(args.out, tables)
+    print(f"Wrote {args.out}: " + ", ".join(f"{name}={len(df):,}" for name, df in tables.items()))
+
+
+if __name__ == "__main__":
+    main()